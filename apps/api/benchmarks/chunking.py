@@ -0,0 +1,123 @@
+"""
+Measures chunk_text throughput on MAXIMUM_CONTENT_LENGTH documents, including the
+worst cases of one giant paragraph, text without sentence punctuation, and text
+without whitespace. Runs without a database.
+
+    python -m benchmarks.chunking --repeat 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from typing import Callable
+
+from benchmarks.corpus import FILLER, TOPICS
+from benchmarks.stats import print_table
+from bookmemory.services.extraction.content_extract import MAXIMUM_CONTENT_LENGTH
+from bookmemory.services.extraction.text_chunk import chunk_text
+from bookmemory.services.extraction.tokenize import (
+    load_tiktoken_counter,
+    estimate_tokens,
+)
+
+
+def _words(rng: random.Random) -> list[str]:
+    """Returns a stream of topic and filler words long enough for one document."""
+    vocabulary = [word for words in TOPICS.values() for word in words] + FILLER
+    return [rng.choice(vocabulary) for _ in range(MAXIMUM_CONTENT_LENGTH // 4)]
+
+
+def _documents(seed: int) -> dict[str, str]:
+    """Returns benchmark documents trimmed to the maximum content length."""
+    rng = random.Random(seed)
+    words = _words(rng)
+
+    sentences: list[str] = []
+    word_index = 0
+    while word_index < len(words):
+        length = rng.randint(6, 30)
+        sentences.append(
+            " ".join(words[word_index : word_index + length]).capitalize() + "."
+        )
+        word_index += length
+    paragraphs = [
+        " ".join(sentences[start : start + rng.randint(2, 8)])
+        for start in range(0, len(sentences), 5)
+    ]
+
+    documents = {
+        "prose": "\n\n".join(paragraphs),
+        "one paragraph": " ".join(sentences),
+        "no punctuation": " ".join(words),
+        "no whitespace": "".join(words),
+    }
+    return {
+        name: document[:MAXIMUM_CONTENT_LENGTH] for name, document in documents.items()
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-tokens", type=int, default=None)
+    parser.add_argument("--overlap-tokens", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    tokenizers: dict[str, Callable[[str], int]] = {"estimate": estimate_tokens}
+    tiktoken_counter = load_tiktoken_counter()
+    if tiktoken_counter is not None:
+        tokenizers["tiktoken"] = tiktoken_counter
+
+    report_rows: list[list[object]] = []
+    for document_name, document in _documents(args.seed).items():
+        for tokenizer_name, count_tokens in tokenizers.items():
+            chunks: list[str] = []
+            elapsed: list[float] = []
+            for _ in range(max(1, args.repeat)):
+                start = time.perf_counter()
+                chunks = chunk_text(
+                    text=document,
+                    max_tokens=args.max_tokens,
+                    overlap_tokens=args.overlap_tokens,
+                    count_tokens=count_tokens,
+                )
+                elapsed.append(time.perf_counter() - start)
+
+            best_seconds = min(elapsed)
+            chunk_tokens = [count_tokens(chunk) for chunk in chunks]
+            report_rows.append(
+                [
+                    document_name,
+                    tokenizer_name,
+                    len(chunks),
+                    sum(chunk_tokens) / max(1, len(chunk_tokens)),
+                    max(chunk_tokens, default=0),
+                    best_seconds * 1000.0,
+                    len(chunks) / best_seconds if best_seconds > 0 else 0.0,
+                    len(document) / (1024 * 1024) / best_seconds
+                    if best_seconds > 0
+                    else 0.0,
+                ]
+            )
+
+    print_table(
+        f"chunk_text ({MAXIMUM_CONTENT_LENGTH} characters, best of {args.repeat})",
+        [
+            "document",
+            "tokenizer",
+            "chunks",
+            "avg tokens",
+            "max tokens",
+            "ms",
+            "chunks/s",
+            "MB/s",
+        ],
+        report_rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import html
+import random
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Iterator
+
+# topics give the generated pages overlapping vocabularies so related and semantic search have structure
+TOPICS: dict[str, list[str]] = {
+    "databases": [
+        "postgres", "index", "query", "planner", "vacuum", "replication", "btree",
+        "transaction", "isolation", "wal", "partition", "vector", "join", "latency",
+    ],
+    "cooking": [
+        "recipe", "oven", "garlic", "butter", "simmer", "roast", "flour", "yeast",
+        "sourdough", "knife", "pan", "broth", "spice", "caramelize",
+    ],
+    "astronomy": [
+        "telescope", "galaxy", "nebula", "orbit", "planet", "comet", "redshift",
+        "supernova", "spectrum", "exoplanet", "gravity", "eclipse", "star", "cluster",
+    ],
+    "gardening": [
+        "soil", "compost", "seedling", "prune", "mulch", "tomato", "perennial",
+        "irrigation", "greenhouse", "bloom", "root", "harvest", "trellis", "weed",
+    ],
+    "finance": [
+        "budget", "index", "fund", "dividend", "inflation", "bond", "portfolio",
+        "interest", "mortgage", "savings", "equity", "tax", "retirement", "risk",
+    ],
+}  # fmt: skip
+
+FILLER = [
+    "the", "a", "with", "and", "for", "when", "this", "that", "often", "because",
+    "most", "every", "which", "about", "before", "after", "during", "between",
+]  # fmt: skip
+
+
+@dataclass(frozen=True)
+class CorpusPage:
+    path: str
+    title: str
+    topic: str
+    html: str
+
+
+def _sentence(rng: random.Random, words: list[str]) -> str:
+    """Returns a sentence mixing topic words and filler words."""
+    length = rng.randint(8, 20)
+    tokens = [
+        rng.choice(words) if rng.random() < 0.45 else rng.choice(FILLER)
+        for _ in range(length)
+    ]
+    return " ".join(tokens).capitalize() + "."
+
+
+def generate_pages(
+    count: int, *, paragraphs: int = 12, seed: int = 7
+) -> list[CorpusPage]:
+    """Returns deterministic article pages spread across the corpus topics."""
+    rng = random.Random(seed)
+    topic_names = sorted(TOPICS)
+    pages: list[CorpusPage] = []
+    for page_index in range(count):
+        topic = topic_names[page_index % len(topic_names)]
+        words = TOPICS[topic]
+        title = f"{topic.title()} notes {page_index}: {' '.join(rng.sample(words, 3))}"
+        body = "\n".join(
+            f"<p>{html.escape(' '.join(_sentence(rng, words) for _ in range(5)))}</p>"
+            for _ in range(paragraphs)
+        )
+        pages.append(
+            CorpusPage(
+                path=f"/{topic}/{page_index}.html",
+                title=title,
+                topic=topic,
+                html=(
+                    "<!doctype html><html><head>"
+                    f"<title>{html.escape(title)}</title></head>"
+                    f"<body><article><h1>{html.escape(title)}</h1>{body}</article></body></html>"
+                ),
+            )
+        )
+    return pages
+
+
+def load_saved_pages(directory: Path) -> list[CorpusPage]:
+    """Returns saved html pages from a directory, using the parent folder as the topic."""
+    pages: list[CorpusPage] = []
+    for file_path in sorted(directory.rglob("*.html")):
+        relative_path = file_path.relative_to(directory)
+        topic = relative_path.parts[0] if len(relative_path.parts) > 1 else "saved"
+        pages.append(
+            CorpusPage(
+                path=f"/{relative_path.as_posix()}",
+                title=file_path.stem.replace("-", " ").replace("_", " "),
+                topic=topic,
+                html=file_path.read_text(encoding="utf-8", errors="replace"),
+            )
+        )
+    return pages
+
+
+@contextmanager
+def serve_pages(pages: list[CorpusPage]) -> Iterator[str]:
+    """Serves the pages from a local http server and yields its base url."""
+    page_by_path = {page.path: page.html.encode("utf-8") for page in pages}
+
+    class PageHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            body = page_by_path.get(self.path)
+            if body is None:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: object) -> None:
+            # keep request logs out of the benchmark output
+            return
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PageHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        host, port = server.server_address[:2]
+        yield f"http://{host!s}:{port}"
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,110 @@
+"""
+Measures the CPU time and bytes to move one embedding through each hop: decoding the
+provider response as a json float list or as base64, binding a query vector to
+postgres as a pgvector text literal or in the binary format, and reading a stored
+vector back as text or binary. Runs without a database or provider.
+
+    python -m benchmarks.embedding_codec --dim 1536 --repeat 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import json
+import time
+from typing import Callable
+
+import numpy as np
+from pgvector import Vector
+
+from benchmarks.stats import print_table
+from bookmemory.db.models.bookmark_chunk import EMBEDDING_DIM
+
+
+def _time_microseconds(function: Callable[[], object], repeat: int) -> float:
+    """Returns the mean microseconds per call."""
+    function()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat * 1_000_000
+
+
+def run(args: argparse.Namespace) -> None:
+    rng = np.random.default_rng(args.seed)
+    embedding = rng.standard_normal(args.dim).astype(np.float32)
+    embedding /= np.linalg.norm(embedding)
+    embedding_list = [float(value) for value in embedding]
+
+    # the provider's json embedding and its base64 little-endian float32 bytes
+    json_response = json.dumps(embedding_list)
+    base64_response = base64.b64encode(embedding.astype("<f4").tobytes()).decode()
+
+    # the query parameter postgres receives, and a stored vector it returns
+    text_literal = str(Vector._to_db(embedding_list))
+    binary_value = Vector(embedding).to_binary()
+
+    # each hop before and after, with the bytes sent for each
+    hops: list[tuple[str, str, Callable[[], object], int]] = [
+        (
+            "provider decode",
+            "json floats",
+            lambda: json.loads(json_response),
+            len(json_response),
+        ),
+        (
+            "provider decode",
+            "base64",
+            lambda: np.frombuffer(base64.b64decode(base64_response), dtype="<f4"),
+            len(base64_response),
+        ),
+        (
+            "query bind",
+            "text literal",
+            lambda: Vector._to_db(embedding_list),
+            len(text_literal),
+        ),
+        (
+            "query bind",
+            "binary",
+            lambda: Vector(embedding).to_binary(),
+            len(binary_value),
+        ),
+        (
+            "vector read",
+            "text literal",
+            lambda: Vector._from_text(text_literal),
+            len(text_literal),
+        ),
+        (
+            "vector read",
+            "binary",
+            lambda: Vector.from_binary(binary_value).to_numpy(),
+            len(binary_value),
+        ),
+    ]
+
+    report_rows: list[list[object]] = []
+    for hop, encoding, function, size in hops:
+        report_rows.append(
+            [hop, encoding, _time_microseconds(function, args.repeat), size]
+        )
+
+    print_table(
+        f"embedding codecs ({args.dim} dimensions, {args.repeat} repeats)",
+        ["hop", "encoding", "us", "bytes"],
+        report_rows,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dim", type=int, default=EMBEDDING_DIM)
+    parser.add_argument("--repeat", type=int, default=2_000)
+    parser.add_argument("--seed", type=int, default=7)
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+Measures throughput and p50/p95/p99 latency of the load, search, related, and list
+handlers against the database in DATABASE_URL, with the fake AI provider and a
+corpus of pages served from a local http server. Nothing leaves the machine.
+
+Run the migrations first, then:
+
+    python -m benchmarks.handlers --bookmarks 200 --concurrency 8
+    python -m benchmarks.handlers --corpus-dir ./saved-pages  # serve saved html pages
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from pathlib import Path
+from typing import Awaitable, Callable, Sequence
+
+import httpx
+from sqlalchemy import delete
+
+from benchmarks.corpus import (
+    TOPICS,
+    CorpusPage,
+    generate_pages,
+    load_saved_pages,
+    serve_pages,
+)
+from benchmarks.stats import LatencySummary, print_table, summarize_latencies
+from bookmemory.core.settings import settings
+from bookmemory.db.engine import engine
+from bookmemory.db.models.user import User
+from bookmemory.db.session import async_session_factory
+from bookmemory.main import create_app
+from bookmemory.schemas.users import CurrentUser
+from bookmemory.services.auth.users import get_current_user
+
+API_PREFIX = "/api/v1/bookmarks"
+
+
+async def _create_user() -> CurrentUser:
+    """Creates a throwaway benchmark user."""
+    async with async_session_factory() as session:
+        user = User(
+            auth_provider="benchmark",
+            auth_subject=str(uuid.uuid4()),
+            email="benchmark@localhost",
+            name="benchmark",
+        )
+        session.add(user)
+        await session.commit()
+        await session.refresh(user)
+        return CurrentUser.model_validate(user, from_attributes=True)
+
+
+async def _delete_user(user_id: uuid.UUID) -> None:
+    """Deletes the benchmark user and, by cascade, its bookmarks."""
+    async with async_session_factory() as session:
+        await session.execute(delete(User).where(User.id == user_id))
+        await session.commit()
+
+
+async def _measure(
+    requests: Sequence[Callable[[], Awaitable[httpx.Response]]],
+    *,
+    concurrency: int,
+) -> tuple[LatencySummary, int]:
+    """Runs the requests with bounded concurrency and returns their latencies and error count."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    errors = 0
+
+    async def run_request(request: Callable[[], Awaitable[httpx.Response]]) -> None:
+        nonlocal errors
+        async with semaphore:
+            request_start = time.perf_counter()
+            response = await request()
+            latencies.append(time.perf_counter() - request_start)
+            if response.is_error:
+                errors += 1
+
+    total_start = time.perf_counter()
+    await asyncio.gather(*(run_request(request) for request in requests))
+    return summarize_latencies(
+        latencies, total_seconds=time.perf_counter() - total_start
+    ), errors
+
+
+def _search_queries(pages: Sequence[CorpusPage], count: int, seed: int) -> list[str]:
+    """Returns search queries built from the corpus topic vocabularies."""
+    rng = random.Random(seed)
+    topics = sorted({page.topic for page in pages})
+    queries: list[str] = []
+    for _ in range(count):
+        words = TOPICS.get(rng.choice(topics)) or [page.title for page in pages]
+        queries.append(" ".join(rng.sample(words, min(3, len(words)))))
+    return queries
+
+
+async def run(args: argparse.Namespace) -> None:
+    # answer every ai request locally and deterministically
+    settings.embedding_provider = "fake"
+    settings.description_provider = "fake"
+    settings.summary_provider = "fake"
+    settings.fake_ai_latency_ms = args.ai_latency_ms
+
+    pages = (
+        load_saved_pages(args.corpus_dir)
+        if args.corpus_dir
+        else generate_pages(args.bookmarks)
+    )[: args.bookmarks]
+    if not pages:
+        raise SystemExit("the corpus has no pages")
+
+    user = await _create_user()
+    app = create_app()
+    app.dependency_overrides[get_current_user] = lambda: user
+    transport = httpx.ASGITransport(app=app)
+    report_rows: list[list[object]] = []
+    try:
+        with serve_pages(pages) as corpus_url:
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://benchmark", timeout=120.0
+            ) as client:
+                # create one link bookmark per corpus page
+                bookmark_ids: list[str] = []
+                for page in pages:
+                    response = await client.post(
+                        f"{API_PREFIX}/",
+                        json={
+                            "type": "link",
+                            "title": page.title,
+                            "description": page.title,
+                            "url": f"{corpus_url}{page.path}",
+                            "tags": [page.topic],
+                        },
+                    )
+                    response.raise_for_status()
+                    bookmark_ids.append(response.json()["id"])
+
+                def load(bookmark_id: str) -> Callable[[], Awaitable[httpx.Response]]:
+                    return lambda: client.post(f"{API_PREFIX}/{bookmark_id}/load")
+
+                def search(query: str) -> Callable[[], Awaitable[httpx.Response]]:
+                    return lambda: client.post(
+                        f"{API_PREFIX}/search", json={"search": query, "limit": 20}
+                    )
+
+                def related(
+                    bookmark_id: str,
+                ) -> Callable[[], Awaitable[httpx.Response]]:
+                    return lambda: client.get(f"{API_PREFIX}/{bookmark_id}/related")
+
+                def list_page(offset: int) -> Callable[[], Awaitable[httpx.Response]]:
+                    return lambda: client.get(
+                        f"{API_PREFIX}/", params={"limit": 20, "offset": offset}
+                    )
+
+                rng = random.Random(args.seed)
+                queries = _search_queries(pages, args.requests, args.seed)
+                operations: list[
+                    tuple[str, list[Callable[[], Awaitable[httpx.Response]]]]
+                ] = [
+                    ("load", [load(bookmark_id) for bookmark_id in bookmark_ids]),
+                    ("search", [search(query) for query in queries]),
+                    (
+                        "related",
+                        [
+                            related(rng.choice(bookmark_ids))
+                            for _ in range(args.requests)
+                        ],
+                    ),
+                    (
+                        "list",
+                        [
+                            list_page(rng.randrange(0, len(bookmark_ids), 20))
+                            for _ in range(args.requests)
+                        ],
+                    ),
+                ]
+                for name, requests in operations:
+                    latency, errors = await _measure(
+                        requests, concurrency=args.concurrency
+                    )
+                    report_rows.append(
+                        [
+                            name,
+                            latency.count,
+                            errors,
+                            latency.throughput,
+                            latency.p50_ms,
+                            latency.p95_ms,
+                            latency.p99_ms,
+                        ]
+                    )
+    finally:
+        await _delete_user(user.id)
+        await engine.dispose()
+
+    print_table(
+        f"handlers ({len(pages)} bookmarks, concurrency {args.concurrency})",
+        ["operation", "requests", "errors", "req/s", "p50 ms", "p95 ms", "p99 ms"],
+        report_rows,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--bookmarks", type=int, default=200)
+    parser.add_argument(
+        "--requests", type=int, default=200, help="search, related, and list requests"
+    )
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument(
+        "--ai-latency-ms", type=float, default=0.0, help="simulated ai provider latency"
+    )
+    parser.add_argument("--corpus-dir", type=Path, default=None)
+    parser.add_argument("--seed", type=int, default=7)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
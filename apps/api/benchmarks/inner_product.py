@@ -0,0 +1,178 @@
+"""
+Compares cosine distance with negative inner product on unit length embeddings:
+checks that both rank the nearest neighbors identically in exact scans, and measures
+exact scan and hnsw query latency with vector_cosine_ops and vector_ip_ops indexes.
+
+Runs against the database in DATABASE_URL inside a throwaway "benchmark" schema:
+
+    python -m benchmarks.inner_product --rows 20000 --queries 100 --k 10
+    python -m benchmarks.inner_product --source chunks  # use stored bookmark embeddings
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from dataclasses import dataclass
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+
+from benchmarks.stats import print_table, summarize_latencies
+from benchmarks.vector_storage import TABLE, _load_vectors, _sample_queries
+from bookmemory.core.settings import settings
+from bookmemory.db.models.bookmark_chunk import EMBEDDING_DIM
+
+
+@dataclass(frozen=True)
+class DistanceMode:
+    name: str
+    operator: str
+    operator_class: str
+
+
+DISTANCE_MODES = [
+    DistanceMode(name="cosine", operator="<=>", operator_class="vector_cosine_ops"),
+    DistanceMode(name="inner product", operator="<#>", operator_class="vector_ip_ops"),
+]
+
+
+async def _nearest_ids(
+    connection: AsyncConnection, *, mode: DistanceMode, dim: int, query: str, k: int
+) -> tuple[list[int], float]:
+    """Returns the ids of the nearest rows in distance order and the query seconds."""
+    query_start = time.perf_counter()
+    neighbor_rows = await connection.execute(
+        text(f"""
+            SELECT id FROM {TABLE}
+            ORDER BY embedding {mode.operator} CAST(:query AS vector({dim}))
+            LIMIT :k
+        """),
+        {"query": query, "k": k},
+    )
+    neighbor_ids = [int(row.id) for row in neighbor_rows]
+    return neighbor_ids, time.perf_counter() - query_start
+
+
+async def run(args: argparse.Namespace) -> None:
+    engine = create_async_engine(settings.database_url)
+    try:
+        async with engine.connect() as connection:
+            connection = await connection.execution_options(
+                isolation_level="AUTOCOMMIT"
+            )
+            print(f"loading {args.rows} {args.source} vectors ({args.dim} dimensions)")
+            await _load_vectors(
+                connection,
+                source=args.source,
+                dim=args.dim,
+                rows=args.rows,
+                clusters=args.clusters,
+            )
+
+            # store unit length embeddings like the api does
+            await connection.execute(
+                text(f"UPDATE {TABLE} SET embedding = l2_normalize(embedding)")
+            )
+            await connection.execute(text(f"ANALYZE {TABLE}"))
+            queries = await _sample_queries(
+                connection, dim=args.dim, queries=args.queries
+            )
+
+            # exact scans run before any index exists
+            exact_neighbors: dict[str, list[list[int]]] = {}
+            exact_latencies: dict[str, list[float]] = {}
+            for mode in DISTANCE_MODES:
+                exact_neighbors[mode.name] = []
+                exact_latencies[mode.name] = []
+                for query in queries:
+                    neighbor_ids, seconds = await _nearest_ids(
+                        connection, mode=mode, dim=args.dim, query=query, k=args.k
+                    )
+                    exact_neighbors[mode.name].append(neighbor_ids)
+                    exact_latencies[mode.name].append(seconds)
+            identical_rankings = sum(
+                cosine_ids == inner_product_ids
+                for cosine_ids, inner_product_ids in zip(
+                    exact_neighbors["cosine"], exact_neighbors["inner product"]
+                )
+            )
+
+            report_rows: list[list[object]] = []
+            for mode in DISTANCE_MODES:
+                # build the index for this mode only so the planner can't pick another one
+                index_name = f"benchmark_{mode.operator_class}_idx"
+                build_start = time.perf_counter()
+                await connection.execute(
+                    text(f"""
+                        CREATE INDEX {index_name} ON {TABLE}
+                        USING hnsw (embedding {mode.operator_class})
+                    """)
+                )
+                build_seconds = time.perf_counter() - build_start
+
+                latencies: list[float] = []
+                recalls: list[float] = []
+                for query, expected_ids in zip(queries, exact_neighbors[mode.name]):
+                    neighbor_ids, seconds = await _nearest_ids(
+                        connection, mode=mode, dim=args.dim, query=query, k=args.k
+                    )
+                    latencies.append(seconds)
+                    recalls.append(
+                        len(set(neighbor_ids) & set(expected_ids))
+                        / max(1, len(expected_ids))
+                    )
+                await connection.execute(text(f"DROP INDEX benchmark.{index_name}"))
+
+                exact_latency = summarize_latencies(exact_latencies[mode.name])
+                latency = summarize_latencies(latencies)
+                report_rows.append(
+                    [
+                        mode.name,
+                        exact_latency.p50_ms,
+                        build_seconds,
+                        latency.p50_ms,
+                        latency.p95_ms,
+                        sum(recalls) / max(1, len(recalls)),
+                    ]
+                )
+
+            print_table(
+                f"vector distance ({args.rows} rows, {args.queries} queries)",
+                [
+                    "distance",
+                    "exact p50 ms",
+                    "build s",
+                    "hnsw p50 ms",
+                    "hnsw p95 ms",
+                    f"recall@{args.k}",
+                ],
+                report_rows,
+            )
+            print(
+                f"identical exact rankings: {identical_rankings} of {len(queries)} queries"
+            )
+
+            if not args.keep:
+                await connection.execute(text("DROP SCHEMA benchmark CASCADE"))
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--source", choices=["synthetic", "chunks"], default="synthetic"
+    )
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--dim", type=int, default=EMBEDDING_DIM)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--keep", action="store_true", help="keep the benchmark schema")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
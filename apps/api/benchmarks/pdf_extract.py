@@ -0,0 +1,173 @@
+"""
+Measures PDF text extraction throughput in pages per second for different numbers
+of worker processes, plus the end-to-end extract_pdf_text path with the configured
+FILE_EXTRACT_MAX_WORKERS. Uses a generated PDF unless --pdf is given. Runs without
+a database.
+
+    python -m benchmarks.pdf_extract --pages 400 --workers 1 2 4
+    python -m benchmarks.pdf_extract --pdf ./paper.pdf
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+import anyio
+
+from benchmarks.corpus import FILLER, TOPICS
+from benchmarks.stats import print_table
+from bookmemory.core.settings import settings
+from bookmemory.services.extraction.file_extract import (
+    PAGES_PER_TASK,
+    extract_pdf_text,
+)
+from bookmemory.services.extraction.pdf_pages import count_pdf_pages, extract_pdf_pages
+
+LINES_PER_PAGE = 60
+
+
+def _escape_pdf_text(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_text_pdf(path: Path, *, pages: int, seed: int) -> None:
+    """Writes a PDF with pages of generated text lines."""
+    rng = random.Random(seed)
+    vocabulary = [word for words in TOPICS.values() for word in words] + FILLER
+
+    # objects 1-3 are the catalog, the page tree, and the font. each page adds a page and a content stream
+    objects: list[bytes] = [
+        b"",
+        b"",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids: list[int] = []
+    for _ in range(pages):
+        lines = [
+            " ".join(rng.choice(vocabulary) for _ in range(rng.randint(8, 14)))
+            for _ in range(LINES_PER_PAGE)
+        ]
+        text_operations = " ".join(f"({_escape_pdf_text(line)}) '" for line in lines)
+        stream = f"BT /F1 10 Tf 12 TL 40 780 Td {text_operations} ET".encode("latin-1")
+        objects.append(
+            b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+        )
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids).encode("ascii")
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+
+    # write the objects followed by the cross-reference table of their byte offsets
+    with path.open("wb") as file:
+        file.write(b"%PDF-1.4\n")
+        offsets: list[int] = []
+        for object_id, body in enumerate(objects, start=1):
+            offsets.append(file.tell())
+            file.write(b"%d 0 obj\n%s\nendobj\n" % (object_id, body))
+        xref_offset = file.tell()
+        file.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for offset in offsets:
+            file.write(b"%010d 00000 n \n" % offset)
+        file.write(
+            b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+            % (len(objects) + 1, xref_offset)
+        )
+
+
+async def _extract_with_workers(path: Path, workers: int) -> tuple[int, int]:
+    """Extracts every page with a fixed number of worker processes and returns the page and character counts."""
+    limiter = anyio.CapacityLimiter(workers)
+    page_count = await anyio.to_process.run_sync(
+        count_pdf_pages, str(path), limiter=limiter
+    )
+    characters = 0
+
+    async def extract_range(first_page: int) -> None:
+        nonlocal characters
+        page_texts = await anyio.to_process.run_sync(
+            extract_pdf_pages,
+            str(path),
+            first_page,
+            first_page + PAGES_PER_TASK,
+            limiter=limiter,
+        )
+        characters += sum(len(page_text) for page_text in page_texts)
+
+    async with anyio.create_task_group() as task_group:
+        for first_page in range(0, page_count, PAGES_PER_TASK):
+            task_group.start_soon(extract_range, first_page)
+    return page_count, characters
+
+
+async def run(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        path = args.pdf
+        if path is None:
+            path = Path(directory) / "benchmark.pdf"
+            write_text_pdf(path, pages=args.pages, seed=args.seed)
+        size_mb = path.stat().st_size / (1024 * 1024)
+
+        # start the worker processes before timing anything
+        await _extract_with_workers(path, max(args.workers))
+
+        report_rows: list[list[object]] = []
+        for workers in args.workers:
+            start = time.perf_counter()
+            page_count, characters = await _extract_with_workers(path, workers)
+            seconds = time.perf_counter() - start
+            report_rows.append(
+                [
+                    f"{workers} workers",
+                    page_count,
+                    characters,
+                    seconds * 1000.0,
+                    page_count / seconds,
+                    size_mb / seconds,
+                ]
+            )
+
+        # the load path stops at MAXIMUM_CONTENT_LENGTH characters
+        start = time.perf_counter()
+        content = await extract_pdf_text(
+            path, max_characters=settings.maximum_content_length
+        )
+        seconds = time.perf_counter() - start
+        report_rows.append(
+            [
+                f"extract_pdf_text ({settings.file_extract_max_workers} workers)",
+                "-",
+                len(content),
+                seconds * 1000.0,
+                "-",
+                size_mb / seconds,
+            ]
+        )
+
+    print_table(
+        f"pdf extraction ({path.name}, {size_mb:.2f} MB)",
+        ["mode", "pages", "characters", "ms", "pages/s", "MB/s"],
+        report_rows,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pdf", type=Path, default=None)
+    parser.add_argument("--pages", type=int, default=400)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--seed", type=int, default=7)
+    anyio.run(run, parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+Counts the SQL statements each bookmark handler runs against the database in
+DATABASE_URL, for a user whose bookmarks all share a few popular tags, at growing
+library sizes. Fails when a handler runs more statements than its budget or when
+its statement count grows with the library.
+
+Run the migrations first, then:
+
+    python -m benchmarks.query_counts --sizes 50 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+from typing import Any, Awaitable, Callable
+
+import httpx
+from sqlalchemy import event
+
+from benchmarks.corpus import TOPICS
+from benchmarks.handlers import API_PREFIX, _create_user, _delete_user
+from benchmarks.stats import print_table
+from bookmemory.core.settings import settings
+from bookmemory.db.embedding_schema import has_binary_column
+from bookmemory.db.engine import engine
+from bookmemory.db.models.bookmark import (
+    Bookmark,
+    BookmarkStatus,
+    BookmarkType,
+    LoadMethod,
+)
+from bookmemory.db.session import async_session_factory
+from bookmemory.main import create_app
+from bookmemory.services.auth.users import get_current_user
+from bookmemory.services.embedding.chunk_pipeline import chunk_and_embed_content
+from bookmemory.services.tags.get_tags import get_or_create_tags
+from bookmemory.services.tags.tag_counts import invalidate_tag_counts
+
+POPULAR_TAGS = ["popular-0", "popular-1", "popular-2"]
+SEARCH_TEXT = "postgres index planner"
+
+# every bookmark has the same text, so searches match every bookmark at every size
+CONTENT = " ".join(
+    f"The {word} notes cover postgres index planner behavior in detail."
+    for word in TOPICS["databases"]
+)
+
+
+class StatementCounter:
+    """Counts the statements sent to the database."""
+
+    def __init__(self) -> None:
+        self.count = 0
+
+    def __call__(self, *args: Any) -> None:
+        self.count += 1
+
+
+def _statement_budgets(*, binary_prefilter: bool) -> dict[str, int]:
+    """Returns the most statements each handler may run with the current settings."""
+    # session settings each vector search sets before it runs
+    vector_setup = int(settings.vector_iterative_scan != "off") + int(binary_prefilter)
+    # every library is new, so a warm typeahead cache loads it first
+    typeahead_load = 2 * int(settings.typeahead_cache_max_users > 0)
+    return {
+        # bookmark + tags
+        "detail": 2,
+        # count + bookmarks with tags
+        "list": 2,
+        # bookmarks with tags
+        "cursor": 1,
+        # tag counts
+        "tags": 1,
+        # library generation + tag ids + vector search + keyword search
+        # + bookmarks with tags + headlines
+        "search": 6 + vector_setup,
+        # library generation + bookmark + tags + query chunk + vector search
+        # + bookmarks with tags + snippets
+        "related": 7 + vector_setup,
+        # library generation + library size + typeahead library or trigram search.
+        # only the trigram search without the cache
+        "typeahead": 1 + typeahead_load,
+        # bookmark + tags + tag lookup + two count updates + bookmark update
+        # + tag link delete and insert + library generation + bookmark + tags
+        "update": 11,
+    }
+
+
+async def _seed_bookmarks(user_id: uuid.UUID, count: int) -> list[uuid.UUID]:
+    """Adds ready note bookmarks with the popular tags and embedded chunks."""
+    async with async_session_factory() as session:
+        # create every tag up front so the update doesn't add one
+        tags = (
+            await get_or_create_tags(
+                session=session, user_id=user_id, tag_names=POPULAR_TAGS
+            )
+        )[:2]
+        bookmarks = [
+            Bookmark(
+                user_id=user_id,
+                type=BookmarkType.note,
+                title=f"Database notes {bookmark_index}",
+                description="postgres index planner notes",
+                content=CONTENT,
+                status=BookmarkStatus.ready,
+                load_method=LoadMethod.manual,
+                tags=tags,
+                tag_ids=[tag.id for tag in tags],
+            )
+            for bookmark_index in range(count)
+        ]
+        session.add_all(bookmarks)
+        for tag in tags:
+            tag.bookmark_count = count
+        await session.flush()
+
+        for bookmark in bookmarks:
+            await chunk_and_embed_content(
+                session=session, bookmark_id=bookmark.id, content=CONTENT
+            )
+        await session.commit()
+        return [bookmark.id for bookmark in bookmarks]
+
+
+async def _count_statements(
+    counter: StatementCounter,
+    request: Callable[[], Awaitable[httpx.Response]],
+) -> tuple[int, float]:
+    """Returns the statements a request ran and its latency in milliseconds."""
+    counter.count = 0
+    request_start = time.perf_counter()
+    response = await request()
+    latency_ms = (time.perf_counter() - request_start) * 1000
+    response.raise_for_status()
+    return counter.count, latency_ms
+
+
+async def _count_library(
+    counter: StatementCounter, *, size: int
+) -> dict[str, tuple[int, float]]:
+    """Returns the statements and latency of each handler for a new library of a size."""
+    user = await _create_user()
+    app = create_app()
+    app.dependency_overrides[get_current_user] = lambda: user
+    transport = httpx.ASGITransport(app=app)
+    try:
+        bookmark_ids = await _seed_bookmarks(user.id, size)
+        bookmark_id = bookmark_ids[size // 2]
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://benchmark", timeout=120.0
+        ) as client:
+
+            def get_tags() -> Awaitable[httpx.Response]:
+                # count the database read, not the cached tag counts
+                invalidate_tag_counts(user.id)
+                return client.get("/api/v1/tags")
+
+            requests: dict[str, Callable[[], Awaitable[httpx.Response]]] = {
+                "detail": lambda: client.get(f"{API_PREFIX}/{bookmark_id}"),
+                "list": lambda: client.get(f"{API_PREFIX}/", params={"limit": 20}),
+                "cursor": lambda: client.get(
+                    f"{API_PREFIX}/cursor", params={"limit": 20}
+                ),
+                "tags": get_tags,
+                "search": lambda: client.post(
+                    f"{API_PREFIX}/search",
+                    json={
+                        "search": SEARCH_TEXT,
+                        "limit": 20,
+                        "tags": POPULAR_TAGS[:1],
+                        "tag_mode": "any",
+                    },
+                ),
+                "related": lambda: client.get(
+                    f"{API_PREFIX}/{bookmark_id}/related", params={"tag_mode": "any"}
+                ),
+                "typeahead": lambda: client.get(
+                    f"{API_PREFIX}/typeahead", params={"q": "databse notes"}
+                ),
+                "update": lambda: client.patch(
+                    f"{API_PREFIX}/{bookmark_id}", json={"tags": POPULAR_TAGS[1:]}
+                ),
+            }
+            return {
+                name: await _count_statements(counter, request)
+                for name, request in requests.items()
+            }
+    finally:
+        await _delete_user(user.id)
+
+
+async def run(args: argparse.Namespace) -> int:
+    # answer every ai request locally and search every size in one round
+    settings.embedding_provider = "fake"
+    settings.description_provider = "fake"
+    settings.summary_provider = "fake"
+    settings.search_min_candidates = settings.search_max_candidates
+    # count the postgres vector searches without the in-process index or rerank passages
+    settings.vector_index_memory_mb = 0
+    settings.search_rerank_candidates = 0
+
+    # read whether the binary column exists before counting, like the api does at startup
+    async with engine.connect() as connection:
+        binary_prefilter = settings.vector_search_mode == "binary" and (
+            await has_binary_column(connection)
+        )
+
+    counter = StatementCounter()
+    event.listen(engine.sync_engine, "before_cursor_execute", counter)
+    try:
+        counts_by_size = {
+            size: await _count_library(counter, size=size) for size in args.sizes
+        }
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", counter)
+        await engine.dispose()
+
+    # compare every size against the budget and the smallest library
+    budgets = _statement_budgets(binary_prefilter=binary_prefilter)
+    smallest_size = min(args.sizes)
+    failures: list[str] = []
+    report_rows: list[list[object]] = []
+    for name, budget in budgets.items():
+        for size, counts in counts_by_size.items():
+            statements, latency_ms = counts[name]
+            baseline_statements = counts_by_size[smallest_size][name][0]
+            if statements > budget:
+                failures.append(
+                    f"{name} ran {statements} statements for {size} bookmarks, "
+                    f"over its budget of {budget}"
+                )
+            elif statements != baseline_statements:
+                failures.append(
+                    f"{name} ran {statements} statements for {size} bookmarks "
+                    f"and {baseline_statements} for {smallest_size}"
+                )
+            report_rows.append([name, size, statements, budget, latency_ms])
+
+    print_table(
+        "statements per handler",
+        ["handler", "bookmarks", "statements", "budget", "ms"],
+        report_rows,
+    )
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 500])
+    sys.exit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Measures the CPU time to build and serialize 100 item list and search pages, comparing
+responses built from nested models and validated per item from the row fields, which
+FastAPI validates against the response_model again and encodes with the stdlib json
+module, with pages validated in one TypeAdapter call or built with model_construct and
+encoded with orjson by ModelJSONResponse.
+Checks that every path returns the same JSON. Runs without a database.
+
+    python -m benchmarks.serialization --items 100 --repeat 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Any, Callable, Sequence, cast
+
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import Row
+
+from benchmarks.corpus import FILLER, TOPICS
+from benchmarks.stats import print_table
+from bookmemory.api.responses import ModelJSONResponse
+from bookmemory.db.models.bookmark import BookmarkStatus, BookmarkType, LoadMethod
+from bookmemory.schemas.bookmarks import (
+    BookmarkResponse,
+    BookmarkSearchResponse,
+    HighlightResponse,
+    TagResponse,
+)
+from bookmemory.services.bookmarks.read_model import (
+    bookmark_row_fields,
+    to_bookmark_row_responses,
+    to_search_responses,
+)
+
+
+def _rows(count: int, seed: int) -> list[Row[Any]]:
+    """Returns rows shaped like select_bookmark_responses rows."""
+    rng = random.Random(seed)
+    vocabulary = [word for words in TOPICS.values() for word in words] + FILLER
+    tags = [{"id": str(uuid.uuid4()), "name": topic} for topic in sorted(TOPICS)]
+    created_at = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    rows: list[Row[Any]] = []
+    for row_index in range(count):
+        row = SimpleNamespace(
+            id=uuid.uuid4(),
+            user_id=uuid.uuid4(),
+            title=" ".join(rng.sample(vocabulary, 6)),
+            description=" ".join(rng.choices(vocabulary, k=30)),
+            summary=" ".join(rng.choices(vocabulary, k=120)),
+            type=BookmarkType.link,
+            url=f"https://example.com/{row_index}",
+            status=BookmarkStatus.ready,
+            load_method=LoadMethod.http,
+            created_at=created_at + timedelta(minutes=row_index),
+            updated_at=created_at + timedelta(minutes=row_index, seconds=30),
+            tags=rng.sample(tags, 3),
+        )
+        rows.append(cast(Row[Any], row))
+    return rows
+
+
+def _nested_response(row: Row[Any]) -> BookmarkResponse:
+    """Returns a response built from nested models, the way responses were built before."""
+    return BookmarkResponse(
+        id=row.id,
+        user_id=row.user_id,
+        title=row.title,
+        description=row.description,
+        summary=row.summary,
+        type=row.type.value,
+        url=row.url,
+        status=row.status.value,
+        load_method=(row.load_method.value if row.load_method else None),
+        created_at=row.created_at,
+        updated_at=row.updated_at,
+        tags=[TagResponse(id=tag["id"], name=tag["name"]) for tag in row.tags],
+    )
+
+
+def _search_fields(row_index: int) -> dict[str, Any]:
+    return {
+        "snippet": "matching text " * 20,
+        "highlights": [{"start": 0, "end": 8}],
+        "score": 1.0 / (row_index + 1),
+        "chunk_id": uuid.UUID(int=row_index),
+    }
+
+
+def _constructed_fields(row: Row[Any]) -> dict[str, Any]:
+    """Returns the row fields converted to the declared types for model_construct."""
+    return {
+        **bookmark_row_fields(row),
+        "type": row.type.value,
+        "status": row.status.value,
+        "load_method": row.load_method.value if row.load_method else None,
+        "tags": [
+            TagResponse.model_construct(id=uuid.UUID(tag["id"]), name=tag["name"])
+            for tag in row.tags
+        ],
+    }
+
+
+def _build_pages(
+    rows: Sequence[Row[Any]],
+) -> dict[tuple[str, str], Callable[[], list[BaseModel]]]:
+    """Returns the page builders for each page and build path."""
+    return {
+        ("list", "nested"): lambda: [_nested_response(row) for row in rows],
+        ("list", "per item"): lambda: [
+            BookmarkResponse.model_validate(bookmark_row_fields(row)) for row in rows
+        ],
+        ("list", "construct"): lambda: [
+            BookmarkResponse.model_construct(**_constructed_fields(row)) for row in rows
+        ],
+        ("list", "page"): lambda: list(to_bookmark_row_responses(rows)),
+        # the search response used to validate the bookmark, dump it, and validate it again
+        ("search", "nested"): lambda: [
+            BookmarkSearchResponse(
+                **_nested_response(row).model_dump(),
+                search_mode="search",
+                **_search_fields(row_index),
+            )
+            for row_index, row in enumerate(rows)
+        ],
+        ("search", "per item"): lambda: [
+            BookmarkSearchResponse.model_validate(
+                {
+                    **bookmark_row_fields(row),
+                    "search_mode": "search",
+                    **_search_fields(row_index),
+                }
+            )
+            for row_index, row in enumerate(rows)
+        ],
+        ("search", "construct"): lambda: [
+            BookmarkSearchResponse.model_construct(
+                **_constructed_fields(row),
+                search_mode="search",
+                **{
+                    **_search_fields(row_index),
+                    "highlights": [HighlightResponse.model_construct(start=0, end=8)],
+                },
+            )
+            for row_index, row in enumerate(rows)
+        ],
+        ("search", "page"): lambda: list(
+            to_search_responses(
+                [
+                    {
+                        **bookmark_row_fields(row),
+                        "search_mode": "search",
+                        **_search_fields(row_index),
+                    }
+                    for row_index, row in enumerate(rows)
+                ]
+            )
+        ),
+    }
+
+
+def _time_microseconds(function: Callable[[], object], repeat: int) -> float:
+    """Returns the mean microseconds per call."""
+    function()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat * 1_000_000
+
+
+def run(args: argparse.Namespace) -> None:
+    rows = _rows(args.items, args.seed)
+    adapters: dict[str, TypeAdapter[Any]] = {
+        "list": TypeAdapter(list[BookmarkResponse]),
+        "search": TypeAdapter(list[BookmarkSearchResponse]),
+    }
+
+    report_rows: list[list[object]] = []
+    for (page, path), build in _build_pages(rows).items():
+        adapter = adapters[page]
+        items = build()
+
+        # fastapi validates a returned page against the response model, dumps it to
+        # json compatible values, and encodes them with the stdlib json module
+        def respond_validated() -> bytes:
+            return json.dumps(
+                adapter.dump_python(adapter.validate_python(items), mode="json"),
+                ensure_ascii=False,
+                separators=(",", ":"),
+            ).encode()
+
+        # a returned ModelJSONResponse skips the response model and encodes with orjson
+        def respond_constructed() -> bytes:
+            return bytes(ModelJSONResponse(items).body)
+
+        # the handlers return nested and per item pages for fastapi to validate
+        respond = (
+            respond_validated if path in {"nested", "per item"} else respond_constructed
+        )
+        if json.loads(respond()) != json.loads(respond_validated()):
+            raise SystemExit(f"{page} {path} serialized differently")
+
+        build_us = _time_microseconds(build, args.repeat)
+        respond_us = _time_microseconds(respond, args.repeat)
+        report_rows.append(
+            [page, path, build_us, respond_us, build_us + respond_us, len(respond())]
+        )
+
+    print_table(
+        f"response serialization ({args.items} items per page, {args.repeat} pages)",
+        ["page", "build", "build us", "respond us", "total us", "bytes"],
+        report_rows,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Sequence
+
+
+@dataclass(frozen=True)
+class LatencySummary:
+    count: int
+    total_seconds: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+
+    @property
+    def throughput(self) -> float:
+        """Returns the number of operations per second."""
+        if self.total_seconds <= 0.0:
+            return 0.0
+        return self.count / self.total_seconds
+
+
+def percentile(sorted_values: Sequence[float], percent: float) -> float:
+    """Returns the nearest-rank percentile of already sorted values."""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(percent / 100.0 * len(sorted_values))
+    return sorted_values[max(0, min(len(sorted_values) - 1, rank - 1))]
+
+
+def summarize_latencies(
+    latencies: Sequence[float], *, total_seconds: float | None = None
+) -> LatencySummary:
+    """Returns latency percentiles in milliseconds for latencies measured in seconds."""
+    sorted_latencies = sorted(latencies)
+    return LatencySummary(
+        count=len(sorted_latencies),
+        total_seconds=(
+            total_seconds if total_seconds is not None else sum(sorted_latencies)
+        ),
+        p50_ms=percentile(sorted_latencies, 50) * 1000.0,
+        p95_ms=percentile(sorted_latencies, 95) * 1000.0,
+        p99_ms=percentile(sorted_latencies, 99) * 1000.0,
+    )
+
+
+def print_table(
+    title: str, headers: Sequence[str], rows: Sequence[Sequence[object]]
+) -> None:
+    """Prints an aligned plain text table."""
+    cells = [[str(header) for header in headers]]
+    for row in rows:
+        cells.append(
+            [
+                f"{value:.2f}" if isinstance(value, float) else str(value)
+                for value in row
+            ]
+        )
+    widths = [max(len(row[column]) for row in cells) for column in range(len(headers))]
+
+    print(f"\n{title}")
+    for row_index, row in enumerate(cells):
+        print("  ".join(cell.rjust(width) for cell, width in zip(row, widths)))
+        if row_index == 0:
+            print("  ".join("-" * width for width in widths))
@@ -0,0 +1,144 @@
+"""
+Measures typeahead matching against the in-process library of a warm user: the
+latency of matching every keystroke of title words, with and without typos, for
+growing libraries of generated titles, urls, and tags. Checks the results against
+scoring every entry. Runs without a database.
+
+    python -m benchmarks.typeahead --bookmarks 1000 10000 --words 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+import uuid
+
+from benchmarks.corpus import TOPICS
+from benchmarks.stats import print_table, summarize_latencies
+from bookmemory.services.search.typeahead import (
+    SIMILARITY_THRESHOLD,
+    TypeaheadEntry,
+    TypeaheadIndex,
+    build_typeahead_index,
+    match_entries,
+    normalize_typeahead_query,
+    similarity,
+    to_typeahead_entry,
+    trigrams,
+)
+
+
+def _build_entries(rng: random.Random, *, bookmarks: int) -> list[TypeaheadEntry]:
+    """Returns typeahead entries with titles and tags drawn from the corpus topics."""
+    entries: list[TypeaheadEntry] = []
+    for bookmark_index in range(bookmarks):
+        topic = rng.choice(list(TOPICS))
+        words = rng.sample(TOPICS[topic], rng.randint(3, 7))
+        entries.append(
+            to_typeahead_entry(
+                bookmark_id=uuid.uuid4(),
+                title=" ".join(words).capitalize() + f" {bookmark_index}",
+                url=f"https://{topic}.example.com/{'-'.join(words)}",
+                type="link",
+                tag_names=[topic, rng.choice(TOPICS[topic])],
+            )
+        )
+    return entries
+
+
+def _misspell(rng: random.Random, word: str) -> str:
+    """Returns the word with two neighboring letters swapped."""
+    if len(word) < 4:
+        return word
+    position = rng.randint(1, len(word) - 2)
+    return word[:position] + word[position + 1] + word[position] + word[position + 2 :]
+
+
+def _ranked_ids(index: TypeaheadIndex, *, query: str, limit: int) -> list[uuid.UUID]:
+    """Returns the best matching bookmark ids by scoring every entry."""
+    query_trigrams = trigrams(query)
+    ranked_entries: list[tuple[bool, float, str, uuid.UUID]] = []
+    for entry in index.entries:
+        title_similarity = similarity(entry.title_trigrams, query_trigrams)
+        if query in entry.text or title_similarity >= SIMILARITY_THRESHOLD:
+            ranked_entries.append(
+                (
+                    not entry.title.startswith(query),
+                    -title_similarity,
+                    entry.title,
+                    entry.match.bookmark_id,
+                )
+            )
+    return [ranked_entry[3] for ranked_entry in sorted(ranked_entries)[:limit]]
+
+
+def run(args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    words = [word for topic_words in TOPICS.values() for word in topic_words]
+    report_rows: list[list[object]] = []
+    for bookmarks in args.bookmarks:
+        build_start = time.perf_counter()
+        index = build_typeahead_index(_build_entries(rng, bookmarks=bookmarks))
+        build_ms = (time.perf_counter() - build_start) * 1000
+
+        for query_kind in ("prefix", "typo"):
+            latencies: list[float] = []
+            match_counts: list[int] = []
+            same_results = 0
+            for _ in range(args.words):
+                word = rng.choice(words)
+                if query_kind == "typo":
+                    word = _misspell(rng, word)
+                # every keystroke sends the query typed so far
+                for length in range(1, len(word) + 1):
+                    query = normalize_typeahead_query(word[:length])
+                    query_start = time.perf_counter()
+                    matches = match_entries(index, query=query, limit=args.limit)
+                    latencies.append(time.perf_counter() - query_start)
+                    match_counts.append(len(matches))
+                    same_results += [
+                        match.bookmark_id for match in matches
+                    ] == _ranked_ids(index, query=query, limit=args.limit)
+
+            latency = summarize_latencies(latencies)
+            report_rows.append(
+                [
+                    bookmarks,
+                    query_kind,
+                    build_ms,
+                    len(latencies),
+                    latency.p50_ms,
+                    latency.p95_ms,
+                    sum(match_counts) / max(1, len(match_counts)),
+                    same_results / max(1, len(latencies)),
+                ]
+            )
+
+    print_table(
+        f"warm typeahead ({args.words} words per kind, limit {args.limit})",
+        [
+            "bookmarks",
+            "queries",
+            "build ms",
+            "keystrokes",
+            "p50 ms",
+            "p95 ms",
+            "matches",
+            "exact",
+        ],
+        report_rows,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--bookmarks", type=int, nargs="+", default=[1_000, 10_000])
+    parser.add_argument("--words", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=7)
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
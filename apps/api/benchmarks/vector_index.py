@@ -0,0 +1,140 @@
+"""
+Measures the in-process vector index: memory, and the latency of scoring every chunk
+and choosing the best chunk of the closest bookmarks, for growing libraries of
+clustered synthetic embeddings. Checks the results against a plain sort of every
+chunk score. Runs without a database.
+
+    python -m benchmarks.vector_index --chunks 1000 10000 50000 --queries 200 --k 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+import uuid
+
+import numpy as np
+
+from benchmarks.stats import print_table, summarize_latencies
+from bookmemory.db.models.bookmark_chunk import EMBEDDING_DIM
+from bookmemory.services.search.vector_index import (
+    UserVectorIndex,
+    nearest_bookmarks,
+)
+
+
+def _build_index(
+    rng: np.random.Generator,
+    *,
+    chunks: int,
+    dim: int,
+    chunks_per_bookmark: int,
+    clusters: int,
+    dtype: str,
+) -> UserVectorIndex:
+    """Returns an index of clustered unit embeddings, a few chunks per bookmark."""
+    # clustered vectors behave more like real embeddings than uniform noise
+    centers = rng.standard_normal((clusters, dim), dtype=np.float32)
+    embeddings = centers[rng.integers(0, clusters, chunks)] + 0.6 * (
+        rng.standard_normal((chunks, dim), dtype=np.float32)
+    )
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+    chunk_bookmarks = (np.arange(chunks) // chunks_per_bookmark).astype(np.int32)
+    bookmark_count = int(chunk_bookmarks[-1]) + 1
+    bookmark_ids = [uuid.uuid4() for _ in range(bookmark_count)]
+    return UserVectorIndex(
+        generation=0,
+        embeddings=np.ascontiguousarray(embeddings, dtype=dtype),
+        chunk_ids=[uuid.uuid4() for _ in range(chunks)],
+        chunk_bookmarks=chunk_bookmarks,
+        bookmark_starts=np.arange(0, chunks, chunks_per_bookmark, dtype=np.intp),
+        bookmark_ids=bookmark_ids,
+        bookmark_positions={
+            bookmark_id: position for position, bookmark_id in enumerate(bookmark_ids)
+        },
+    )
+
+
+def _sorted_bookmarks(
+    index: UserVectorIndex, query: np.ndarray, k: int
+) -> list[uuid.UUID]:
+    """Returns the k closest bookmarks by sorting every chunk score."""
+    scores = index.embeddings.astype(np.float32) @ (query / np.linalg.norm(query))
+    bookmark_ids: list[uuid.UUID] = []
+    for position in np.argsort(-scores, kind="stable").tolist():
+        bookmark_id = index.bookmark_ids[index.chunk_bookmarks[position]]
+        if bookmark_id not in bookmark_ids:
+            bookmark_ids.append(bookmark_id)
+            if len(bookmark_ids) == k:
+                break
+    return bookmark_ids
+
+
+def run(args: argparse.Namespace) -> None:
+    rng = np.random.default_rng(args.seed)
+    report_rows: list[list[object]] = []
+    for dtype in args.dtypes:
+        for chunks in args.chunks:
+            index = _build_index(
+                rng,
+                chunks=chunks,
+                dim=args.dim,
+                chunks_per_bookmark=args.chunks_per_bookmark,
+                clusters=args.clusters,
+                dtype=dtype,
+            )
+
+            # queries near stored chunks, like searches for text in the library
+            queries = index.embeddings[rng.integers(0, chunks, args.queries)].astype(
+                np.float32
+            ) + 0.1 * rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+
+            latencies: list[float] = []
+            recalls: list[float] = []
+            for query in queries:
+                query_start = time.perf_counter()
+                matches = nearest_bookmarks(index, search=query, limit=args.k)
+                latencies.append(time.perf_counter() - query_start)
+                expected = set(_sorted_bookmarks(index, query, args.k))
+                found = {match.bookmark_id for match in matches}
+                recalls.append(len(found & expected) / max(1, len(expected)))
+
+            latency = summarize_latencies(latencies)
+            report_rows.append(
+                [
+                    dtype,
+                    chunks,
+                    index.nbytes / (1024 * 1024),
+                    latency.p50_ms,
+                    latency.p95_ms,
+                    sum(recalls) / max(1, len(recalls)),
+                ]
+            )
+
+    print_table(
+        f"in-process vector index ({args.dim} dimensions, {args.queries} queries)",
+        ["dtype", "chunks", "MB", "p50 ms", "p95 ms", f"recall@{args.k}"],
+        report_rows,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--chunks", type=int, nargs="+", default=[1_000, 10_000, 50_000]
+    )
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--dim", type=int, default=EMBEDDING_DIM)
+    parser.add_argument("--chunks-per-bookmark", type=int, default=8)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument(
+        "--dtypes", nargs="+", choices=["float32", "float16"], default=["float32"]
+    )
+    parser.add_argument("--seed", type=int, default=7)
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
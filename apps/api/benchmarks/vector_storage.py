@@ -0,0 +1,285 @@
+"""
+Compares recall@k, index size, and query latency for full precision (vector),
+half precision (halfvec), and binary quantized (bit + exact rerank) embeddings.
+
+Runs against the database in DATABASE_URL inside a throwaway "benchmark" schema:
+
+    python -m benchmarks.vector_storage --rows 20000 --queries 100 --k 10
+    python -m benchmarks.vector_storage --source chunks  # use stored bookmark embeddings
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from dataclasses import dataclass
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+
+from benchmarks.stats import print_table, summarize_latencies
+from bookmemory.core.settings import settings
+from bookmemory.db.models.bookmark_chunk import EMBEDDING_DIM
+
+TABLE = "benchmark.vector_storage"
+
+
+@dataclass(frozen=True)
+class StorageMode:
+    name: str
+    index_sql: str
+    query_sql: str
+    bytes_sql: str
+
+
+def _storage_modes(dim: int, candidates: int) -> list[StorageMode]:
+    query_vector = f"CAST(:query AS vector({dim}))"
+    return [
+        StorageMode(
+            name="vector",
+            index_sql="USING hnsw (embedding vector_cosine_ops)",
+            query_sql=f"""
+                SELECT id FROM {TABLE}
+                ORDER BY embedding <=> {query_vector}
+                LIMIT :k
+            """,
+            bytes_sql="pg_column_size(embedding)",
+        ),
+        StorageMode(
+            name="halfvec",
+            index_sql=f"USING hnsw ((embedding::halfvec({dim})) halfvec_cosine_ops)",
+            query_sql=f"""
+                SELECT id FROM {TABLE}
+                ORDER BY embedding::halfvec({dim}) <=> CAST(:query AS halfvec({dim}))
+                LIMIT :k
+            """,
+            bytes_sql=f"pg_column_size(embedding::halfvec({dim}))",
+        ),
+        StorageMode(
+            name="binary+rerank",
+            index_sql=(
+                f"USING hnsw ((binary_quantize(embedding)::bit({dim})) bit_hamming_ops)"
+            ),
+            query_sql=f"""
+                SELECT id FROM (
+                    SELECT id, embedding FROM {TABLE}
+                    ORDER BY binary_quantize(embedding)::bit({dim})
+                        <~> binary_quantize({query_vector})
+                    LIMIT {candidates}
+                ) AS candidates
+                ORDER BY embedding <=> {query_vector}
+                LIMIT :k
+            """,
+            bytes_sql=f"pg_column_size(binary_quantize(embedding)::bit({dim}))",
+        ),
+    ]
+
+
+async def _load_vectors(
+    connection: AsyncConnection,
+    *,
+    source: str,
+    dim: int,
+    rows: int,
+    clusters: int,
+) -> None:
+    """Fills the benchmark table with stored bookmark embeddings or clustered synthetic vectors."""
+    await connection.execute(text("CREATE SCHEMA IF NOT EXISTS benchmark"))
+    await connection.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+    await connection.execute(
+        text(
+            f"CREATE TABLE {TABLE} (id bigserial PRIMARY KEY, embedding vector({dim}))"
+        )
+    )
+
+    if source == "chunks":
+        await connection.execute(
+            text(f"""
+                INSERT INTO {TABLE} (embedding)
+                SELECT embedding::vector({dim}) FROM bookmark_chunks
+                WHERE embedding IS NOT NULL
+                LIMIT :rows
+            """),
+            {"rows": rows},
+        )
+        return
+
+    # clustered vectors behave more like real embeddings than uniform noise
+    # the correlated where clauses force postgres to generate a new vector for every row
+    await connection.execute(
+        text(f"""
+            WITH centers AS (
+                SELECT c, (
+                    SELECT array_agg(random() - 0.5)::vector({dim})
+                    FROM generate_series(1, {dim}) AS g
+                    WHERE c >= 0
+                ) AS center
+                FROM generate_series(0, :clusters - 1) AS c
+            )
+            INSERT INTO {TABLE} (embedding)
+            SELECT l2_normalize(center + (
+                SELECT array_agg((random() - 0.5) * 0.6)::vector({dim})
+                FROM generate_series(1, {dim}) AS g
+                WHERE r > 0
+            ))
+            FROM generate_series(1, :rows) AS r
+            JOIN centers ON centers.c = r % :clusters
+        """),
+        {"rows": rows, "clusters": clusters},
+    )
+
+
+async def _sample_queries(
+    connection: AsyncConnection, *, dim: int, queries: int
+) -> list[str]:
+    """Returns query vectors near random stored vectors as pgvector text literals."""
+    query_rows = await connection.execute(
+        text(f"""
+            SELECT l2_normalize(embedding + (
+                SELECT array_agg((random() - 0.5) * 0.1)::vector({dim})
+                FROM generate_series(1, {dim}) AS g
+                WHERE id > 0
+            ))::text AS query
+            FROM {TABLE}
+            ORDER BY random()
+            LIMIT :queries
+        """),
+        {"queries": queries},
+    )
+    return [str(row.query) for row in query_rows]
+
+
+async def _exact_neighbors(
+    connection: AsyncConnection, *, dim: int, query: str, k: int
+) -> set[int]:
+    """Returns the true nearest neighbors. Runs before any index exists so it is a sequential scan."""
+    neighbor_rows = await connection.execute(
+        text(f"""
+            SELECT id FROM {TABLE}
+            ORDER BY embedding <=> CAST(:query AS vector({dim}))
+            LIMIT :k
+        """),
+        {"query": query, "k": k},
+    )
+    return {int(row.id) for row in neighbor_rows}
+
+
+async def run(args: argparse.Namespace) -> None:
+    engine = create_async_engine(settings.database_url)
+    try:
+        async with engine.connect() as connection:
+            connection = await connection.execution_options(
+                isolation_level="AUTOCOMMIT"
+            )
+            print(f"loading {args.rows} {args.source} vectors ({args.dim} dimensions)")
+            await _load_vectors(
+                connection,
+                source=args.source,
+                dim=args.dim,
+                rows=args.rows,
+                clusters=args.clusters,
+            )
+            await connection.execute(text(f"ANALYZE {TABLE}"))
+
+            queries = await _sample_queries(
+                connection, dim=args.dim, queries=args.queries
+            )
+            exact_neighbors = [
+                await _exact_neighbors(connection, dim=args.dim, query=query, k=args.k)
+                for query in queries
+            ]
+
+            report_rows: list[list[object]] = []
+            candidates = args.k * args.rerank
+            for mode in _storage_modes(args.dim, candidates):
+                # build the index for this mode only so the planner can't pick another one
+                index_name = f"benchmark_{mode.name.replace('+', '_')}_idx"
+                build_start = time.perf_counter()
+                await connection.execute(
+                    text(f"CREATE INDEX {index_name} ON {TABLE} {mode.index_sql}")
+                )
+                build_seconds = time.perf_counter() - build_start
+
+                index_bytes = (
+                    await connection.execute(
+                        text(f"SELECT pg_relation_size('benchmark.{index_name}')")
+                    )
+                ).scalar_one()
+                vector_bytes = (
+                    await connection.execute(
+                        text(f"SELECT avg({mode.bytes_sql}) FROM {TABLE}")
+                    )
+                ).scalar_one()
+
+                # hnsw returns at most ef_search rows, so widen it for the rerank candidates
+                await connection.execute(
+                    text(f"SET hnsw.ef_search = {max(40, min(1000, candidates))}")
+                )
+
+                latencies: list[float] = []
+                recalls: list[float] = []
+                for query, neighbors in zip(queries, exact_neighbors):
+                    query_start = time.perf_counter()
+                    result_rows = await connection.execute(
+                        text(mode.query_sql), {"query": query, "k": args.k}
+                    )
+                    found = {int(row.id) for row in result_rows}
+                    latencies.append(time.perf_counter() - query_start)
+                    recalls.append(len(found & neighbors) / max(1, len(neighbors)))
+
+                await connection.execute(text(f"DROP INDEX benchmark.{index_name}"))
+                await connection.execute(text("RESET hnsw.ef_search"))
+
+                latency = summarize_latencies(latencies)
+                report_rows.append(
+                    [
+                        mode.name,
+                        index_bytes / (1024 * 1024),
+                        build_seconds,
+                        float(vector_bytes or 0.0),
+                        latency.p50_ms,
+                        latency.p95_ms,
+                        sum(recalls) / max(1, len(recalls)),
+                    ]
+                )
+
+            print_table(
+                f"vector storage ({args.rows} rows, {args.queries} queries)",
+                [
+                    "mode",
+                    "index MB",
+                    "build s",
+                    "bytes/vector",
+                    "p50 ms",
+                    "p95 ms",
+                    f"recall@{args.k}",
+                ],
+                report_rows,
+            )
+
+            if not args.keep:
+                await connection.execute(text("DROP SCHEMA benchmark CASCADE"))
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--source", choices=["synthetic", "chunks"], default="synthetic"
+    )
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--dim", type=int, default=EMBEDDING_DIM)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument(
+        "--rerank", type=int, default=40, help="binary candidates to rerank per result"
+    )
+    parser.add_argument("--keep", action="store_true", help="keep the benchmark schema")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""configurable embedding dimension
+
+The embedding dimension comes from the environment, so this revision doesn't change the
+schema. make reindex-embeddings resizes the embedding column and rebuilds its indexes
+after the dimension changes.
+
+Revision ID: 308abeca8597
+Revises: bc253eaeabdb
+Create Date: 2026-10-19 11:40:08.219374
+
+"""
+
+from typing import Sequence, Union
+
+
+# revision identifiers, used by Alembic.
+revision: str = "308abeca8597"
+down_revision: Union[str, None] = "bc253eaeabdb"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # the resize runs in make reindex-embeddings
+    pass
+
+
+def downgrade() -> None:
+    # make reindex-embeddings with the previous dimension restores the column
+    pass
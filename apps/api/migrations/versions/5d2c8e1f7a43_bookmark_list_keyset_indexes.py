@@ -0,0 +1,35 @@
+"""bookmark list keyset indexes
+
+Revision ID: 5d2c8e1f7a43
+Revises: f82a5ce04cd9
+Create Date: 2026-10-19 16:12:37.418265
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5d2c8e1f7a43"
+down_revision: Union[str, None] = "f82a5ce04cd9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # match the recent and alphabetical list orders so pages are read straight from the index
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_bookmarks_user_id_updated_at_id
+        ON bookmarks (user_id, updated_at DESC, id DESC)
+    """)
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_bookmarks_user_id_lower_title_created_at_id
+        ON bookmarks (user_id, lower(title), created_at DESC, id DESC)
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_bookmarks_user_id_lower_title_created_at_id")
+    op.execute("DROP INDEX IF EXISTS ix_bookmarks_user_id_updated_at_id")
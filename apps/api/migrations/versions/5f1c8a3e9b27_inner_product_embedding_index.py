@@ -0,0 +1,66 @@
+"""inner product embedding index
+
+The distance setting comes from the environment, so upgrading keeps the cosine index.
+make reindex-embeddings normalizes the embeddings and builds the index for
+VECTOR_DISTANCE.
+
+Revision ID: 5f1c8a3e9b27
+Revises: 7b3e9f2c4d15
+Create Date: 2026-10-19 19:26:44.107352
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5f1c8a3e9b27"
+down_revision: Union[str, None] = "7b3e9f2c4d15"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COSINE_INDEX = "ix_bookmark_chunks_embedding_hnsw_cosine"
+INNER_PRODUCT_INDEX = "ix_bookmark_chunks_embedding_hnsw_ip"
+
+
+def _vector_type() -> str:
+    # read the current embedding column type name, e.g. vector or halfvec
+    return str(
+        op.get_bind()
+        .execute(
+            sa.text("""
+                SELECT typname
+                FROM pg_attribute
+                JOIN pg_type ON pg_type.oid = pg_attribute.atttypid
+                WHERE attrelid = 'bookmark_chunks'::regclass
+                  AND attname = 'embedding'
+            """)
+        )
+        .scalar_one()
+    )
+
+
+def _create_index(name: str, operator_class: str) -> None:
+    # build without blocking writes. a failed concurrent build leaves an invalid index to drop first
+    op.execute(f"""
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS {name}
+            ON bookmark_chunks
+            USING hnsw (embedding {operator_class})
+            WHERE embedding IS NOT NULL
+    """)
+
+
+def upgrade() -> None:
+    # the inner product index is built by make reindex-embeddings
+    pass
+
+
+def downgrade() -> None:
+    # the embeddings stay normalized, which doesn't change cosine distances
+    vector_type = _vector_type()
+    with op.get_context().autocommit_block():
+        _create_index(COSINE_INDEX, f"{vector_type}_cosine_ops")
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {INNER_PRODUCT_INDEX}")
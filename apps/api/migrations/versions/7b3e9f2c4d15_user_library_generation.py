@@ -0,0 +1,28 @@
+"""user library generation
+
+Revision ID: 7b3e9f2c4d15
+Revises: e2b7d4a91c60
+Create Date: 2026-10-19 18:42:37.518204
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7b3e9f2c4d15"
+down_revision: Union[str, None] = "e2b7d4a91c60"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS library_generation bigint NOT NULL DEFAULT 0"
+    )
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE users DROP COLUMN IF EXISTS library_generation")
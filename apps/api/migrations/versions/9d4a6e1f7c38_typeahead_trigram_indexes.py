@@ -0,0 +1,46 @@
+"""typeahead trigram indexes
+
+Revision ID: 9d4a6e1f7c38
+Revises: 5f1c8a3e9b27
+Create Date: 2026-10-19 20:03:18.640271
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9d4a6e1f7c38"
+down_revision: Union[str, None] = "5f1c8a3e9b27"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# index name, table, and indexed text expression
+TRIGRAM_INDEXES = [
+    ("ix_bookmarks_user_id_lower_title_trgm", "bookmarks", "lower(title)"),
+    ("ix_bookmarks_user_id_lower_url_trgm", "bookmarks", "lower(url)"),
+    ("ix_tags_user_id_lower_name_trgm", "tags", "lower(name)"),
+]
+
+
+def upgrade() -> None:
+    # pg_trgm indexes the text. btree_gin adds the user id to the same GIN index
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gin")
+
+    # build without blocking writes. a failed concurrent build leaves an invalid index to drop first
+    with op.get_context().autocommit_block():
+        for index_name, table_name, expression in TRIGRAM_INDEXES:
+            op.execute(f"""
+                CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name}
+                ON {table_name} USING gin (user_id, {expression} gin_trgm_ops)
+            """)
+
+
+def downgrade() -> None:
+    # keep the extensions in case anything else uses them
+    with op.get_context().autocommit_block():
+        for index_name, _, _ in reversed(TRIGRAM_INDEXES):
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}")
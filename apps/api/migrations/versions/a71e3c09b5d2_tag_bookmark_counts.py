@@ -0,0 +1,45 @@
+"""tag bookmark counts
+
+Revision ID: a71e3c09b5d2
+Revises: 5d2c8e1f7a43
+Create Date: 2026-10-19 16:48:02.735914
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a71e3c09b5d2"
+down_revision: Union[str, None] = "5d2c8e1f7a43"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "ALTER TABLE tags ADD COLUMN IF NOT EXISTS bookmark_count integer NOT NULL DEFAULT 0"
+    )
+
+    # count the bookmarks already tagged
+    op.execute("""
+        UPDATE tags
+        SET bookmark_count = tag_counts.bookmark_count
+        FROM (
+            SELECT tag_id, count(*) AS bookmark_count
+            FROM bookmark_tags
+            GROUP BY tag_id
+        ) AS tag_counts
+        WHERE tags.id = tag_counts.tag_id
+    """)
+
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_tags_user_id_lower_name ON tags (user_id, lower(name))"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_tags_user_id_lower_name")
+    op.execute("ALTER TABLE tags DROP COLUMN IF EXISTS bookmark_count")
@@ -0,0 +1,73 @@
+"""compact embedding storage
+
+halfvec storage and the binary quantized prefilter column are opt-in. make
+reindex-embeddings converts the embedding column for EMBEDDING_STORAGE and adds the
+embedding_binary column for VECTOR_SEARCH_MODE=binary, so upgrading doesn't depend on
+the environment.
+
+Revision ID: bc253eaeabdb
+Revises: 3e40e46fda5e
+Create Date: 2026-10-19 09:12:31.482019
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "bc253eaeabdb"
+down_revision: Union[str, None] = "3e40e46fda5e"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _embedding_column_type() -> str:
+    # read the current embedding column type, e.g. vector(1536) or halfvec(1536)
+    return str(
+        op.get_bind()
+        .execute(
+            sa.text("""
+                SELECT format_type(atttypid, atttypmod)
+                FROM pg_attribute
+                WHERE attrelid = 'bookmark_chunks'::regclass
+                  AND attname = 'embedding'
+            """)
+        )
+        .scalar_one()
+    )
+
+
+def _convert_embedding_column(column_type: str, operator_class: str) -> None:
+    # the hnsw index operator class must match the column type
+    op.execute("DROP INDEX IF EXISTS ix_bookmark_chunks_embedding_hnsw_cosine")
+    op.execute(f"""
+        ALTER TABLE bookmark_chunks
+        ALTER COLUMN embedding TYPE {column_type}
+        USING embedding::{column_type}
+    """)
+    op.execute(f"""
+        CREATE INDEX IF NOT EXISTS ix_bookmark_chunks_embedding_hnsw_cosine
+            ON bookmark_chunks
+            USING hnsw (embedding {operator_class})
+            WHERE embedding IS NOT NULL
+    """)
+
+
+def upgrade() -> None:
+    # the schema stays vector(1536) with the cosine index until make reindex-embeddings
+    pass
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_bookmark_chunks_embedding_binary_hnsw_hamming")
+    op.execute("ALTER TABLE bookmark_chunks DROP COLUMN IF EXISTS embedding_binary")
+
+    # restore full precision embeddings of the same dimension
+    column_type = _embedding_column_type()
+    if column_type.startswith("halfvec"):
+        _convert_embedding_column(
+            column_type.replace("halfvec", "vector", 1), "vector_cosine_ops"
+        )
@@ -0,0 +1,52 @@
+"""bookmark tag ids
+
+Revision ID: c4f90b6e2d18
+Revises: a71e3c09b5d2
+Create Date: 2026-10-19 17:21:44.062157
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c4f90b6e2d18"
+down_revision: Union[str, None] = "a71e3c09b5d2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_bookmark_tags_tag_id_bookmark_id
+        ON bookmark_tags (tag_id, bookmark_id)
+    """)
+
+    op.execute(
+        "ALTER TABLE bookmarks ADD COLUMN IF NOT EXISTS tag_ids uuid[] NOT NULL DEFAULT '{}'"
+    )
+
+    # copy the existing bookmark tags
+    op.execute("""
+        UPDATE bookmarks
+        SET tag_ids = bookmark_tag_ids.tag_ids
+        FROM (
+            SELECT bookmark_id, array_agg(tag_id ORDER BY tag_id) AS tag_ids
+            FROM bookmark_tags
+            GROUP BY bookmark_id
+        ) AS bookmark_tag_ids
+        WHERE bookmarks.id = bookmark_tag_ids.bookmark_id
+    """)
+
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_bookmarks_tag_ids_gin
+        ON bookmarks USING gin (tag_ids)
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_bookmarks_tag_ids_gin")
+    op.execute("ALTER TABLE bookmarks DROP COLUMN IF EXISTS tag_ids")
+    op.execute("DROP INDEX IF EXISTS ix_bookmark_tags_tag_id_bookmark_id")
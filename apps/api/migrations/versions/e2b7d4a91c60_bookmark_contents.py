@@ -0,0 +1,128 @@
+"""bookmark contents
+
+Revision ID: e2b7d4a91c60
+Revises: c4f90b6e2d18
+Create Date: 2026-10-19 18:05:12.390417
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e2b7d4a91c60"
+down_revision: Union[str, None] = "c4f90b6e2d18"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# bookmarks copied per transaction so the copy never holds locks for long
+BATCH_SIZE = 500
+
+# also catch up bookmarks from write transactions that started a little before the copy
+CATCH_UP_MARGIN = "15 minutes"
+
+
+def _has_content_column() -> bool:
+    # a re-run after the column was dropped has nothing left to copy
+    return bool(
+        op.get_bind()
+        .execute(
+            sa.text("""
+                SELECT EXISTS (
+                    SELECT 1
+                    FROM information_schema.columns
+                    WHERE table_schema = current_schema()
+                      AND table_name = 'bookmarks'
+                      AND column_name = 'content'
+                )
+            """)
+        )
+        .scalar_one()
+    )
+
+
+def _copy_content_batches() -> None:
+    # copy in id order, one short transaction per batch, while the api keeps running
+    connection = op.get_bind()
+    last_bookmark_id = "00000000-0000-0000-0000-000000000000"
+    while True:
+        bookmark_ids = list(
+            connection.execute(
+                sa.text("""
+                    SELECT id
+                    FROM bookmarks
+                    WHERE content IS NOT NULL AND id > CAST(:last_bookmark_id AS uuid)
+                    ORDER BY id
+                    LIMIT :batch_size
+                """),
+                {"last_bookmark_id": last_bookmark_id, "batch_size": BATCH_SIZE},
+            ).scalars()
+        )
+        if not bookmark_ids:
+            return
+
+        connection.execute(
+            sa.text("""
+                INSERT INTO bookmark_contents (bookmark_id, content, updated_at)
+                SELECT id, content, updated_at
+                FROM bookmarks
+                WHERE id = ANY(:bookmark_ids) AND content IS NOT NULL
+                ON CONFLICT (bookmark_id) DO NOTHING
+            """),
+            {"bookmark_ids": bookmark_ids},
+        )
+        last_bookmark_id = str(bookmark_ids[-1])
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS bookmark_contents (
+            bookmark_id uuid PRIMARY KEY REFERENCES bookmarks (id) ON DELETE CASCADE,
+            content text NOT NULL,
+            updated_at timestamptz NOT NULL DEFAULT now()
+        )
+    """)
+
+    # lz4 decompresses several times faster than the default pglz (postgres 14+)
+    op.execute("ALTER TABLE bookmark_contents ALTER COLUMN content SET COMPRESSION lz4")
+    if not _has_content_column():
+        return
+
+    # remember when the copy started so bookmarks loaded during the copy can be caught up
+    copy_started_at = (
+        op.get_bind().execute(sa.text("SELECT clock_timestamp()")).scalar_one()
+    )
+    with op.get_context().autocommit_block():
+        _copy_content_batches()
+
+    # block bookmark writes only for the catch up and the column drop
+    op.execute("LOCK TABLE bookmarks IN SHARE ROW EXCLUSIVE MODE")
+    op.get_bind().execute(
+        sa.text("""
+            INSERT INTO bookmark_contents (bookmark_id, content, updated_at)
+            SELECT id, content, updated_at
+            FROM bookmarks
+            WHERE content IS NOT NULL
+              AND updated_at >= :copy_started_at - CAST(:catch_up_margin AS interval)
+            ON CONFLICT (bookmark_id) DO UPDATE
+            SET content = EXCLUDED.content, updated_at = EXCLUDED.updated_at
+        """),
+        {"copy_started_at": copy_started_at, "catch_up_margin": CATCH_UP_MARGIN},
+    )
+
+    # dropping the column only updates the catalog. rows shrink as they're rewritten
+    op.execute("ALTER TABLE bookmarks DROP COLUMN IF EXISTS content")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE bookmarks ADD COLUMN IF NOT EXISTS content text")
+    op.execute("""
+        UPDATE bookmarks
+        SET content = bookmark_contents.content
+        FROM bookmark_contents
+        WHERE bookmarks.id = bookmark_contents.bookmark_id
+    """)
+    op.execute("DROP TABLE IF EXISTS bookmark_contents")
@@ -0,0 +1,35 @@
+"""bookmark chunk text hash
+
+Revision ID: f82a5ce04cd9
+Revises: 308abeca8597
+Create Date: 2026-10-19 14:05:51.603118
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f82a5ce04cd9"
+down_revision: Union[str, None] = "308abeca8597"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "ALTER TABLE bookmark_chunks ADD COLUMN IF NOT EXISTS text_hash varchar(64)"
+    )
+
+    # hash existing chunks so their embeddings are kept on the next reload
+    op.execute("""
+        UPDATE bookmark_chunks
+        SET text_hash = encode(sha256(convert_to(text, 'UTF8')), 'hex')
+        WHERE text_hash IS NULL
+    """)
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE bookmark_chunks DROP COLUMN IF EXISTS text_hash")
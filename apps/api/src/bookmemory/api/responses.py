@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+def _model_fields(value: Any) -> Any:
+    """Returns the field values of a response model for orjson to serialize."""
+    if isinstance(value, BaseModel):
+        return value.__dict__
+    raise TypeError(f"can't serialize {type(value).__name__}")
+
+
+class ModelJSONResponse(JSONResponse):
+    """
+    Implements a JSON response that serializes already validated response models with
+    orjson. Returning it skips FastAPI's second validation against the response_model
+    and the stdlib json encoder.
+    """
+
+    def render(self, content: Any) -> bytes:
+        # pydantic writes utc datetimes with a Z suffix, so match it
+        return orjson.dumps(content, default=_model_fields, option=orjson.OPT_UTC_Z)
@@ -8,6 +8,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from bookmemory.services.auth.users import get_current_user
 from bookmemory.services.bookmarks.get_bookmark import get_user_bookmark
+from bookmemory.services.bookmarks.library_generation import (
+    bump_library_generation,
+)
 from bookmemory.db.models.bookmark import (
     Bookmark,
     BookmarkStatus,
@@ -20,7 +23,12 @@ from bookmemory.schemas.bookmarks import (
     to_bookmark_response,
 )
 from bookmemory.schemas.users import CurrentUser
+from bookmemory.services.files.storage import is_supported_file_url
 from bookmemory.services.tags.get_tags import get_or_create_tags
+from bookmemory.services.tags.tag_counts import (
+    invalidate_tag_counts,
+    update_tag_counts,
+)
 
 router = APIRouter()
 
@@ -51,6 +59,7 @@ async def create_bookmark(
 
     # require the url for a link bookmark
     bookmark_type = BookmarkType(payload.type)
+    url: str | None
     if bookmark_type == BookmarkType.link:
         url = (payload.url or "").strip()
         if url == "":
@@ -58,6 +67,14 @@ async def create_bookmark(
                 status_code=422,
                 detail="url is required for link bookmarks",
             )
+    # keep an optional storage url for a file bookmark. files can also be uploaded after creation
+    elif bookmark_type == BookmarkType.file:
+        url = (payload.url or "").strip() or None
+        if url is not None and not is_supported_file_url(url):
+            raise HTTPException(
+                status_code=422,
+                detail="file url must be a local://, s3://, http://, or https:// url",
+            )
     else:
         url = None
 
@@ -70,10 +87,13 @@ async def create_bookmark(
         url=url,
         status=BookmarkStatus.created,
         tags=tags,
+        tag_ids=[tag.id for tag in tags],
     )
     session.add(bookmark)
+    await update_tag_counts(session=session, added_tag_ids=[tag.id for tag in tags])
 
     try:
+        await bump_library_generation(session=session, user_id=user_id)
         await session.commit()
     except IntegrityError as error:
         await session.rollback()
@@ -85,6 +105,7 @@ async def create_bookmark(
                 status_code=status.HTTP_409_CONFLICT, detail="URL already exists"
             )
         raise
+    invalidate_tag_counts(user_id)
 
     # return the new bookmark from the database
     new_bookmark = await get_user_bookmark(
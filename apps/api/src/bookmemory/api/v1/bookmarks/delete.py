@@ -5,9 +5,16 @@ from uuid import UUID
 
 from bookmemory.services.auth.users import get_current_user
 from bookmemory.services.bookmarks.get_bookmark import get_user_bookmark
+from bookmemory.services.bookmarks.library_generation import (
+    bump_library_generation,
+)
 from bookmemory.db.session import get_db
 from bookmemory.schemas.bookmarks import BookmarkResponse
 from bookmemory.schemas.users import CurrentUser
+from bookmemory.services.tags.tag_counts import (
+    invalidate_tag_counts,
+    update_tag_counts,
+)
 
 router = APIRouter()
 
@@ -29,6 +36,12 @@ async def delete_bookmark(
     except NoResultFound:
         raise HTTPException(status_code=404, detail="bookmark not found")
 
+    # remove the bookmark from its tag counts
+    await update_tag_counts(
+        session=session, removed_tag_ids=[tag.id for tag in bookmark.tags]
+    )
     await session.delete(bookmark)
+    await bump_library_generation(session=session, user_id=user_id)
     await session.commit()
+    invalidate_tag_counts(user_id)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
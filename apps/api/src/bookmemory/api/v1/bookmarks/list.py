@@ -1,21 +1,34 @@
 from __future__ import annotations
 
-from typing import cast, Literal
+from typing import cast
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import Response
 from fastapi_pagination import LimitOffsetPage
 from fastapi_pagination.ext.sqlalchemy import apaginate
 from fastapi_pagination.limit_offset import LimitOffsetParams
-from sqlalchemy import and_, func, select
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
+from bookmemory.api.responses import ModelJSONResponse
 from bookmemory.services.auth.users import get_current_user
-from bookmemory.services.tags.normalize_tags import normalize_tags
+from bookmemory.services.bookmarks.list_bookmarks import (
+    bookmark_cursor_condition,
+    encode_bookmark_cursor,
+    filter_bookmarks_by_tags,
+    order_bookmarks,
+)
+from bookmemory.services.bookmarks.read_model import (
+    select_bookmark_responses,
+    to_bookmark_row_responses,
+)
 from bookmemory.db.models.bookmark import Bookmark
-from bookmemory.schemas.bookmarks import to_bookmark_response, TagMode
-from bookmemory.db.models.tag import Tag
+from bookmemory.schemas.bookmarks import (
+    BookmarkCursorPage,
+    BookmarkSort,
+    TagMode,
+)
 from bookmemory.db.session import get_db
 from bookmemory.schemas.bookmarks import BookmarkResponse
 from bookmemory.schemas.users import CurrentUser
@@ -23,83 +36,100 @@ from bookmemory.schemas.users import CurrentUser
 router = APIRouter()
 
 
-@router.get("/", response_model=LimitOffsetPage[BookmarkResponse])
+# pages are validated once when they're built, so they're serialized without validating them again
+@router.get(
+    "/",
+    response_model=LimitOffsetPage[BookmarkResponse],
+    response_class=ModelJSONResponse,
+)
 async def get_bookmarks(
     session: AsyncSession = Depends(get_db),
     current_user: CurrentUser = Depends(get_current_user),
     tags: list[str] = Query(default_factory=list, alias="tag"),
     tag_mode: TagMode = Query(default="ignore"),
-    sort: Literal["alphabetical", "recent"] = Query(default="recent"),
+    sort: BookmarkSort = Query(default="recent"),
     limit: int = Query(default=20, ge=1, le=100),
     offset: int = Query(default=0, ge=0),
-) -> LimitOffsetPage[BookmarkResponse]:
-    # filter bookmarks by user
+) -> Response:
+    # filter bookmarks by user and tags. select only the response columns and tags
     user_id: UUID = current_user.id
-    select_bookmarks_statement = (
-        select(Bookmark)
-        .where(Bookmark.user_id == user_id)
-        .options(selectinload(Bookmark.tags))
+    select_bookmarks_statement = select_bookmark_responses().where(
+        Bookmark.user_id == user_id
     )
-
-    # filter by tags
-    normalized_tags = normalize_tags(tags)
-    if normalized_tags and tag_mode != "ignore":
-        if tag_mode == "all":
-            tag_ids_subquery = (
-                select(Bookmark.id.label("bookmark_id"))
-                .join(Bookmark.tags)
-                .where(
-                    and_(
-                        Bookmark.user_id == user_id,
-                        Tag.user_id == user_id,
-                        Tag.name.in_(normalized_tags),
-                    )
-                )
-                .group_by(Bookmark.id)
-                .having(func.count(func.distinct(Tag.name)) == len(normalized_tags))
-                .subquery()
-            )
-        else:
-            tag_ids_subquery = (
-                select(Bookmark.id.label("bookmark_id"))
-                .join(Bookmark.tags)
-                .where(
-                    and_(
-                        Bookmark.user_id == user_id,
-                        Tag.user_id == user_id,
-                        Tag.name.in_(normalized_tags),
-                    )
-                )
-                .group_by(Bookmark.id)
-                .subquery()
-            )
-
-        # add bookmarks with matching tags to the query
-        tagged_bookmark_ids = select(tag_ids_subquery.c.bookmark_id)
-        select_bookmarks_statement = select_bookmarks_statement.where(
-            Bookmark.id.in_(tagged_bookmark_ids)
-        )
-
-    # apply sorting
-    if sort == "alphabetical":
-        select_bookmarks_statement = select_bookmarks_statement.order_by(
-            func.lower(Bookmark.title).asc(),
-            Bookmark.created_at.desc(),
-            Bookmark.id.desc(),
-        )
-    else:
-        select_bookmarks_statement = select_bookmarks_statement.order_by(
-            Bookmark.updated_at.desc(),
-            Bookmark.id.desc(),
-        )
+    select_bookmarks_statement = filter_bookmarks_by_tags(
+        select_bookmarks_statement, user_id=user_id, tags=tags, tag_mode=tag_mode
+    )
+    select_bookmarks_statement = order_bookmarks(select_bookmarks_statement, sort=sort)
 
     # return a paginated list of bookmarks
-    return cast(
+    page = cast(
         LimitOffsetPage[BookmarkResponse],
         await apaginate(
             session,
             select_bookmarks_statement,
             params=LimitOffsetParams(limit=limit, offset=offset),
-            transformer=lambda items: [to_bookmark_response(b) for b in items],
+            # tag arrays in the rows can't be hashed to deduplicate, and ids are unique
+            unique=False,
+            transformer=to_bookmark_row_responses,
         ),
     )
+    return ModelJSONResponse(page)
+
+
+@router.get(
+    "/cursor", response_model=BookmarkCursorPage, response_class=ModelJSONResponse
+)
+async def get_bookmarks_by_cursor(
+    session: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    tags: list[str] = Query(default_factory=list, alias="tag"),
+    tag_mode: TagMode = Query(default="ignore"),
+    sort: BookmarkSort = Query(default="recent"),
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: str | None = Query(default=None),
+    include_total: bool = Query(default=False),
+) -> Response:
+    # filter bookmarks by user and tags. select only the response columns and tags
+    user_id: UUID = current_user.id
+    filtered_bookmarks_statement = filter_bookmarks_by_tags(
+        select_bookmark_responses().where(Bookmark.user_id == user_id),
+        user_id=user_id,
+        tags=tags,
+        tag_mode=tag_mode,
+    )
+
+    # seek past the cursor instead of scanning an offset, so every page costs the same
+    select_bookmarks_statement = filtered_bookmarks_statement
+    if cursor:
+        try:
+            select_bookmarks_statement = select_bookmarks_statement.where(
+                bookmark_cursor_condition(cursor, sort=sort)
+            )
+        except ValueError:
+            raise HTTPException(status_code=400, detail="invalid cursor")
+    select_bookmarks_statement = order_bookmarks(
+        select_bookmarks_statement, sort=sort
+    ).limit(limit + 1)
+    bookmarks = list((await session.execute(select_bookmarks_statement)).all())
+
+    # an extra row means there is another page
+    next_cursor = None
+    if len(bookmarks) > limit:
+        bookmarks = bookmarks[:limit]
+        next_cursor = encode_bookmark_cursor(bookmarks[-1], sort=sort)
+
+    # count all matching bookmarks only when asked
+    total = None
+    if include_total:
+        count_statement = select(func.count()).select_from(
+            filtered_bookmarks_statement.subquery()
+        )
+        total = int(await session.scalar(count_statement) or 0)
+
+    return ModelJSONResponse(
+        BookmarkCursorPage.model_construct(
+            items=to_bookmark_row_responses(bookmarks),
+            next_cursor=next_cursor,
+            total=total,
+        )
+    )
@@ -1,39 +1,46 @@
 # apps/api/src/bookmemory/api/v1/bookmarks/load.py
 from __future__ import annotations
 
+from typing import Literal
 from uuid import UUID
 
 import anyio
-from fastapi import APIRouter, Depends, HTTPException
-import sqlalchemy as sa
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.exc import NoResultFound
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from bookmemory.services.auth.users import get_current_user
+from bookmemory.services.bookmarks.bookmark_content import (
+    get_bookmark_content,
+    save_bookmark_content,
+)
 from bookmemory.services.bookmarks.get_bookmark import get_user_bookmark
+from bookmemory.services.bookmarks.library_generation import (
+    bump_library_generation,
+)
 from bookmemory.db.models.bookmark import (
     BookmarkStatus,
     BookmarkType,
     LoadMethod,
 )
-from bookmemory.db.models.bookmark_chunk import BookmarkChunk
 from bookmemory.db.session import get_db
 from bookmemory.schemas.bookmarks import (
     BookmarkResponse,
     to_bookmark_response,
 )
 from bookmemory.schemas.users import CurrentUser
-from bookmemory.services.embedding.chunk_embed import embed_chunks
+from bookmemory.services.embedding.chunk_pipeline import chunk_and_embed_content
+from bookmemory.services.embedding.chunk_sync import delete_bookmark_chunks
 from bookmemory.services.extraction.content_extract import extract_content
+from bookmemory.services.extraction.file_extract import extract_file_content
 from bookmemory.services.extraction.playwright_fetch import PlaywrightFetchError
 from bookmemory.services.extraction.http_fetch import FetchError
-from bookmemory.services.extraction.text_chunk import chunk_text
 
 MINIMUM_TEXT_LENGTH = (
     60  # set the status to no_content if the text is below this threshold
 )
 MAXIMUM_FETCH_SECONDS = 35.0
+MAXIMUM_FILE_LOAD_SECONDS = 120.0
 
 router = APIRouter()
 
@@ -53,6 +60,7 @@ async def load_bookmark(
     bookmark_id: UUID,
     session: AsyncSession = Depends(get_db),
     current_user: CurrentUser = Depends(get_current_user),
+    mode: Literal["incremental", "full"] = Query(default="incremental"),
 ) -> BookmarkResponse:
     # find the bookmark or throw a 404 if not found
     user_id: UUID = current_user.id
@@ -71,14 +79,19 @@ async def load_bookmark(
             raise HTTPException(status_code=422, detail="bookmark url is missing")
         bookmark.url = bookmark.url.strip()
 
-    # delete existing chunks and update the bookmark status and initial load method
-    await session.execute(
-        sa.delete(BookmarkChunk).where(BookmarkChunk.bookmark_id == bookmark.id)
-    )
+    # a full load deletes existing chunks up front.
+    # an incremental load keeps them so unchanged chunks don't need new embeddings
+    if mode == "full":
+        await delete_bookmark_chunks(session=session, bookmark_id=bookmark.id)
+
+    # update the bookmark status and initial load method
     bookmark.status = BookmarkStatus.loading
     bookmark.load_method = LoadMethod.http
+    await bump_library_generation(session=session, user_id=user_id)
     await session.commit()
 
+    # read the type up front since a rollback expires the bookmark attributes
+    is_file = bookmark.type == BookmarkType.file
     try:
         # extract content from the url for a bookmark link
         if bookmark.type == BookmarkType.link:
@@ -87,14 +100,21 @@ async def load_bookmark(
                 extracted_content = await extract_content(url=bookmark.url)
                 content = extracted_content.content or ""
                 load_method = extracted_content.load_method
-        # TODO: extract file content from the s3 url for a bookmark file
+        # extract pdf or text content from the uploaded, s3, or downloaded file for a bookmark file
         elif bookmark.type == BookmarkType.file:
             assert bookmark.url is not None
-            content = bookmark.description or bookmark.title or ""
-            load_method = LoadMethod.read
+            with anyio.fail_after(MAXIMUM_FILE_LOAD_SECONDS):
+                extracted_content = await extract_file_content(
+                    url=bookmark.url, user_id=user_id
+                )
+                content = extracted_content.content or ""
+                load_method = extracted_content.load_method
         # use manually provided content for a bookmark note
         elif bookmark.type == BookmarkType.note:
-            content = bookmark.content or bookmark.description or bookmark.title or ""
+            stored_content = await get_bookmark_content(
+                session=session, bookmark_id=bookmark.id
+            )
+            content = stored_content or bookmark.description or bookmark.title or ""
             load_method = LoadMethod.manual
         else:
             raise HTTPException(
@@ -102,77 +122,67 @@ async def load_bookmark(
             )
 
         # set the bookmark content and load method
-        bookmark.content = content
+        await save_bookmark_content(
+            session=session, bookmark_id=bookmark.id, content=content
+        )
         bookmark.load_method = load_method
 
         # return the bookmark with a status to no_content if the content was empty or too short
         if _is_content_low(content):
+            await delete_bookmark_chunks(session=session, bookmark_id=bookmark.id)
             bookmark.status = BookmarkStatus.no_content
+            await bump_library_generation(session=session, user_id=user_id)
             await session.commit()
             await session.refresh(bookmark)
             return to_bookmark_response(bookmark)
 
-        # chunk the content and return the bookmark with status no_content if there are no chunks
-        chunks = chunk_text(text=content)
-        if len(chunks) == 0:
+        # chunk the content and embed new or changed chunks as the chunks are produced
+        bookmark.status = BookmarkStatus.processing
+        await bump_library_generation(session=session, user_id=user_id)
+        await session.commit()
+        chunk_count = await chunk_and_embed_content(
+            session=session,
+            bookmark_id=bookmark.id,
+            content=content,
+        )
+
+        # return the bookmark with status no_content if there are no chunks
+        if chunk_count == 0:
+            await delete_bookmark_chunks(session=session, bookmark_id=bookmark.id)
             bookmark.status = BookmarkStatus.no_content
+            await bump_library_generation(session=session, user_id=user_id)
             await session.commit()
             await session.refresh(bookmark)
             return to_bookmark_response(bookmark)
 
-        # persist new chunks to the database
-        for chunk_index, chunk in enumerate(chunks):
-            session.add(
-                BookmarkChunk(
-                    bookmark_id=bookmark.id,
-                    chunk_index=chunk_index,
-                    text=chunk,
-                    embedding=None,
-                )
-            )
-
-        # update the bookmark status to processing and embed the chunks into vectors
-        bookmark.status = BookmarkStatus.processing
-        await session.commit()
-        vectors = await embed_chunks(chunks)
-        if len(vectors) != len(chunks):
-            raise RuntimeError("embedding count mismatch")
-
-        # verify that the chunk count matches the vector count
-        select_chunks_statement = (
-            select(BookmarkChunk)
-            .where(BookmarkChunk.bookmark_id == bookmark.id)
-            .order_by(BookmarkChunk.chunk_index.asc())
-        )
-        bookmark_chunks = (
-            (await session.execute(select_chunks_statement)).scalars().all()
-        )
-        if len(bookmark_chunks) != len(vectors):
-            raise RuntimeError("vector chunk count mismatch")
-
-        # map each vector to its bookmark chunk embedding and update the bookmark status to ready
-        for chunk_index, bookmark_chunk in enumerate(bookmark_chunks):
-            bookmark_chunk.embedding = vectors[chunk_index]
+        # update the bookmark status to ready
         bookmark.status = BookmarkStatus.ready
+        await bump_library_generation(session=session, user_id=user_id)
         await session.commit()
 
     except TimeoutError as error:
+        timeout_seconds = (
+            MAXIMUM_FILE_LOAD_SECONDS if is_file else MAXIMUM_FETCH_SECONDS
+        )
         await session.rollback()
         bookmark.status = BookmarkStatus.failed
+        await bump_library_generation(session=session, user_id=user_id)
         await session.commit()
         raise HTTPException(
             status_code=504,
-            detail=f"load timed out after {MAXIMUM_FETCH_SECONDS}s",
+            detail=f"load timed out after {timeout_seconds}s",
         ) from error
 
     except (PlaywrightFetchError, FetchError) as error:
         await session.rollback()
         bookmark.status = BookmarkStatus.failed
-        bookmark.load_method = (
-            LoadMethod.playwright
-            if isinstance(error, PlaywrightFetchError)
-            else LoadMethod.http
-        )
+        if isinstance(error, PlaywrightFetchError):
+            bookmark.load_method = LoadMethod.playwright
+        elif is_file:
+            bookmark.load_method = LoadMethod.read
+        else:
+            bookmark.load_method = LoadMethod.http
+        await bump_library_generation(session=session, user_id=user_id)
         await session.commit()
         await session.refresh(bookmark)
         return to_bookmark_response(bookmark)
@@ -180,6 +190,7 @@ async def load_bookmark(
     except Exception as error:
         await session.rollback()
         bookmark.status = BookmarkStatus.failed
+        await bump_library_generation(session=session, user_id=user_id)
         await session.commit()
         raise HTTPException(status_code=500, detail=f"load failed: {error}") from error
 
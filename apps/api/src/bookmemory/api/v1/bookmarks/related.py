@@ -1,13 +1,15 @@
 from __future__ import annotations
 
+from typing import Any
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import Response
 from sqlalchemy import and_, func, select, case
 from sqlalchemy.exc import NoResultFound
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
+from bookmemory.api.responses import ModelJSONResponse
 from bookmemory.services.auth.users import get_current_user
 from bookmemory.db.models.bookmark import (
     Bookmark,
@@ -17,11 +19,38 @@ from bookmemory.db.models.bookmark_chunk import BookmarkChunk
 from bookmemory.db.session import get_db
 from bookmemory.schemas.bookmarks import (
     BookmarkSearchResponse,
-    to_bookmark_response,
     TagMode,
 )
 from bookmemory.schemas.users import CurrentUser
 from bookmemory.services.bookmarks.get_bookmark import get_user_bookmark
+from bookmemory.services.bookmarks.library_generation import get_library_generation
+from bookmemory.services.bookmarks.read_model import (
+    bookmark_row_fields,
+    select_bookmark_responses,
+    to_search_responses,
+)
+from bookmemory.services.search.adaptive import retrieve_adaptively
+from bookmemory.services.search.result_cache import (
+    cache_results,
+    get_cached_results,
+    search_request_key,
+)
+from bookmemory.services.search.snippets import (
+    RELATED_SNIPPET_LENGTH,
+    get_chunk_snippets,
+)
+from bookmemory.services.tags.tag_filter import tag_ids_condition
+from bookmemory.services.search.vector_distance import (
+    embedding_distance,
+    enable_iterative_scan,
+    from_cosine_distance,
+    to_cosine_distance,
+    vector_search_conditions,
+)
+from bookmemory.services.search.vector_index import (
+    VectorIndexMatch,
+    search_vector_index,
+)
 
 router = APIRouter()
 
@@ -70,16 +99,33 @@ def _clean_token(token: str) -> str:
     return token.strip(".,:;!?()[]{}\"'`")
 
 
-@router.get("/{bookmark_id}/related", response_model=list[BookmarkSearchResponse])
+# responses are validated once when they're built, so they're serialized without validating them again
+@router.get(
+    "/{bookmark_id}/related",
+    response_model=list[BookmarkSearchResponse],
+    response_class=ModelJSONResponse,
+)
 async def get_related_bookmarks(
     bookmark_id: UUID,
     session: AsyncSession = Depends(get_db),
     current_user: CurrentUser = Depends(get_current_user),
     tag_mode: TagMode = Query(default="ignore"),
     limit: int = Query(default=10, ge=1, le=20),
-) -> list[BookmarkSearchResponse]:
-    # find the bookmark or throw a 404 if not found
+) -> Response:
+    # return the cached results if the library hasn't changed since the same request.
+    # results are only cached for a bookmark that was found, and deleting it bumps the generation
     user_id: UUID = current_user.id
+    generation = await get_library_generation(session=session, user_id=user_id)
+    request_key = search_request_key(
+        "related", bookmark_id=bookmark_id, tag_mode=tag_mode, limit=limit
+    )
+    cached_responses = await get_cached_results(
+        user_id=user_id, generation=generation, request_key=request_key
+    )
+    if cached_responses is not None:
+        return ModelJSONResponse(cached_responses)
+
+    # find the bookmark or throw a 404 if not found
     try:
         bookmark = await get_user_bookmark(
             bookmark_id=bookmark_id,
@@ -124,89 +170,158 @@ async def get_related_bookmarks(
         await session.execute(select_bookmark_chunk_statement)
     ).scalar_one_or_none()
     if bookmark_chunk is None or bookmark_chunk.embedding is None:
-        return []
+        await cache_results(
+            user_id=user_id, generation=generation, request_key=request_key, results=[]
+        )
+        return ModelJSONResponse([])
     query_embedding = bookmark_chunk.embedding
 
     # select related bookmark chunks by distance to the query embedding
-    chunk_distance = BookmarkChunk.embedding.cosine_distance(query_embedding)
+    chunk_distance = embedding_distance(query_embedding)
     max_distance = 1.0 - MINIMUM_SIMILARITY_SCORE
+    tag_condition = tag_ids_condition(
+        tag_ids=[tag.id for tag in (bookmark.tags or [])], tag_mode=tag_mode
+    )
 
-    select_related_bookmarks_statement = (
-        select(
-            BookmarkChunk.id.label("chunk_id"),
-            BookmarkChunk.bookmark_id.label("bookmark_id"),
-            BookmarkChunk.text.label("chunk_text"),
-            chunk_distance.label("distance"),
-            func.row_number()
-            .over(partition_by=BookmarkChunk.bookmark_id, order_by=chunk_distance.asc())
-            .label("rn"),
-        )
-        .join(Bookmark, Bookmark.id == BookmarkChunk.bookmark_id)
-        .where(
-            and_(
+    async def fetch_related_chunks(
+        candidate_limit: int,
+    ) -> tuple[list[VectorIndexMatch], int, int]:
+        # prefilter candidates by hamming distance when the binary search mode is enabled
+        # tags are filtered before the nearest neighbor limit, so no candidates are thrown away
+        related_conditions = await vector_search_conditions(
+            session=session,
+            search=query_embedding,
+            conditions=[
                 Bookmark.user_id == user_id,
                 Bookmark.id != bookmark.id,
                 Bookmark.status == BookmarkStatus.ready,
-                BookmarkChunk.embedding.isnot(None),
-                chunk_distance <= max_distance,  # ignore low-similarity rows in SQL
+                tag_condition,
+            ],
+            limit=candidate_limit,
+        )
+
+        select_related_bookmarks_statement = (
+            select(
+                BookmarkChunk.id.label("chunk_id"),
+                BookmarkChunk.bookmark_id.label("bookmark_id"),
+                chunk_distance.label("distance"),
+                func.row_number()
+                .over(
+                    partition_by=BookmarkChunk.bookmark_id,
+                    order_by=chunk_distance.asc(),
+                )
+                .label("rn"),
+            )
+            .join(Bookmark, Bookmark.id == BookmarkChunk.bookmark_id)
+            .where(
+                and_(
+                    *related_conditions,
+                    # ignore low-similarity rows in SQL
+                    chunk_distance <= from_cosine_distance(max_distance),
+                )
             )
+            .order_by(chunk_distance.asc())
+            .limit(candidate_limit)
+        )
+        sorted_bookmark_chunks_query = select_related_bookmarks_statement.cte(
+            "sorted_bookmark_chunks"
         )
-    )
-    sorted_bookmark_chunks_query = select_related_bookmarks_statement.subquery()
 
-    # choose the closest chunk for each bookmark
-    # over-fetch slightly to account for tag filtering
-    most_relevant_bookmark_chunks_statement = (
-        select(
-            sorted_bookmark_chunks_query.c.chunk_id,
-            sorted_bookmark_chunks_query.c.bookmark_id,
-            sorted_bookmark_chunks_query.c.chunk_text,
-            sorted_bookmark_chunks_query.c.distance,
+        # choose the closest chunk for each bookmark
+        # count the bookmarks the candidates cover before the limit, and the candidate rows
+        most_relevant_bookmark_chunks_statement = (
+            select(
+                sorted_bookmark_chunks_query.c.chunk_id,
+                sorted_bookmark_chunks_query.c.bookmark_id,
+                sorted_bookmark_chunks_query.c.distance,
+                func.count().over().label("bookmark_count"),
+                select(func.count())
+                .select_from(sorted_bookmark_chunks_query)
+                .scalar_subquery()
+                .label("candidate_count"),
+            )
+            .where(sorted_bookmark_chunks_query.c.rn == 1)
+            .order_by(sorted_bookmark_chunks_query.c.distance.asc())
+            .limit(limit)
         )
-        .where(sorted_bookmark_chunks_query.c.rn == 1)
-        .order_by(sorted_bookmark_chunks_query.c.distance.asc())
-        .limit(
-            limit * 10
-        )  # small buffer so tag filtering doesn't eliminate all results
+        related_chunk_rows = (
+            await session.execute(most_relevant_bookmark_chunks_statement)
+        ).all()
+
+        # report cosine distances like the in-memory index
+        related_chunks = [
+            VectorIndexMatch(
+                bookmark_id=related_chunk_row.bookmark_id,
+                chunk_id=related_chunk_row.chunk_id,
+                distance=to_cosine_distance(float(related_chunk_row.distance)),
+            )
+            for related_chunk_row in related_chunk_rows
+        ]
+        if not related_chunk_rows:
+            return [], 0, 0
+        return (
+            related_chunks,
+            int(related_chunk_rows[0].bookmark_count),
+            int(related_chunk_rows[0].candidate_count),
+        )
+
+    # answer from the in-memory index, or fall back to postgres when it's disabled or too large
+    related_bookmark_chunks: list[VectorIndexMatch] | None = await search_vector_index(
+        session=session,
+        user_id=user_id,
+        generation=generation,
+        search=query_embedding,
+        limit=limit,
+        conditions=[tag_condition],
+        exclude_bookmark_id=bookmark.id,
+        max_distance=max_distance,
     )
+    if related_bookmark_chunks is None:
+        # widen the nearest neighbor candidates only when they cover too few bookmarks
+        await enable_iterative_scan(session=session)
+        related_bookmark_chunks = await retrieve_adaptively(
+            user_id=user_id,
+            kind="related",
+            filter_key=tag_mode if tag_mode != "ignore" else "",
+            limit=limit,
+            fetch=fetch_related_chunks,
+        )
 
     # return no results if no relevant bookmark chunks were found
-    related_bookmark_chunks = (
-        await session.execute(most_relevant_bookmark_chunks_statement)
-    ).all()
     if not related_bookmark_chunks:
-        return []
+        await cache_results(
+            user_id=user_id, generation=generation, request_key=request_key, results=[]
+        )
+        return ModelJSONResponse([])
 
     # select and map related bookmarks to their IDs
     related_bookmark_ids = [
         related_chunk.bookmark_id for related_chunk in related_bookmark_chunks
     ]
-    related_bookmarks_statement = (
-        select(Bookmark)
-        .where(and_(Bookmark.user_id == user_id, Bookmark.id.in_(related_bookmark_ids)))
-        .options(selectinload(Bookmark.tags))
-    )
-    related_bookmarks = (
-        (await session.execute(related_bookmarks_statement)).scalars().all()
+    related_bookmarks_statement = select_bookmark_responses().where(
+        and_(Bookmark.user_id == user_id, Bookmark.id.in_(related_bookmark_ids))
     )
+    related_bookmarks = (await session.execute(related_bookmarks_statement)).all()
     related_bookmarks_by_id = {
         related_bookmark.id: related_bookmark for related_bookmark in related_bookmarks
     }
 
-    # map related bookmark chunks to their bookmarks and return bookmark search results
-    related_bookmark_responses: list[BookmarkSearchResponse] = []
-    bookmark_tag_ids: set[UUID] = set()
-    if tag_mode != "ignore":
-        bookmark_tag_ids = {tag.id for tag in (bookmark.tags or [])}
+    # load snippets for the related bookmark chunks only
+    snippets_by_chunk_id = await get_chunk_snippets(
+        session=session,
+        chunk_ids=[related_chunk.chunk_id for related_chunk in related_bookmark_chunks],
+        max_length=RELATED_SNIPPET_LENGTH,
+    )
 
+    # map related bookmark chunks to their bookmarks and return bookmark search results
+    related_fields: list[dict[str, Any]] = []
     for related_chunk in related_bookmark_chunks:
         related_bookmark = related_bookmarks_by_id.get(related_chunk.bookmark_id)
         if related_bookmark is None:
             continue
 
         # filter out related bookmarks with a low similarity score
-        distance = float(related_chunk.distance or 1.0)
-        similarity_score = 1.0 - distance
+        similarity_score = 1.0 - related_chunk.distance
         if similarity_score < MINIMUM_SIMILARITY_SCORE:
             continue
 
@@ -245,36 +360,29 @@ async def get_related_bookmarks(
 
         similarity_score = max(0.0, min(1.0, similarity_score))
 
-        # filter related bookmarks out based on the tag mode
-        if tag_mode != "ignore":
-            related_tag_ids = {tag.id for tag in (related_bookmark.tags or [])}
-            shared_tag_ids = bookmark_tag_ids.intersection(related_tag_ids)
-            if tag_mode == "any" and not shared_tag_ids:
-                continue
-            if (
-                tag_mode == "all"
-                and bookmark_tag_ids
-                and not bookmark_tag_ids.issubset(related_tag_ids)
-            ):
-                continue
-
-        # generate a snippet of the related bookmark chunk
-        snippet_text = (related_chunk.chunk_text or "").strip()
-        snippet = snippet_text[:240] + ("…" if len(snippet_text) > 240 else "")
-
         # add the related bookmark to the search results
-        related_bookmark_responses.append(
-            BookmarkSearchResponse(
-                **to_bookmark_response(related_bookmark).model_dump(),
-                search_mode="related",
-                snippet=snippet,
-                score=similarity_score,
-                chunk_id=related_chunk.chunk_id,
-            )
+        snippet = snippets_by_chunk_id.get(related_chunk.chunk_id)
+        related_fields.append(
+            {
+                **bookmark_row_fields(related_bookmark),
+                "search_mode": "related",
+                "snippet": snippet.text if snippet else None,
+                "score": similarity_score,
+                "chunk_id": related_chunk.chunk_id,
+            }
         )
 
         # stop adding related bookmarks if we reach the limit
-        if len(related_bookmark_responses) >= limit:
+        if len(related_fields) >= limit:
             break
 
-    return related_bookmark_responses
+    # validate the whole page once
+    related_bookmark_responses = to_search_responses(related_fields)
+
+    await cache_results(
+        user_id=user_id,
+        generation=generation,
+        request_key=request_key,
+        results=related_bookmark_responses,
+    )
+    return ModelJSONResponse(related_bookmark_responses)
@@ -11,17 +11,23 @@ from . import (
     related,
     search,
     summary,
+    typeahead,
+    upload,
 )
 
 # register all bookmark subroutes
+# list and typeahead come before detail so /bookmarks/cursor and /bookmarks/typeahead
+# aren't read as bookmark ids
 router = APIRouter(prefix="/bookmarks", tags=["bookmarks"])
+router.include_router(list.router)
+router.include_router(typeahead.router)
 router.include_router(preview.router)
 router.include_router(create.router)
 router.include_router(detail.router)
 router.include_router(update.router)
 router.include_router(delete.router)
-router.include_router(list.router)
 router.include_router(load.router)
 router.include_router(related.router)
 router.include_router(search.router)
 router.include_router(summary.router)
+router.include_router(upload.router)
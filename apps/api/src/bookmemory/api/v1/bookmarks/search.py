@@ -1,32 +1,52 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from typing import Any
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import Response
 from pydantic import BaseModel, Field
-from sqlalchemy import and_, select
+from sqlalchemy import and_
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
+from bookmemory.api.responses import ModelJSONResponse
+from bookmemory.core.settings import settings
 from bookmemory.db.models.bookmark import Bookmark, BookmarkStatus
 from bookmemory.db.session import get_db
 from bookmemory.schemas.bookmarks import (
     BookmarkSearchResponse,
     TagMode,
-    to_bookmark_response,
 )
 from bookmemory.schemas.users import CurrentUser
 from bookmemory.services.auth.users import get_current_user
+from bookmemory.services.bookmarks.library_generation import get_library_generation
+from bookmemory.services.bookmarks.read_model import (
+    bookmark_row_fields,
+    select_bookmark_responses,
+    to_search_responses,
+)
 from bookmemory.services.embedding.chunk_embed import embed_chunks
-from bookmemory.services.tags.normalize_tags import normalize_tags
+from bookmemory.services.tags.tag_filter import tag_filter_key, tag_names_condition
 from bookmemory.services.search.semantic_search import (
     semantic_search,
     SemanticSearchResult,
 )
+from bookmemory.services.search.rerank import rerank_chunks
+from bookmemory.services.search.result_cache import (
+    cache_results,
+    get_cached_results,
+    search_request_key,
+)
+from bookmemory.services.search.snippets import (
+    SEARCH_SNIPPET_LENGTH,
+    get_keyword_snippets,
+    get_semantic_snippets,
+)
 from bookmemory.services.search.keyword_search import (
     keyword_search,
     KeywordSearchResult,
+    to_search_terms,
 )
 
 router = APIRouter()
@@ -38,6 +58,15 @@ KEYWORD_RESULT_WEIGHT = 0.40
 # the minimum match score to return a resul
 MINIMUM_SCORE = 0.25
 
+# the minimum cross-encoder relevance to return a reranked result
+MINIMUM_RERANK_SCORE = 0.25
+
+# full-text search configuration for keyword search and highlighting
+SEARCH_LANGUAGE = "english"
+
+# bookmarks to rank from each search type per result so both scores can be combined
+FUSION_CANDIDATES_PER_RESULT = 3
+
 
 class BookmarkSearchRequest(BaseModel):
     search: str = Field(min_length=1)
@@ -46,62 +75,68 @@ class BookmarkSearchRequest(BaseModel):
     tag_mode: TagMode = "ignore"
 
 
-def build_snippet(text: str, max_length: int = 320) -> str:
-    snippet_text = (text or "").strip().replace("\n", " ")
-    if len(snippet_text) <= max_length:
-        return snippet_text
-    return snippet_text[: max_length - 1] + "…"
-
-
 @dataclass
 class SearchResult:
     bookmark_id: UUID
     chunk_id: UUID
-    chunk_text: str
     score: float
+    keyword_match: bool  # the chunk came from keyword search
 
 
-def _are_tags_valid(
-    *,
-    bookmark: Bookmark,
-    tag_mode: TagMode,
-    tags: list[str],
-) -> bool:
-    if tag_mode == "ignore":
-        return True
-    bookmark_tags = {tag.name for tag in (bookmark.tags or [])}
-    if tag_mode == "any":
-        return any(tag in bookmark_tags for tag in tags)
-    if tag_mode == "all":
-        return all(tag in bookmark_tags for tag in tags)
-    return True
-
-
-@router.post("/search", response_model=list[BookmarkSearchResponse])
+# responses are validated once when they're built, so they're serialized without validating them again
+@router.post(
+    "/search",
+    response_model=list[BookmarkSearchResponse],
+    response_class=ModelJSONResponse,
+)
 async def search_bookmarks(
     payload: BookmarkSearchRequest,
     session: AsyncSession = Depends(get_db),
     current_user: CurrentUser = Depends(get_current_user),
-) -> list[BookmarkSearchResponse]:
+) -> Response:
     search_text = payload.search.strip()
     if search_text == "":
         raise HTTPException(status_code=422, detail="search is required")
 
-    # normalize tags and fix tag_mode if needed
-    normalized_tags = normalize_tags(payload.tags)
-    tag_mode = payload.tag_mode
-    if tag_mode != "ignore" and len(normalized_tags) == 0:
-        tag_mode = "ignore"
+    # return the cached results if the library hasn't changed since the same search
+    user_id: UUID = current_user.id
+    filter_key = tag_filter_key(tag_names=payload.tags, tag_mode=payload.tag_mode)
+    generation = await get_library_generation(session=session, user_id=user_id)
+    request_key = search_request_key(
+        "search",
+        search=" ".join(search_text.split()),
+        filter_key=filter_key,
+        limit=payload.limit,
+    )
+    cached_responses = await get_cached_results(
+        user_id=user_id, generation=generation, request_key=request_key
+    )
+    if cached_responses is not None:
+        return ModelJSONResponse(cached_responses)
+
+    # filter tags in the search queries so every candidate can be returned
+    tag_condition = await tag_names_condition(
+        session=session,
+        user_id=user_id,
+        tag_names=payload.tags,
+        tag_mode=payload.tag_mode,
+    )
+    # reranked searches fetch the candidates to rerank instead of oversampling for fusion
+    if settings.search_rerank_candidates > 0:
+        candidate_limit = max(payload.limit, settings.search_rerank_candidates)
+    else:
+        candidate_limit = payload.limit * FUSION_CANDIDATES_PER_RESULT
 
     # run a semantic search and map the esults to bookmark ids
-    user_id: UUID = current_user.id
-    query_embedding = (await embed_chunks([search_text]))[0]
+    query_embedding = (await embed_chunks([search_text], interactive=True))[0]
     semantic_results: list[SemanticSearchResult] = await semantic_search(
         session=session,
         user_id=user_id,
         search=query_embedding,
-        limit=payload.limit,
-        oversample=10,
+        limit=candidate_limit,
+        conditions=[tag_condition],
+        filter_key=filter_key,
+        generation=generation,
     )
     semantic_result_by_bookmark: dict[UUID, SemanticSearchResult] = {
         search_result.bookmark_id: search_result for search_result in semantic_results
@@ -112,9 +147,10 @@ async def search_bookmarks(
         session=session,
         user_id=user_id,
         search=search_text,
-        limit=payload.limit,
-        oversample=10,
-        language="english",
+        limit=candidate_limit,
+        language=SEARCH_LANGUAGE,
+        conditions=[tag_condition],
+        filter_key=filter_key,
     )
     keyword_result_by_bookmark: dict[UUID, KeywordSearchResult] = {
         search_result.bookmark_id: search_result for search_result in keyword_results
@@ -126,23 +162,20 @@ async def search_bookmarks(
         keyword_result_by_bookmark.keys()
     )
     if not search_result_bookmark_ids:
-        return []
-
-    # load user bookmarks with tags for filtering
-    select_bookmarks_statements = (
-        select(Bookmark)
-        .where(
-            and_(
-                Bookmark.user_id == user_id,
-                Bookmark.status == BookmarkStatus.ready,
-                Bookmark.id.in_(list(search_result_bookmark_ids)),
-            )
+        await cache_results(
+            user_id=user_id, generation=generation, request_key=request_key, results=[]
+        )
+        return ModelJSONResponse([])
+
+    # load the response columns and tags of the user bookmarks
+    select_bookmarks_statements = select_bookmark_responses().where(
+        and_(
+            Bookmark.user_id == user_id,
+            Bookmark.status == BookmarkStatus.ready,
+            Bookmark.id.in_(list(search_result_bookmark_ids)),
         )
-        .options(selectinload(Bookmark.tags))
-    )
-    user_bookmarks = (
-        (await session.execute(select_bookmarks_statements)).scalars().all()
     )
+    user_bookmarks = (await session.execute(select_bookmarks_statements)).all()
     user_bookmarks_by_id = {bookmark.id: bookmark for bookmark in user_bookmarks}
 
     # use the highest keyword score to divide
@@ -160,26 +193,17 @@ async def search_bookmarks(
         if bookmark is None:
             continue
 
-        # filter bookmarks by tags
-        if not _are_tags_valid(
-            bookmark=bookmark, tag_mode=tag_mode, tags=normalized_tags
-        ):
-            continue
-
         # calculate the semantic score for the bookmark
         semantic_score = 0.0
         semantic_chunk_id: UUID | None = None
-        semantic_text: str | None = None
         semantic_search_result = semantic_result_by_bookmark.get(bookmark_id)
         if semantic_search_result is not None:
             semantic_score = semantic_search_result.semantic_score
             semantic_chunk_id = semantic_search_result.chunk_id
-            semantic_text = semantic_search_result.chunk_text
 
         # calculate the keyword score for the bookmark
         keyword_score = 0.0
         keyword_chunk_id: UUID | None = None
-        keyword_text: str | None = None
         keyword_result: KeywordSearchResult | None = keyword_result_by_bookmark.get(
             bookmark_id
         )
@@ -187,7 +211,6 @@ async def search_bookmarks(
             if max_keyword_score > 0.0:
                 keyword_score = keyword_result.keyword_score / max_keyword_score
             keyword_chunk_id = keyword_result.chunk_id
-            keyword_text = keyword_result.chunk_text
 
         # filter out results with low scores
         search_result_score = (SEMANTIC_RESULT_WEIGHT * semantic_score) + (
@@ -198,12 +221,11 @@ async def search_bookmarks(
 
         # choose a representative chunk use for a snippet
         # prefer keyword chunks over semantic chunks for highlighting
-        if keyword_chunk_id is not None and keyword_text is not None:
+        keyword_match = keyword_chunk_id is not None
+        if keyword_chunk_id is not None:
             chunk_id = keyword_chunk_id
-            chunk_text = keyword_text
-        elif semantic_chunk_id is not None and semantic_text is not None:
+        elif semantic_chunk_id is not None:
             chunk_id = semantic_chunk_id
-            chunk_text = semantic_text
         else:
             # shouldn't happen, but just in case
             continue
@@ -213,30 +235,103 @@ async def search_bookmarks(
             SearchResult(
                 bookmark_id=bookmark_id,
                 chunk_id=chunk_id,
-                chunk_text=chunk_text,
                 score=float(max(0.0, min(1.0, search_result_score))),
+                keyword_match=keyword_match,
             )
         )
 
-    # sort and limit the results by score
+    # sort the results by score
     combined_results.sort(key=lambda search_result: search_result.score, reverse=True)
+
+    # rescore the best fused results against the query with the local cross-encoder.
+    # keep the fused scores when it runs out of time, and don't cache them
+    reranked = True
+    if settings.search_rerank_candidates > 0:
+        rerank_results = combined_results[:candidate_limit]
+        rerank_scores = await rerank_chunks(
+            session=session,
+            query=search_text,
+            chunks=[
+                (
+                    search_result.chunk_id,
+                    user_bookmarks_by_id[search_result.bookmark_id].title,
+                )
+                for search_result in rerank_results
+            ],
+        )
+        if rerank_scores is None:
+            reranked = False
+        else:
+            # drop the candidates the cross-encoder finds irrelevant
+            reranked_results: list[SearchResult] = []
+            for search_result, rerank_score in zip(rerank_results, rerank_scores):
+                if rerank_score < MINIMUM_RERANK_SCORE:
+                    continue
+                search_result.score = rerank_score
+                reranked_results.append(search_result)
+            combined_results = sorted(
+                reranked_results,
+                key=lambda search_result: search_result.score,
+                reverse=True,
+            )
+
+    # limit the results
     sorted_search_results = combined_results[: payload.limit]
 
+    # highlight the returned chunks only. keyword chunks around their matching terms
+    # and semantic chunks around the sentence closest to the query
+    snippets_by_chunk_id = await get_keyword_snippets(
+        session=session,
+        chunk_ids=[
+            search_result.chunk_id
+            for search_result in sorted_search_results
+            if search_result.keyword_match
+        ],
+        search_terms=to_search_terms(search_text),
+        language=SEARCH_LANGUAGE,
+        max_length=SEARCH_SNIPPET_LENGTH,
+    )
+    snippets_by_chunk_id |= await get_semantic_snippets(
+        session=session,
+        chunk_ids=[
+            search_result.chunk_id
+            for search_result in sorted_search_results
+            if not search_result.keyword_match
+        ],
+        query_embedding=query_embedding,
+        max_length=SEARCH_SNIPPET_LENGTH,
+    )
+
     # return the search results as responses
-    search_responses: list[BookmarkSearchResponse] = []
+    search_fields: list[dict[str, Any]] = []
     for search_result in sorted_search_results:
         bookmark = user_bookmarks_by_id.get(search_result.bookmark_id)
         if bookmark is None:
             continue
 
-        search_responses.append(
-            BookmarkSearchResponse(
-                **to_bookmark_response(bookmark).model_dump(),
-                search_mode="search",
-                snippet=build_snippet(search_result.chunk_text),
-                score=search_result.score,
-                chunk_id=search_result.chunk_id,
-            )
+        snippet = snippets_by_chunk_id.get(search_result.chunk_id)
+        search_fields.append(
+            {
+                **bookmark_row_fields(bookmark),
+                "search_mode": "search",
+                "snippet": snippet.text if snippet else None,
+                "highlights": [
+                    {"start": start, "end": end}
+                    for start, end in (snippet.highlights if snippet else [])
+                ],
+                "score": search_result.score,
+                "chunk_id": search_result.chunk_id,
+            }
         )
 
-    return search_responses
+    # validate the whole page once
+    search_responses = to_search_responses(search_fields)
+
+    if reranked:
+        await cache_results(
+            user_id=user_id,
+            generation=generation,
+            request_key=request_key,
+            results=search_responses,
+        )
+    return ModelJSONResponse(search_responses)
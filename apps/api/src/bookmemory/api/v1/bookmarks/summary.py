@@ -16,6 +16,9 @@ from bookmemory.schemas.users import CurrentUser
 from bookmemory.services.ai.providers import get_ai_provider
 from bookmemory.services.auth.users import get_current_user
 from bookmemory.services.bookmarks.get_bookmark import get_user_bookmark
+from bookmemory.services.bookmarks.library_generation import (
+    bump_library_generation,
+)
 
 router = APIRouter()
 
@@ -33,6 +36,7 @@ async def stream_bookmark_summary(
             bookmark_id=bookmark_id,
             user_id=user_id,
             session=session,
+            with_content=True,
         )
     except NoResultFound:
         raise HTTPException(status_code=404, detail="bookmark not found")
@@ -49,6 +53,7 @@ async def stream_bookmark_summary(
             # save the summary to the bookmark
             summary = "".join(chunks).strip()
             bookmark.summary = summary
+            await bump_library_generation(session=session, user_id=user_id)
             await session.commit()
 
             # stream the done message
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bookmemory.db.session import get_db
+from bookmemory.schemas.bookmarks import BookmarkTypeaheadResponse
+from bookmemory.schemas.users import CurrentUser
+from bookmemory.services.auth.users import get_current_user
+from bookmemory.services.search.typeahead import search_typeahead
+
+router = APIRouter()
+
+
+@router.get("/typeahead", response_model=list[BookmarkTypeaheadResponse])
+async def get_typeahead_bookmarks(
+    session: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    q: str = Query(min_length=1, max_length=200),
+    limit: int = Query(default=8, ge=1, le=20),
+) -> list[BookmarkTypeaheadResponse]:
+    # match titles, urls, and tag names on every keystroke without embedding the query
+    user_id: UUID = current_user.id
+    typeahead_matches = await search_typeahead(
+        session=session, user_id=user_id, query=q, limit=limit
+    )
+    return [
+        BookmarkTypeaheadResponse(
+            id=typeahead_match.bookmark_id,
+            title=typeahead_match.title,
+            url=typeahead_match.url,
+            type=typeahead_match.type,
+        )
+        for typeahead_match in typeahead_matches
+    ]
@@ -6,6 +6,9 @@ from uuid import UUID
 from bookmemory.db.models.bookmark import BookmarkType
 from bookmemory.services.auth.users import get_current_user
 from bookmemory.services.bookmarks.get_bookmark import get_user_bookmark
+from bookmemory.services.bookmarks.library_generation import (
+    bump_library_generation,
+)
 from bookmemory.db.session import get_db
 from bookmemory.schemas.bookmarks import (
     BookmarkResponse,
@@ -13,7 +16,12 @@ from bookmemory.schemas.bookmarks import (
     BookmarkUpdateRequest,
 )
 from bookmemory.schemas.users import CurrentUser
+from bookmemory.services.files.storage import is_supported_file_url
 from bookmemory.services.tags.get_tags import get_or_create_tags
+from bookmemory.services.tags.tag_counts import (
+    invalidate_tag_counts,
+    update_tag_counts,
+)
 
 router = APIRouter()
 
@@ -37,7 +45,8 @@ async def update_bookmark(
 
     update_fields = payload.model_dump(exclude_unset=True)
 
-    # update tags if provided
+    # update tags and their bookmark counts if provided
+    tags_changed = False
     if "tags" in update_fields:
         tag_names = update_fields.pop("tags") or []
         tags = await get_or_create_tags(
@@ -45,7 +54,14 @@ async def update_bookmark(
             user_id=user_id,
             tag_names=tag_names,
         )
+        await update_tag_counts(
+            session=session,
+            added_tag_ids=[tag.id for tag in tags],
+            removed_tag_ids=[tag.id for tag in bookmark.tags],
+        )
         bookmark.tags = tags
+        bookmark.tag_ids = [tag.id for tag in tags]
+        tags_changed = True
 
     # update title if provided
     if "title" in update_fields:
@@ -78,13 +94,21 @@ async def update_bookmark(
                     status_code=422,
                     detail=f"url is required for {bookmark_type} bookmarks",
                 )
+            if bookmark.type == BookmarkType.file and not is_supported_file_url(url):
+                raise HTTPException(
+                    status_code=422,
+                    detail="file url must be a local://, s3://, http://, or https:// url",
+                )
             bookmark.url = url
         else:
             bookmark.url = None
 
     # save and return the updated bookmark
     session.add(bookmark)
+    await bump_library_generation(session=session, user_id=user_id)
     await session.commit()
+    if tags_changed:
+        invalidate_tag_counts(user_id)
     updated_bookmark = await get_user_bookmark(
         bookmark_id=bookmark.id,
         user_id=user_id,
@@ -0,0 +1,56 @@
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from sqlalchemy.exc import NoResultFound
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bookmemory.db.models.bookmark import BookmarkStatus, BookmarkType
+from bookmemory.db.session import get_db
+from bookmemory.schemas.bookmarks import BookmarkResponse, to_bookmark_response
+from bookmemory.schemas.users import CurrentUser
+from bookmemory.services.auth.users import get_current_user
+from bookmemory.services.bookmarks.get_bookmark import get_user_bookmark
+from bookmemory.services.bookmarks.library_generation import (
+    bump_library_generation,
+)
+from bookmemory.services.files.storage import FileTooLargeError, save_upload
+
+router = APIRouter()
+
+
+@router.put("/{bookmark_id}/file", response_model=BookmarkResponse)
+async def upload_bookmark_file(
+    bookmark_id: UUID,
+    file: UploadFile = File(...),
+    session: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+) -> BookmarkResponse:
+    # find the bookmark or throw a 404 if not found
+    user_id: UUID = current_user.id
+    try:
+        bookmark = await get_user_bookmark(
+            bookmark_id=bookmark_id,
+            user_id=user_id,
+            session=session,
+        )
+    except NoResultFound:
+        raise HTTPException(status_code=404, detail="bookmark not found")
+
+    # only file bookmarks have uploaded content
+    if bookmark.type != BookmarkType.file:
+        raise HTTPException(status_code=422, detail="bookmark is not a file bookmark")
+
+    # store the file and point the bookmark at it. the next load extracts its content
+    try:
+        bookmark.url = await save_upload(
+            upload=file, user_id=user_id, bookmark_id=bookmark.id
+        )
+    except FileTooLargeError as error:
+        raise HTTPException(status_code=413, detail=str(error)) from error
+    bookmark.status = BookmarkStatus.created
+    await bump_library_generation(session=session, user_id=user_id)
+    await session.commit()
+
+    # return the updated bookmark
+    await session.refresh(bookmark)
+    return to_bookmark_response(bookmark)
@@ -51,13 +51,118 @@ class Settings(BaseSettings):
     openai_embedding_dim: int = 1536
     openai_embed_max_concurrency: int = 6
     openai_embed_batch_size: int = 64
+    openai_embed_requests_per_minute: int = 3_000
+    openai_embed_tokens_per_minute: int = 1_000_000
+    openai_embed_max_retries: int = 5
     openai_chat_model: str = "gpt-5-mini"
     openai_description_max_concurrency: int = 4
     openai_summary_max_concurrency: int = 1
 
+    # local embedding settings
+    local_embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"
+    local_embedding_dim: int = 384
+    local_embedding_backend: Literal["torch", "onnx"] = "torch"
+    local_embed_max_threads: int = 2
+    local_embed_batch_size: int = 32
+
+    # fake provider settings for offline benchmarks
+    fake_ai_latency_ms: float = 0.0
+
+    # content settings
+    # cap the length of extracted text to store and chunk for each bookmark
+    maximum_content_length: int = 250_000
+
+    # file bookmark settings
+    file_storage_dir: str = str(BASE_DIR / "storage")
+    file_max_bytes: int = 50_000_000
+    file_extract_max_workers: int = 2
+
+    # S3-compatible storage settings for s3:// file bookmark urls
+    s3_endpoint_url: str = ""  # e.g. http://localhost:9000 for MinIO, empty for AWS
+    s3_bucket: str = ""
+    s3_region: str = "us-east-1"
+    s3_access_key_id: str = ""
+    s3_secret_access_key: str = ""
+
+    # chunking settings
+    chunk_max_tokens: int = 400
+    chunk_overlap_tokens: int = 40
+    chunk_min_tokens: int = 50
+    # chunks to embed per request while the rest of the content is still being chunked
+    chunk_embed_batch_size: int = 64
+    chunk_tokenizer: Literal["tiktoken", "estimate"] = "tiktoken"
+    # text-embedding-3 models use cl100k_base
+    chunk_tiktoken_encoding: str = "cl100k_base"
+
+    # vector storage and search settings
+    embedding_storage: Literal["vector", "halfvec"] = "vector"
+    # binary needs the embedding_binary column that make reindex-embeddings adds
+    vector_search_mode: Literal["exact", "binary"] = "exact"
+    # embeddings are stored at unit length, so the inner product ranks like cosine distance
+    # without computing norms. make reindex-embeddings builds the hnsw index for this setting
+    vector_distance: Literal["cosine", "inner_product"] = "cosine"
+    # hamming distance candidates to rerank per exact candidate
+    vector_binary_oversample: int = 4
+    # keep scanning the hnsw index until enough rows pass the user and tag filters. needs pgvector 0.8+
+    vector_iterative_scan: Literal["off", "strict_order", "relaxed_order"] = (
+        "strict_order"
+    )
+
+    # search candidate settings
+    # candidate chunks start at the user's expected size and grow until they cover enough bookmarks
+    search_min_candidates: int = 20
+    search_max_candidates: int = 500
+    search_candidate_growth: float = 2.0
+    search_statistics_max_entries: int = 10_000
+    # center semantic snippets on the sentence closest to the query. embeds the returned
+    # sentences on every search, so it's off unless the embedding calls are cheap
+    search_semantic_snippets: bool = False
+
+    # search rerank settings
+    # best fused results rescored with a local cross-encoder. 0 disables it. requires pip install -e .[local]
+    search_rerank_candidates: int = 0
+    search_rerank_model: str = "cross-encoder/ms-marco-MiniLM-L6-v2"
+    # searches keep the fused order when scoring takes longer than this
+    search_rerank_budget_ms: float = 150.0
+    search_rerank_batch_size: int = 16
+    search_rerank_max_threads: int = 2
+
+    # in-process vector index settings
+    # memory per worker for users' chunk embeddings searched with numpy. 0 searches postgres only
+    vector_index_memory_mb: int = 0
+    # users with more ready chunks than this are searched in postgres
+    vector_index_max_chunks: int = 50_000
+    # float16 halves the memory, but each search converts it back to float32 and runs several times slower
+    vector_index_dtype: Literal["float32", "float16"] = "float32"
+
+    # search result cache settings
+    # search and related responses cached per user and library generation. 0 disables the cache
+    search_cache_max_entries: int = 5_000
+    # optional redis url for results shared by every worker. requires pip install -e .[redis]
+    search_cache_redis_url: str = ""
+    search_cache_shared_seconds: int = 3_600
+
+    # typeahead settings
+    # typeahead libraries of the most recent users held per worker. 0 searches postgres only
+    typeahead_cache_max_users: int = 1_000
+    # users with more bookmarks than this are searched with the postgres trigram indexes
+    typeahead_cache_max_bookmarks: int = 10_000
+
+    # tag count cache settings
+    # seconds a worker serves cached tag counts. writes in the same worker invalidate them immediately.
+    tag_counts_cache_seconds: float = 30.0
+    tag_counts_cache_max_users: int = 10_000
+
     # Fetching concurrency limits
     http_fetch_max_concurrency: int = 20
     playwright_fetch_max_concurrency: int = 2
 
+    @property
+    def embedding_dim(self) -> int:
+        """Returns the embedding vector length stored for the embedding provider."""
+        if self.embedding_provider == "local":
+            return self.local_embedding_dim
+        return self.openai_embedding_dim
+
 
 settings = Settings()
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from bookmemory.core.settings import settings
+
+COSINE_INDEX = "ix_bookmark_chunks_embedding_hnsw_cosine"
+INNER_PRODUCT_INDEX = "ix_bookmark_chunks_embedding_hnsw_ip"
+BINARY_INDEX = "ix_bookmark_chunks_embedding_binary_hnsw_hamming"
+
+logger = logging.getLogger(__name__)
+
+# whether bookmark_chunks has the opt-in binary quantized column, read once per process
+_binary_column_exists: bool | None = None
+
+
+@dataclass(frozen=True)
+class EmbeddingSchema:
+    """Holds the embedding column type and the hnsw index vector search orders by."""
+
+    column_type: str  # e.g. vector(1536) or halfvec(384)
+    index_name: str | None
+    operator_class: str | None
+
+
+def expected_embedding_schema() -> EmbeddingSchema:
+    """Returns the embedding schema the storage, dimension, and distance settings need."""
+    if settings.vector_distance == "inner_product":
+        index_name, distance_ops = INNER_PRODUCT_INDEX, "ip_ops"
+    else:
+        index_name, distance_ops = COSINE_INDEX, "cosine_ops"
+    return EmbeddingSchema(
+        column_type=f"{settings.embedding_storage}({settings.embedding_dim})",
+        index_name=index_name,
+        operator_class=f"{settings.embedding_storage}_{distance_ops}",
+    )
+
+
+async def read_embedding_schema(connection: AsyncConnection) -> EmbeddingSchema:
+    """Returns the embedding column type and valid distance index in the database."""
+    column_type = (
+        await connection.execute(
+            text("""
+                SELECT format_type(atttypid, atttypmod)
+                FROM pg_attribute
+                WHERE attrelid = 'bookmark_chunks'::regclass
+                  AND attname = 'embedding'
+            """)
+        )
+    ).scalar_one()
+
+    # prefer the expected index when a switch left both
+    index_row = (
+        await connection.execute(
+            text("""
+                SELECT index_class.relname AS index_name, pg_opclass.opcname AS operator_class
+                FROM pg_index
+                JOIN pg_class AS index_class ON index_class.oid = pg_index.indexrelid
+                JOIN pg_opclass ON pg_opclass.oid = pg_index.indclass[0]
+                WHERE pg_index.indrelid = 'bookmark_chunks'::regclass
+                  AND pg_index.indisvalid
+                  AND index_class.relname IN (:cosine_index, :inner_product_index)
+                ORDER BY index_class.relname = :expected_index DESC
+                LIMIT 1
+            """),
+            {
+                "cosine_index": COSINE_INDEX,
+                "inner_product_index": INNER_PRODUCT_INDEX,
+                "expected_index": expected_embedding_schema().index_name,
+            },
+        )
+    ).one_or_none()
+    return EmbeddingSchema(
+        column_type=str(column_type),
+        index_name=index_row.index_name if index_row else None,
+        operator_class=index_row.operator_class if index_row else None,
+    )
+
+
+async def read_binary_column(connection: AsyncConnection) -> bool:
+    """Returns whether bookmark_chunks has the binary quantized embedding column."""
+    return bool(
+        (
+            await connection.execute(
+                text("""
+                    SELECT EXISTS (
+                        SELECT 1
+                        FROM pg_attribute
+                        WHERE attrelid = 'bookmark_chunks'::regclass
+                          AND attname = 'embedding_binary'
+                          AND NOT attisdropped
+                    )
+                """)
+            )
+        ).scalar_one()
+    )
+
+
+async def has_binary_column(connection: AsyncConnection) -> bool:
+    """
+    Returns whether bookmark_chunks has the binary quantized embedding column that
+    make reindex-embeddings adds for VECTOR_SEARCH_MODE=binary. Only the first call
+    reads the catalog.
+    """
+    global _binary_column_exists
+    if _binary_column_exists is None:
+        _binary_column_exists = await read_binary_column(connection)
+        if settings.vector_search_mode == "binary" and not _binary_column_exists:
+            logger.warning(
+                "VECTOR_SEARCH_MODE=binary but bookmark_chunks has no embedding_binary "
+                "column, so vector searches skip the prefilter. run make reindex-embeddings"
+            )
+    return _binary_column_exists
+
+
+async def check_embedding_schema(connection: AsyncConnection) -> None:
+    """Raises when the database embeddings don't match the embedding settings."""
+    expected_schema = expected_embedding_schema()
+    schema = await read_embedding_schema(connection)
+    if schema != expected_schema:
+        raise RuntimeError(
+            f"the embedding column and index are {schema} but the settings need "
+            f"{expected_schema}. run make reindex-embeddings"
+        )
+
+    # a missing binary column only turns the prefilter off, so warn instead
+    await has_binary_column(connection)
@@ -1,3 +1,7 @@
+from typing import Any
+
+from pgvector.asyncpg import register_vector
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 
 from bookmemory.core.settings import settings
@@ -5,10 +9,18 @@ from bookmemory.core.settings import settings
 
 def create_engine() -> AsyncEngine:
     """Creates the global async SQLAlchemy engine."""
-    return create_async_engine(
+    async_engine = create_async_engine(
         settings.database_url,
         pool_pre_ping=True,
     )
 
+    # send and receive embeddings in pgvector's binary format instead of text literals.
+    # needs the vector extension, so run the migrations before starting the api
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def register_vector_codec(dbapi_connection: Any, connection_record: Any) -> None:
+        dbapi_connection.run_async(register_vector)
+
+    return async_engine
+
 
 engine = create_engine()
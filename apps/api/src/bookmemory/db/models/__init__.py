@@ -3,6 +3,7 @@ from bookmemory.db.models.user import User
 from bookmemory.db.models.session import Session
 from bookmemory.db.models.bookmark import Bookmark
 from bookmemory.db.models.bookmark_chunk import BookmarkChunk
+from bookmemory.db.models.bookmark_content import BookmarkContent
 from bookmemory.db.models.tag import Tag
 from bookmemory.db.models.bookmark_tag import bookmark_tags
 
@@ -12,6 +13,7 @@ __all__ = [
     "Session",
     "Bookmark",
     "BookmarkChunk",
+    "BookmarkContent",
     "Tag",
     "bookmark_tags",
 ]
@@ -7,10 +7,12 @@ from datetime import datetime
 from typing import TYPE_CHECKING, List, Optional
 
 from sqlalchemy import DateTime, Enum as SAEnum, ForeignKey, Index, String, Text, func
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from sqlalchemy.ext.associationproxy import AssociationProxy, association_proxy
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from bookmemory.db.models.base import Base
+from bookmemory.db.models.bookmark_content import BookmarkContent
 from bookmemory.db.models.bookmark_tag import bookmark_tags
 
 
@@ -76,7 +78,6 @@ class Bookmark(Base):
     )
 
     url: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
-    content: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     summary: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
 
     status: Mapped[BookmarkStatus] = mapped_column(
@@ -104,11 +105,34 @@ class Bookmark(Base):
         onupdate=func.now(),
     )
 
+    # copy of the bookmark_tags ids so search can filter tags with a GIN index before ranking
+    tag_ids: Mapped[List[uuid.UUID]] = mapped_column(
+        ARRAY(UUID(as_uuid=True)),
+        nullable=False,
+        default=list,
+        server_default="{}",
+    )
+
+    # content lives in bookmark_contents. load it with joinedload(Bookmark.bookmark_content)
+    # or write it with save_bookmark_content. an implicit load raises
+    bookmark_content: Mapped[Optional["BookmarkContent"]] = relationship(
+        "BookmarkContent",
+        lazy="raise",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+    content: AssociationProxy[Optional[str]] = association_proxy(
+        "bookmark_content",
+        "content",
+        creator=lambda content: BookmarkContent(content=content),
+    )
+
+    # load tags explicitly with BOOKMARK_TAGS_OPTION. an implicit load raises
     tags: Mapped[List["Tag"]] = relationship(
         "Tag",
         secondary=bookmark_tags,
         back_populates="bookmarks",
-        lazy="selectin",
+        lazy="raise_on_sql",
     )
 
 
@@ -119,3 +143,38 @@ Index(
     unique=True,
     postgresql_where=Bookmark.url.isnot(None),
 )
+
+Index("ix_bookmarks_tag_ids_gin", Bookmark.tag_ids, postgresql_using="gin")
+
+# keyset indexes for the recent and alphabetical bookmark lists
+Index(
+    "ix_bookmarks_user_id_updated_at_id",
+    Bookmark.user_id,
+    Bookmark.updated_at.desc(),
+    Bookmark.id.desc(),
+)
+
+Index(
+    "ix_bookmarks_user_id_lower_title_created_at_id",
+    Bookmark.user_id,
+    func.lower(Bookmark.title),
+    Bookmark.created_at.desc(),
+    Bookmark.id.desc(),
+)
+
+# trigram indexes for typeahead. btree_gin keeps the user filter in the same index
+Index(
+    "ix_bookmarks_user_id_lower_title_trgm",
+    Bookmark.user_id,
+    func.lower(Bookmark.title).label("lower_title"),
+    postgresql_using="gin",
+    postgresql_ops={"lower_title": "gin_trgm_ops"},
+)
+
+Index(
+    "ix_bookmarks_user_id_lower_url_trgm",
+    Bookmark.user_id,
+    func.lower(Bookmark.url).label("lower_url"),
+    postgresql_using="gin",
+    postgresql_ops={"lower_url": "gin_trgm_ops"},
+)
@@ -1,16 +1,64 @@
 from __future__ import annotations
 
 import uuid
-from typing import Optional
+from typing import Any, Optional, cast
 
-from sqlalchemy import ForeignKey, Index, Integer, Text
+import numpy as np
+from numpy.typing import NDArray
+from sqlalchemy import Dialect, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
-from pgvector.sqlalchemy import Vector
+from pgvector.sqlalchemy import HALFVEC, Vector
 
+from bookmemory.core.settings import settings
 from bookmemory.db.models.base import Base
 
+# text-embedding-3 models can shorten embeddings (e.g. 256 or 512) to shrink the HNSW index
+# run make reindex-embeddings after changing the dimension
+EMBEDDING_DIM = settings.embedding_dim
+
+
+class _BinaryEmbedding:
+    """
+    Binds embeddings as numpy arrays and returns float32 numpy arrays, leaving the
+    conversion to the binary asyncpg codec registered on the engine.
+    """
+
+    def bind_processor(self, dialect: Dialect) -> Any:
+        def process(value: Any) -> Any:
+            if value is None:
+                return None
+            return np.asarray(value, dtype=np.float32)
+
+        return process
+
+    def result_processor(self, dialect: Dialect, coltype: Any) -> Any:
+        def process(value: Any) -> NDArray[np.float32] | None:
+            if value is None:
+                return None
+            return cast(
+                NDArray[np.float32], value.to_numpy().astype(np.float32, copy=False)
+            )
+
+        return process
+
+
+class BinaryVector(_BinaryEmbedding, Vector):
+    cache_ok = True
+
+
+class BinaryHalfVector(_BinaryEmbedding, HALFVEC):
+    cache_ok = True
+
+
+def embedding_type() -> Any:
+    """Returns the column type used to store chunk embeddings."""
+    # halfvec stores 2 bytes per dimension instead of 4 and halves the HNSW index size
+    if settings.embedding_storage == "halfvec":
+        return BinaryHalfVector(EMBEDDING_DIM)
+    return BinaryVector(EMBEDDING_DIM)
+
 
 class BookmarkChunk(Base):
     __tablename__ = "bookmark_chunks"
@@ -33,12 +81,18 @@ class BookmarkChunk(Base):
     # raw text content of the chunk produced during extraction
     text: Mapped[str] = mapped_column(Text, nullable=False)
 
-    # vector embedding generated asynchronously with OpenAI text-embedding-3-small
-    embedding: Mapped[Optional[list[float]]] = mapped_column(
-        Vector(1536),  # text-embedding-3-small vector length
+    # sha256 of the chunk text used to keep unchanged embeddings when a bookmark is reloaded
+    text_hash: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+
+    # vector embedding generated asynchronously with the embedding provider
+    embedding: Mapped[Optional[NDArray[np.float32]]] = mapped_column(
+        embedding_type(),
         nullable=True,
     )
 
+    # make reindex-embeddings adds a generated embedding_binary bit column for
+    # VECTOR_SEARCH_MODE=binary. it isn't mapped, so chunks load and save without it
+
 
 Index(
     "ix_bookmark_chunks_bookmark_id_chunk_index_unique",
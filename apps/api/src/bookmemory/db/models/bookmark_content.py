@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Text, func
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from bookmemory.db.models.base import Base
+
+
+class BookmarkContent(Base):
+    """Holds the extracted content of a bookmark apart from the bookmarks table."""
+
+    __tablename__ = "bookmark_contents"
+
+    # delete the content when its bookmark is deleted
+    bookmark_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("bookmarks.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+
+    # up to MAXIMUM_CONTENT_LENGTH characters. the migration sets lz4 toast compression
+    content: Mapped[str] = mapped_column(Text, nullable=False)
+
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from sqlalchemy import Column, DateTime, ForeignKey, Table, func
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Table, func
 from sqlalchemy.dialects.postgresql import UUID
 
 from bookmemory.db.models.base import Base
@@ -36,3 +36,10 @@ bookmark_tags = Table(
         nullable=False,
     ),
 )
+
+# finds the bookmarks for a tag. the primary key only covers (bookmark_id, tag_id)
+Index(
+    "ix_bookmark_tags_tag_id_bookmark_id",
+    bookmark_tags.c.tag_id,
+    bookmark_tags.c.bookmark_id,
+)
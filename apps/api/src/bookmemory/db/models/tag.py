@@ -4,7 +4,7 @@ import uuid
 from datetime import datetime
 from typing import TYPE_CHECKING, List
 
-from sqlalchemy import DateTime, ForeignKey, Index, String, func
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -34,6 +34,11 @@ class Tag(Base):
 
     name: Mapped[str] = mapped_column(String(64), nullable=False)
 
+    # maintained when bookmarks are created, retagged, or deleted so tag lists skip the join
+    bookmark_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         nullable=False,
@@ -48,12 +53,25 @@ class Tag(Base):
         onupdate=func.now(),
     )
 
+    # never loaded. a popular tag would load every bookmark that shares it
     bookmarks: Mapped[List["Bookmark"]] = relationship(
         "Bookmark",
         secondary=bookmark_tags,
         back_populates="tags",
-        lazy="selectin",
+        lazy="raise",
     )
 
 
 Index("ix_tags_user_id_name_unique", Tag.user_id, Tag.name, unique=True)
+
+# reads a user's tag list in display order
+Index("ix_tags_user_id_lower_name", Tag.user_id, func.lower(Tag.name))
+
+# finds the tags typeahead matches by name
+Index(
+    "ix_tags_user_id_lower_name_trgm",
+    Tag.user_id,
+    func.lower(Tag.name).label("lower_name"),
+    postgresql_using="gin",
+    postgresql_ops={"lower_name": "gin_trgm_ops"},
+)
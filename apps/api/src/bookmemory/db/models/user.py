@@ -4,7 +4,7 @@ import uuid
 from datetime import datetime
 from typing import Any
 
-from sqlalchemy import DateTime, String, UniqueConstraint, func
+from sqlalchemy import BigInteger, DateTime, String, UniqueConstraint, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -35,6 +35,11 @@ class User(Base):
         nullable=False,
     )
 
+    # bumped by every change to the user's bookmarks so cached search results go stale
+    library_generation: Mapped[int] = mapped_column(
+        BigInteger, nullable=False, server_default="0"
+    )
+
     __table_args__ = (UniqueConstraint("auth_provider", "auth_subject"),)
 
     def _to_user_dict(self) -> dict[str, Any]:
@@ -0,0 +1,300 @@
+"""
+Rebuilds the chunk embedding column and hnsw indexes for the current EMBEDDING_STORAGE,
+embedding dimension, VECTOR_DISTANCE, and VECTOR_SEARCH_MODE settings, then embeds every
+chunk left without an embedding. Safe to re-run: each step skips work that is already done.
+
+    python -m bookmemory.db.reindex_embeddings
+    python -m bookmemory.db.reindex_embeddings --reembed  # after switching embedding models
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import re
+from uuid import UUID
+
+from sqlalchemy import select, text, update
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from bookmemory.core.settings import settings
+from bookmemory.db.embedding_schema import (
+    BINARY_INDEX,
+    COSINE_INDEX,
+    INNER_PRODUCT_INDEX,
+    expected_embedding_schema,
+    read_binary_column,
+    read_embedding_schema,
+)
+from bookmemory.db.engine import engine
+from bookmemory.db.models.bookmark import Bookmark
+from bookmemory.db.models.bookmark_chunk import BookmarkChunk
+from bookmemory.db.models.user import User
+from bookmemory.db.session import async_session_factory
+from bookmemory.services.embedding.chunk_embed import embed_chunks
+
+# chunks normalized per transaction so the update never holds locks for long
+NORMALIZE_BATCH_SIZE = 500
+
+# halfvec keeps about 3 significant digits, so a normalized halfvec norm is only close to 1
+NORM_TOLERANCE = 0.001
+
+
+def _parse_column_type(column_type: str) -> tuple[str, int]:
+    """Returns the vector type and dimension of a column type, e.g. ("vector", 1536)."""
+    match = re.fullmatch(r"(\w+)\((\d+)\)", column_type)
+    if match is None:
+        raise RuntimeError(f"unexpected embedding column type: {column_type}")
+    return match.group(1), int(match.group(2))
+
+
+async def _convert_embedding_column(
+    connection: AsyncConnection, *, current_type: str, reembed: bool
+) -> None:
+    """
+    Converts the embedding column to the configured type and dimension, discarding the
+    embeddings that can't be converted.
+    """
+    vector_type, dim = _parse_column_type(expected_embedding_schema().column_type)
+    current_vector_type, current_dim = _parse_column_type(current_type)
+    if (vector_type, dim) == (current_vector_type, current_dim) and not reembed:
+        return
+
+    # the indexes and the generated binary column depend on the embedding column type
+    for index_name in (BINARY_INDEX, COSINE_INDEX, INNER_PRODUCT_INDEX):
+        await connection.execute(
+            text(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}")
+        )
+    await connection.execute(
+        text("ALTER TABLE bookmark_chunks DROP COLUMN IF EXISTS embedding_binary")
+    )
+
+    # rewriting the column locks bookmark_chunks until it's done
+    if reembed or dim > current_dim:
+        # other models' embeddings aren't comparable and longer embeddings can't be
+        # derived from shorter ones, so the chunks are embedded again
+        using = "NULL"
+    elif dim < current_dim:
+        # text-embedding-3 embeddings are trained so that a truncated and renormalized
+        # prefix matches the shortened embedding returned by the API
+        using = f"l2_normalize(subvector(embedding, 1, {dim}))::{vector_type}({dim})"
+    else:
+        using = f"embedding::{vector_type}({dim})"
+    print(f"converting embeddings from {current_type} to {vector_type}({dim})")
+    await connection.execute(
+        text(f"""
+            ALTER TABLE bookmark_chunks
+            ALTER COLUMN embedding TYPE {vector_type}({dim})
+            USING {using}
+        """)
+    )
+
+
+async def _normalize_embeddings(connection: AsyncConnection) -> None:
+    """Rewrites the embeddings that aren't unit length in id order, one batch at a time."""
+    last_chunk_id = "00000000-0000-0000-0000-000000000000"
+    while True:
+        chunk_ids = list(
+            (
+                await connection.execute(
+                    text("""
+                        SELECT id
+                        FROM bookmark_chunks
+                        WHERE embedding IS NOT NULL AND id > CAST(:last_chunk_id AS uuid)
+                        ORDER BY id
+                        LIMIT :batch_size
+                    """),
+                    {
+                        "last_chunk_id": last_chunk_id,
+                        "batch_size": NORMALIZE_BATCH_SIZE,
+                    },
+                )
+            ).scalars()
+        )
+        if not chunk_ids:
+            return
+
+        await connection.execute(
+            text("""
+                UPDATE bookmark_chunks
+                SET embedding = l2_normalize(embedding)
+                WHERE id = ANY(:chunk_ids)
+                  AND embedding IS NOT NULL
+                  AND abs(vector_norm(embedding::vector) - 1) > :norm_tolerance
+            """),
+            {"chunk_ids": chunk_ids, "norm_tolerance": NORM_TOLERANCE},
+        )
+        last_chunk_id = str(chunk_ids[-1])
+
+
+async def _build_indexes(connection: AsyncConnection) -> None:
+    """Builds the configured distance index without blocking writes."""
+    expected_schema = expected_embedding_schema()
+    schema = await read_embedding_schema(connection)
+    if schema != expected_schema:
+        # a failed or stale build leaves an index with the wrong operator class to drop first
+        if schema.index_name is not None:
+            await connection.execute(
+                text(f"DROP INDEX CONCURRENTLY IF EXISTS {schema.index_name}")
+            )
+        await connection.execute(
+            text(f"DROP INDEX CONCURRENTLY IF EXISTS {expected_schema.index_name}")
+        )
+        print(f"building {expected_schema.index_name}")
+        await connection.execute(
+            text(f"""
+                CREATE INDEX CONCURRENTLY {expected_schema.index_name}
+                ON bookmark_chunks
+                USING hnsw (embedding {expected_schema.operator_class})
+                WHERE embedding IS NOT NULL
+            """)
+        )
+
+    # keep only the index the configured distance orders by
+    other_index = (
+        COSINE_INDEX
+        if expected_schema.index_name == INNER_PRODUCT_INDEX
+        else INNER_PRODUCT_INDEX
+    )
+    await connection.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {other_index}"))
+
+
+async def _sync_binary_column(connection: AsyncConnection) -> None:
+    """
+    Adds the binary quantized column and its hamming index for VECTOR_SEARCH_MODE=binary,
+    and drops them otherwise.
+    """
+    if settings.vector_search_mode != "binary":
+        await connection.execute(
+            text(f"DROP INDEX CONCURRENTLY IF EXISTS {BINARY_INDEX}")
+        )
+        await connection.execute(
+            text("ALTER TABLE bookmark_chunks DROP COLUMN IF EXISTS embedding_binary")
+        )
+        return
+
+    # adding a stored generated column rewrites bookmark_chunks and locks it until it's done
+    if not await read_binary_column(connection):
+        _, dim = _parse_column_type(expected_embedding_schema().column_type)
+        print("adding embedding_binary")
+        await connection.execute(
+            text(f"""
+                ALTER TABLE bookmark_chunks
+                ADD COLUMN embedding_binary bit({dim})
+                GENERATED ALWAYS AS (binary_quantize(embedding)::bit({dim})) STORED
+            """)
+        )
+    await connection.execute(
+        text(f"""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS {BINARY_INDEX}
+            ON bookmark_chunks
+            USING hnsw (embedding_binary bit_hamming_ops)
+            WHERE embedding_binary IS NOT NULL
+        """)
+    )
+
+
+async def _embed_missing_chunks() -> int:
+    """Embeds every chunk without an embedding from its stored text. Returns how many it embedded."""
+    embedded_count = 0
+    last_chunk_id = UUID(int=0)
+    while True:
+        async with async_session_factory() as session:
+            select_chunks_statement = (
+                select(BookmarkChunk)
+                .where(
+                    BookmarkChunk.embedding.is_(None),
+                    BookmarkChunk.id > last_chunk_id,
+                )
+                .order_by(BookmarkChunk.id)
+                .limit(max(1, settings.chunk_embed_batch_size))
+            )
+            bookmark_chunks = list(
+                (await session.scalars(select_chunks_statement)).all()
+            )
+            if not bookmark_chunks:
+                return embedded_count
+
+            vectors = await embed_chunks(
+                [bookmark_chunk.text for bookmark_chunk in bookmark_chunks]
+            )
+            for bookmark_chunk, vector in zip(bookmark_chunks, vectors):
+                bookmark_chunk.embedding = vector
+            await session.commit()
+            embedded_count += len(bookmark_chunks)
+            last_chunk_id = bookmark_chunks[-1].id
+            print(f"embedded {len(bookmark_chunks)} chunks")
+
+
+async def _finish_reindex(*, embeddings_changed: bool) -> None:
+    """
+    Invalidates the search results cached before the embeddings changed and lists the
+    bookmarks still missing embeddings.
+    """
+    async with async_session_factory() as session:
+        # embeddings changed, so results cached for the previous generation are stale
+        if embeddings_changed:
+            await session.execute(
+                update(User)
+                .values(library_generation=User.library_generation + 1)
+                .execution_options(synchronize_session=False)
+            )
+        await session.commit()
+
+        unembedded_bookmarks = (
+            await session.execute(
+                select(Bookmark.id, Bookmark.title)
+                .where(
+                    select(BookmarkChunk.id)
+                    .where(
+                        BookmarkChunk.bookmark_id == Bookmark.id,
+                        BookmarkChunk.embedding.is_(None),
+                    )
+                    .exists()
+                )
+                .order_by(Bookmark.id)
+            )
+        ).all()
+    for bookmark_id, title in unembedded_bookmarks:
+        print(f"still missing embeddings: {bookmark_id} {title}")
+
+
+async def run(args: argparse.Namespace) -> None:
+    try:
+        async with engine.connect() as connection:
+            # concurrent index builds can't run inside a transaction
+            connection = await connection.execution_options(
+                isolation_level="AUTOCOMMIT"
+            )
+            schema = await read_embedding_schema(connection)
+            await _convert_embedding_column(
+                connection, current_type=schema.column_type, reembed=args.reembed
+            )
+            await _normalize_embeddings(connection)
+            await _build_indexes(connection)
+            await _sync_binary_column(connection)
+
+        # embed the chunks this run discarded and any an earlier resize left behind
+        embedded_count = await _embed_missing_chunks()
+        await _finish_reindex(
+            embeddings_changed=embedded_count > 0
+            or args.reembed
+            or schema != expected_embedding_schema(),
+        )
+        print(f"embeddings match {expected_embedding_schema()}")
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--reembed",
+        action="store_true",
+        help="discard every embedding and embed the chunks again with the current model",
+    )
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
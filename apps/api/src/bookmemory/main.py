@@ -8,6 +8,8 @@ from starlette.middleware.sessions import SessionMiddleware
 
 from bookmemory.api.v1.router import router as v1_router
 from bookmemory.core.settings import settings
+from bookmemory.db.embedding_schema import check_embedding_schema
+from bookmemory.db.engine import engine
 from bookmemory.services.extraction.playwright_runtime import (
     start_playwright_runtime,
     stop_playwright_runtime,
@@ -16,6 +18,22 @@ from bookmemory.services.extraction.playwright_runtime import (
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # load the local models up front so the first search doesn't wait for them
+    if settings.embedding_provider == "local":
+        from bookmemory.services.ai.local.embed_chunks import (
+            load_local_embedding_model,
+        )
+
+        await load_local_embedding_model()
+    if settings.search_rerank_candidates > 0:
+        from bookmemory.services.search.rerank import load_rerank_model
+
+        await load_rerank_model()
+
+    # refuse to start when the embedding settings changed without make reindex-embeddings
+    async with engine.connect() as connection:
+        await check_embedding_schema(connection)
+
     # start and stop the Playwright runtime during app lifespan
     await start_playwright_runtime()
     try:
@@ -11,6 +11,9 @@ from bookmemory.db.models.bookmark import Bookmark
 # shared tag filtering mode for bookmark queries
 TagMode: TypeAlias = Literal["any", "all", "ignore"]
 
+# shared sort order for bookmark lists
+BookmarkSort: TypeAlias = Literal["alphabetical", "recent"]
+
 
 def to_bookmark_response(bookmark: Bookmark) -> BookmarkResponse:
     return BookmarkResponse(
@@ -70,15 +73,34 @@ class BookmarkResponse(BaseModel):
     tags: List[TagResponse]
 
 
+class BookmarkCursorPage(BaseModel):
+    items: List[BookmarkResponse]
+    next_cursor: str | None = None  # pass back as cursor to get the next page
+    total: int | None = None  # only when include_total is set
+
+
+class HighlightResponse(BaseModel):
+    start: int  # character offsets of matching text in the snippet
+    end: int
+
+
 class BookmarkSearchResponse(BookmarkResponse):
     search_mode: Literal["search", "related"]
     snippet: str | None = None
+    highlights: List[HighlightResponse] = Field(default_factory=list)
     score: float | None = None  # only for semantic
     chunk_id: UUID | None = (
         None  # optional for debugging: the chunk embedding that matched a semantic query
     )
 
 
+class BookmarkTypeaheadResponse(BaseModel):
+    id: UUID
+    title: str
+    url: Optional[str]
+    type: str
+
+
 class BookmarkPreviewRequest(BaseModel):
     type: str = Field(default="link")
     url: str
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import hashlib
+import re
+from typing import AsyncIterator
+
+import anyio
+import numpy as np
+
+from bookmemory.core.settings import settings
+from bookmemory.db.models.bookmark import Bookmark, PreviewMethod
+from bookmemory.services.ai.providers import EmbeddingArray
+
+# split text into lowercase word tokens for the hashed embeddings
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# split content into sentences for the canned descriptions and summaries
+_SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+")
+
+MAXIMUM_DESCRIPTION_SENTENCES = 3
+
+
+async def _simulate_latency() -> None:
+    """Sleeps for the configured fake provider latency."""
+    if settings.fake_ai_latency_ms > 0:
+        await anyio.sleep(settings.fake_ai_latency_ms / 1000.0)
+
+
+def _hash_embedding(text: str, dim: int) -> EmbeddingArray:
+    """
+    Returns a normalized pseudo-embedding with one hashed dimension per word.
+    Texts that share words point in similar directions, so semantic search still ranks sensibly.
+    """
+    vector = np.zeros(dim, dtype=np.float32)
+    tokens = _TOKEN_PATTERN.findall(text.lower()) or [text]
+    for token in tokens:
+        digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+        index = int.from_bytes(digest[:4], "little") % dim
+        sign = 1.0 if digest[4] & 1 else -1.0
+        vector[index] += sign
+
+    norm = float(np.linalg.norm(vector)) or 1.0
+    return vector / np.float32(norm)
+
+
+def _first_sentences(text: str, count: int) -> str:
+    """Returns the first sentences of the text."""
+    sentences = [
+        sentence.strip() for sentence in _SENTENCE_PATTERN.split(text) if sentence
+    ]
+    return " ".join(sentences[:count])
+
+
+class FakeProvider:
+    """Implements the AIProvider interface with deterministic offline responses."""
+
+    async def embed_chunks(
+        self, chunks: list[str], *, interactive: bool = False
+    ) -> EmbeddingArray:
+        await _simulate_latency()
+        vectors = np.empty((len(chunks), settings.embedding_dim), dtype=np.float32)
+        for chunk_index, chunk in enumerate(chunks):
+            vectors[chunk_index] = _hash_embedding(chunk, settings.embedding_dim)
+        return vectors
+
+    async def generate_description(
+        self, *, bookmark: Bookmark
+    ) -> tuple[str, PreviewMethod]:
+        await _simulate_latency()
+        content = (bookmark.content or "").strip()
+        description = _first_sentences(content, MAXIMUM_DESCRIPTION_SENTENCES)
+        return description or bookmark.title, PreviewMethod.content
+
+    async def stream_summary(self, *, bookmark: Bookmark) -> AsyncIterator[str]:
+        # stream a canned summary one sentence at a time
+        content = (bookmark.content or bookmark.description or "").strip()
+        sentences = [f"Summary of {bookmark.title}."]
+        sentences.extend(_SENTENCE_PATTERN.split(_first_sentences(content, 5)))
+        for sentence in sentences:
+            if sentence:
+                await _simulate_latency()
+                yield f"{sentence} "
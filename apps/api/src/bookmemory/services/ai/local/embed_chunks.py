@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import anyio
+import numpy as np
+
+from bookmemory.core.settings import settings
+from bookmemory.services.ai.local.model import get_local_embedding_model
+from bookmemory.services.ai.providers import EmbeddingArray
+
+# inference is cpu bound and releases the GIL, so run it in worker threads.
+# limit concurrent batches so embedding doesn't starve the event loop's thread pool.
+_EMBED_LIMITER = anyio.CapacityLimiter(settings.local_embed_max_threads)
+
+
+def _encode(chunks: list[str]) -> EmbeddingArray:
+    """Returns normalized embedding vectors for the text chunks. Blocks the calling thread."""
+    model = get_local_embedding_model()
+    vectors = model.encode(
+        chunks,
+        batch_size=max(1, settings.local_embed_batch_size),
+        normalize_embeddings=True,
+        convert_to_numpy=True,
+        show_progress_bar=False,
+    )
+    return np.asarray(vectors, dtype=np.float32)
+
+
+async def embed_chunks(chunks: list[str]) -> EmbeddingArray:
+    """Returns the embedding vectors for the text chunks, one per row."""
+    if not chunks:
+        return np.empty((0, settings.embedding_dim), dtype=np.float32)
+
+    # the model batches the chunks internally, so send them in a single call
+    return await anyio.to_thread.run_sync(_encode, chunks, limiter=_EMBED_LIMITER)
+
+
+async def load_local_embedding_model() -> None:
+    """Loads the embedding model ahead of the first request."""
+    await anyio.to_thread.run_sync(get_local_embedding_model, limiter=_EMBED_LIMITER)
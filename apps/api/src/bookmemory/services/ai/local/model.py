@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import threading
+from typing import Any
+
+from bookmemory.core.settings import settings
+
+_model: Any = None
+_model_lock = threading.Lock()
+
+
+def get_local_embedding_model() -> Any:
+    """Returns a singleton sentence transformer model loaded on the CPU."""
+    # the model is loaded from a worker thread so use a thread lock to load it once
+    global _model
+    with _model_lock:
+        if _model is None:
+            try:
+                from sentence_transformers import SentenceTransformer
+            except ImportError as error:
+                raise RuntimeError(
+                    "sentence-transformers is not installed. install bookmemory-api[local]"
+                ) from error
+
+            _model = SentenceTransformer(
+                settings.local_embedding_model,
+                device="cpu",
+                backend=settings.local_embedding_backend,
+            )
+        return _model
+
+
+_rerank_model: Any = None
+_rerank_model_lock = threading.Lock()
+
+
+def get_local_rerank_model() -> Any:
+    """Returns a singleton cross-encoder model loaded on the CPU."""
+    global _rerank_model
+    with _rerank_model_lock:
+        if _rerank_model is None:
+            try:
+                from sentence_transformers import CrossEncoder
+            except ImportError as error:
+                raise RuntimeError(
+                    "sentence-transformers is not installed. install bookmemory-api[local]"
+                ) from error
+
+            _rerank_model = CrossEncoder(settings.search_rerank_model, device="cpu")
+        return _rerank_model
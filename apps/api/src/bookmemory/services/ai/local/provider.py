@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from typing import AsyncIterator
+
+from bookmemory.db.models.bookmark import Bookmark, PreviewMethod
+from bookmemory.services.ai.providers import EmbeddingArray
+
+from .embed_chunks import embed_chunks as _embed_chunks
+
+
+class LocalProvider:
+    """Implements the AIProvider interface with a local CPU embedding model."""
+
+    async def embed_chunks(
+        self, chunks: list[str], *, interactive: bool = False
+    ) -> EmbeddingArray:
+        return await _embed_chunks(chunks)
+
+    async def generate_description(
+        self, *, bookmark: Bookmark
+    ) -> tuple[str, PreviewMethod]:
+        raise RuntimeError("The local provider only supports embeddings")
+
+    def stream_summary(self, *, bookmark: Bookmark) -> AsyncIterator[str]:
+        raise RuntimeError("The local provider only supports embeddings")
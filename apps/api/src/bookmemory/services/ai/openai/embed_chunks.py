@@ -1,13 +1,34 @@
 from __future__ import annotations
 
+import base64
+from typing import cast
+
 import anyio
+import numpy as np
+from openai import (
+    APIConnectionError,
+    APIStatusError,
+    InternalServerError,
+    RateLimitError,
+    omit,
+)
+from openai.types import CreateEmbeddingResponse
 
 from bookmemory.core.settings import settings
 from bookmemory.services.ai.openai.client import get_openai_client
+from bookmemory.services.ai.providers import EmbeddingArray
+from bookmemory.services.ai.rate_limit import RateLimitScheduler, backoff_seconds
+from bookmemory.services.extraction.tokenize import get_token_counter
 
 # embedding requests are relatively fast but can still hit provider rate limits. limit concurrent requests.
 _EMBED_LIMITER = anyio.CapacityLimiter(settings.openai_embed_max_concurrency)
 
+# keep embedding requests within the account's requests and tokens per minute quota
+_EMBED_SCHEDULER = RateLimitScheduler(
+    requests_per_minute=settings.openai_embed_requests_per_minute,
+    tokens_per_minute=settings.openai_embed_tokens_per_minute,
+)
+
 
 def _batch_chunks(chunks: list[str], batch_size: int) -> list[list[str]]:
     """Groups chunks together into batches to send to the AI API client with one request."""
@@ -19,25 +40,117 @@ def _batch_chunks(chunks: list[str], batch_size: int) -> list[list[str]]:
     return batches
 
 
-async def embed_chunks(chunks: list[str]) -> list[list[float]]:
-    """Returns a list of embedding vectors for the text chunks."""
+def _supports_dimensions(model: str) -> bool:
+    """Returns True if the embedding model can return shortened embeddings."""
+    return model.startswith("text-embedding-3")
+
+
+def _count_batch_tokens(batch: list[str]) -> int:
+    """
+    Returns the token count of a batch of chunks with the tokenizer that sized them.
+    Blocks the calling thread.
+    """
+    count_tokens = get_token_counter()
+    return sum(max(1, count_tokens(chunk)) for chunk in batch)
+
+
+def _retry_after_seconds(error: APIStatusError) -> float | None:
+    """Returns the retry delay requested by the provider, if any."""
+    headers = error.response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000.0
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:
+        # ignore http date values and fall back to backoff
+        pass
+    return None
+
+
+async def _create_embeddings(
+    batch: list[str], *, interactive: bool
+) -> CreateEmbeddingResponse:
+    """Returns the embeddings response for a batch, retrying rate limits and transient errors."""
+    # request shortened embeddings from models that support them.
+    # shortened text-embedding-3 vectors are truncated and renormalized by the API
+    model = settings.openai_embedding_model
+    dimensions = settings.openai_embedding_dim if _supports_dimensions(model) else omit
+
+    # retries are handled here so that they also respect the shared rate limit budgets
+    client = get_openai_client().with_options(max_retries=0)
+    # reserve the batch's tokenizer count, so the token budget matches the provider's usage.
+    # the first call may load the tiktoken encoding
+    estimated_tokens = await anyio.to_thread.run_sync(_count_batch_tokens, batch)
+    attempt = 0
+    while True:
+        await _EMBED_SCHEDULER.acquire(tokens=estimated_tokens, interactive=interactive)
+        try:
+            api_response = await client.embeddings.create(
+                model=model,
+                input=batch,
+                dimensions=dimensions,
+                encoding_format="base64",
+            )
+        except (RateLimitError, InternalServerError, APIConnectionError) as error:
+            # every attempt reserves a request, since retries count against the requests
+            # per minute quota. a failed attempt uses no tokens, so its tokens are refunded
+            # instead of reserving the whole batch again on each retry
+            _EMBED_SCHEDULER.refund(tokens=estimated_tokens)
+
+            # an exhausted quota won't recover by retrying
+            if isinstance(error, RateLimitError) and error.code == "insufficient_quota":
+                raise
+            if attempt >= settings.openai_embed_max_retries:
+                raise
+
+            # honor the provider's retry delay for every request sharing the budget
+            delay_seconds = backoff_seconds(attempt)
+            if isinstance(error, APIStatusError):
+                retry_after = _retry_after_seconds(error)
+                if retry_after is not None:
+                    _EMBED_SCHEDULER.pause(retry_after)
+                    delay_seconds = max(delay_seconds, retry_after)
+            attempt += 1
+            await anyio.sleep(delay_seconds)
+            continue
+
+        _EMBED_SCHEDULER.record_usage(
+            estimated_tokens=estimated_tokens,
+            actual_tokens=api_response.usage.total_tokens,
+        )
+        return api_response
+
+
+def _decode_embedding(encoded: str) -> EmbeddingArray:
+    """Returns the vector of a base64 embedding of little-endian float32 values."""
+    return np.frombuffer(base64.b64decode(encoded), dtype="<f4")
+
+
+async def embed_chunks(
+    chunks: list[str], *, interactive: bool = False
+) -> EmbeddingArray:
+    """Returns the embedding vectors for the text chunks, one per row."""
     # batch chunks together so that multiple embeddings can be made with a single api request
     # but be conservative with the batch size to avoid making the request too slow
     batch_size = max(1, settings.openai_embed_batch_size)
 
     # embed chunks into vectors
-    client = get_openai_client()
-    vectors: list[list[float]] = []
-    async with _EMBED_LIMITER:
-        for batch in _batch_chunks(chunks, batch_size=batch_size):
-            api_response = await client.embeddings.create(
-                model=settings.openai_embedding_model,
-                input=batch,
-            )
+    vectors: list[EmbeddingArray] = []
+    for batch in _batch_chunks(chunks, batch_size=batch_size):
+        # interactive search queries skip the concurrency limit so they don't queue behind bulk loads
+        if interactive:
+            api_response = await _create_embeddings(batch, interactive=True)
+        else:
+            async with _EMBED_LIMITER:
+                api_response = await _create_embeddings(batch, interactive=False)
 
-            # preserve the original order
-            api_response.data.sort(key=lambda datum: datum.index)
-            for item in api_response.data:
-                vectors.append(item.embedding)
+        # preserve the original order. base64 embeddings are 4 bytes per value
+        # instead of a json float, and decode without parsing every number
+        api_response.data.sort(key=lambda datum: datum.index)
+        for item in api_response.data:
+            vectors.append(_decode_embedding(cast(str, item.embedding)))
 
-    return vectors
+    if not vectors:
+        return np.empty((0, settings.embedding_dim), dtype=np.float32)
+    return np.stack(vectors).astype(np.float32, copy=False)
@@ -6,6 +6,7 @@ from bookmemory.db.models.bookmark import (
     Bookmark,
     PreviewMethod,
 )  # or wherever it lives
+from bookmemory.services.ai.providers import EmbeddingArray
 
 from .embed_chunks import embed_chunks as _embed_chunks
 from .generate_description import generate_description as _generate_description
@@ -15,8 +16,10 @@ from .stream_summary import stream_summary as _stream_summary
 class OpenAIProvider:
     """Implements the AIProvider interface using OpenAI."""
 
-    async def embed_chunks(self, chunks: list[str]) -> list[list[float]]:
-        return await _embed_chunks(chunks)
+    async def embed_chunks(
+        self, chunks: list[str], *, interactive: bool = False
+    ) -> EmbeddingArray:
+        return await _embed_chunks(chunks, interactive=interactive)
 
     async def generate_description(
         self, *, bookmark: Bookmark
@@ -1,14 +1,24 @@
 from __future__ import annotations
 
-from typing import Protocol, AsyncIterator, Literal
+from typing import TYPE_CHECKING, Protocol, AsyncIterator, Literal, TypeAlias
 
-from bookmemory.db.models.bookmark import Bookmark, PreviewMethod
+import numpy as np
+from numpy.typing import NDArray
 
-AIProviderType = Literal["openai"]
+# imported for type checking only since the settings import this module before the models
+if TYPE_CHECKING:
+    from bookmemory.db.models.bookmark import Bookmark, PreviewMethod
+
+AIProviderType = Literal["openai", "local", "fake"]
+
+# float32 embeddings, a single vector or one vector per row
+EmbeddingArray: TypeAlias = NDArray[np.float32]
 
 
 class AIProvider(Protocol):
-    async def embed_chunks(self, chunks: list[str]) -> list[list[float]]: ...
+    async def embed_chunks(
+        self, chunks: list[str], *, interactive: bool = False
+    ) -> EmbeddingArray: ...
     async def generate_description(
         self, *, bookmark: Bookmark
     ) -> tuple[str, PreviewMethod]: ...
@@ -32,4 +42,18 @@ def get_ai_provider(provider_type: AIProviderType) -> AIProvider:
         _providers[provider_type] = provider
         return provider
 
+    if provider_type == "local":
+        from bookmemory.services.ai.local.provider import LocalProvider
+
+        local_provider = LocalProvider()
+        _providers[provider_type] = local_provider
+        return local_provider
+
+    if provider_type == "fake":
+        from bookmemory.services.ai.fake.provider import FakeProvider
+
+        fake_provider = FakeProvider()
+        _providers[provider_type] = fake_provider
+        return fake_provider
+
     raise ValueError(f"Unsupported AI provider: {provider_type}")
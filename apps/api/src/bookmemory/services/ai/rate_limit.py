@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import random
+import time
+
+import anyio
+
+# how often background requests check whether interactive requests are still waiting
+BACKGROUND_YIELD_SECONDS = 0.05
+
+
+class TokenBucket:
+    """Holds a budget that refills continuously up to its per-minute capacity."""
+
+    def __init__(self, *, per_minute: int) -> None:
+        self.capacity = float(max(1, per_minute))
+        self.available = self.capacity
+        self._refill_per_second = self.capacity / 60.0
+        self._refilled_at = time.monotonic()
+
+    def refill(self) -> None:
+        now = time.monotonic()
+        self.available = min(
+            self.capacity,
+            self.available + (now - self._refilled_at) * self._refill_per_second,
+        )
+        self._refilled_at = now
+
+    def seconds_until(self, amount: float) -> float:
+        """Returns how long to wait until the amount is available."""
+        missing = min(amount, self.capacity) - self.available
+        if missing <= 0:
+            return 0.0
+        return missing / self._refill_per_second
+
+
+class RateLimitScheduler:
+    """
+    Enforces requests per minute and tokens per minute budgets for an AI provider.
+    Interactive requests are admitted before background requests.
+    """
+
+    def __init__(self, *, requests_per_minute: int, tokens_per_minute: int) -> None:
+        self._requests = TokenBucket(per_minute=requests_per_minute)
+        self._tokens = TokenBucket(per_minute=tokens_per_minute)
+        self._paused_until = 0.0
+        self._interactive_waiting = 0
+
+    def _reserve(self, tokens: int) -> float:
+        """Reserves one request and the tokens, or returns how long to wait before trying again."""
+        pause_seconds = self._paused_until - time.monotonic()
+        if pause_seconds > 0:
+            return pause_seconds
+
+        self._requests.refill()
+        self._tokens.refill()
+        wait_seconds = max(
+            self._requests.seconds_until(1),
+            self._tokens.seconds_until(tokens),
+        )
+        if wait_seconds > 0:
+            return wait_seconds
+
+        # a request larger than the whole budget is admitted once the bucket is full
+        self._requests.available -= 1
+        self._tokens.available -= min(tokens, self._tokens.capacity)
+        return 0.0
+
+    async def acquire(self, *, tokens: int, interactive: bool = False) -> None:
+        """Waits until the request fits in the budgets."""
+        if interactive:
+            self._interactive_waiting += 1
+        try:
+            while True:
+                # background requests step aside while interactive requests are waiting
+                if not interactive and self._interactive_waiting > 0:
+                    await anyio.sleep(BACKGROUND_YIELD_SECONDS)
+                    continue
+
+                wait_seconds = self._reserve(tokens)
+                if wait_seconds <= 0:
+                    return
+                if not interactive:
+                    wait_seconds = min(wait_seconds, BACKGROUND_YIELD_SECONDS)
+                await anyio.sleep(wait_seconds)
+        finally:
+            if interactive:
+                self._interactive_waiting -= 1
+
+    def record_usage(self, *, estimated_tokens: int, actual_tokens: int) -> None:
+        """Corrects the token budget once the provider reports the real usage."""
+        self._tokens.available -= actual_tokens - estimated_tokens
+
+    def refund(self, *, tokens: int) -> None:
+        """Returns the tokens of a request the provider rejected without using them."""
+        self._tokens.refill()
+        self._tokens.available = min(
+            self._tokens.capacity,
+            self._tokens.available + min(tokens, self._tokens.capacity),
+        )
+
+    def pause(self, seconds: float) -> None:
+        """Holds every request for the provider's requested retry delay."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+def backoff_seconds(
+    attempt: int, *, base_seconds: float = 0.5, max_seconds: float = 30.0
+) -> float:
+    """Returns an exponential backoff delay with full jitter for a retry attempt."""
+    return random.uniform(0.0, min(max_seconds, base_seconds * (2**attempt)))
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from uuid import UUID
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bookmemory.db.models.bookmark_content import BookmarkContent
+
+
+async def get_bookmark_content(
+    *, session: AsyncSession, bookmark_id: UUID
+) -> str | None:
+    """Returns the stored content of a bookmark, or None if it was never loaded."""
+    select_content_statement = select(BookmarkContent.content).where(
+        BookmarkContent.bookmark_id == bookmark_id
+    )
+    return await session.scalar(select_content_statement)
+
+
+async def save_bookmark_content(
+    *, session: AsyncSession, bookmark_id: UUID, content: str
+) -> None:
+    """
+    Writes the content of a bookmark in the caller's transaction.
+    The bookmarks row isn't touched, so content never widens it.
+    """
+    insert_content_statement = insert(BookmarkContent).values(
+        bookmark_id=bookmark_id, content=content
+    )
+    await session.execute(
+        insert_content_statement.on_conflict_do_update(
+            index_elements=[BookmarkContent.bookmark_id],
+            set_={
+                "content": insert_content_statement.excluded.content,
+                "updated_at": func.now(),
+            },
+        )
+    )
@@ -4,9 +4,10 @@ from uuid import UUID
 
 from sqlalchemy import and_, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import joinedload
 
 from bookmemory.db.models import Bookmark
+from bookmemory.services.bookmarks.load_options import BOOKMARK_TAGS_OPTION
 
 
 async def get_user_bookmark(
@@ -14,12 +15,17 @@ async def get_user_bookmark(
     bookmark_id: UUID,
     user_id: UUID,
     session: AsyncSession,
+    with_content: bool = False,
 ) -> Bookmark:
-    """Returns a user's bookmark for an ID"""
+    """Returns a user's bookmark for an ID, with its stored content if asked"""
     select_bookmark_statement = (
         select(Bookmark)
         .where(and_(Bookmark.id == bookmark_id, Bookmark.user_id == user_id))
-        .options(selectinload(Bookmark.tags))
+        .options(BOOKMARK_TAGS_OPTION)
     )
+    if with_content:
+        select_bookmark_statement = select_bookmark_statement.options(
+            joinedload(Bookmark.bookmark_content)
+        )
     bookmark_result = await session.execute(select_bookmark_statement)
     return bookmark_result.scalar_one()
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from uuid import UUID
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bookmemory.db.models.user import User
+
+
+async def bump_library_generation(*, session: AsyncSession, user_id: UUID) -> None:
+    """
+    Marks a change to a user's bookmarks in the caller's transaction, so search
+    results cached for the previous generation are no longer used. The bump commits
+    with the write it marks and rolls back with it, and the user row stays locked
+    until the caller commits.
+    """
+    await session.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(library_generation=User.library_generation + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def get_library_generation(*, session: AsyncSession, user_id: UUID) -> int:
+    """Returns the current generation of a user's bookmarks."""
+    select_generation_statement = select(User.library_generation).where(
+        User.id == user_id
+    )
+    return int(await session.scalar(select_generation_statement) or 0)
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import ColumnElement, Row, Select, and_, func, or_, select, tuple_
+
+from bookmemory.db.models.bookmark import Bookmark
+from bookmemory.db.models.tag import Tag
+from bookmemory.schemas.bookmarks import BookmarkSort, TagMode
+from bookmemory.services.tags.normalize_tags import normalize_tags
+
+
+def filter_bookmarks_by_tags(
+    statement: Select[Any],
+    *,
+    user_id: UUID,
+    tags: list[str],
+    tag_mode: TagMode,
+) -> Select[Any]:
+    """Returns the statement filtered to bookmarks with any or all of the tags."""
+    normalized_tags = normalize_tags(tags)
+    if not normalized_tags or tag_mode == "ignore":
+        return statement
+
+    tag_ids_statement = (
+        select(Bookmark.id.label("bookmark_id"))
+        .join(Bookmark.tags)
+        .where(
+            and_(
+                Bookmark.user_id == user_id,
+                Tag.user_id == user_id,
+                Tag.name.in_(normalized_tags),
+            )
+        )
+        .group_by(Bookmark.id)
+    )
+    if tag_mode == "all":
+        tag_ids_statement = tag_ids_statement.having(
+            func.count(func.distinct(Tag.name)) == len(normalized_tags)
+        )
+
+    # add bookmarks with matching tags to the query
+    tag_ids_subquery = tag_ids_statement.subquery()
+    tagged_bookmark_ids = select(tag_ids_subquery.c.bookmark_id)
+    return statement.where(Bookmark.id.in_(tagged_bookmark_ids))
+
+
+def order_bookmarks(statement: Select[Any], *, sort: BookmarkSort) -> Select[Any]:
+    """Returns the statement ordered to match the (user_id, ...) list indexes."""
+    if sort == "alphabetical":
+        return statement.order_by(
+            func.lower(Bookmark.title).asc(),
+            Bookmark.created_at.desc(),
+            Bookmark.id.desc(),
+        )
+    return statement.order_by(
+        Bookmark.updated_at.desc(),
+        Bookmark.id.desc(),
+    )
+
+
+def encode_bookmark_cursor(bookmark: Row[Any], *, sort: BookmarkSort) -> str:
+    """Returns an opaque cursor for the page that starts after a bookmark response row."""
+    if sort == "alphabetical":
+        values = [
+            bookmark.title,
+            bookmark.created_at.isoformat(),
+            str(bookmark.id),
+        ]
+    else:
+        values = [bookmark.updated_at.isoformat(), str(bookmark.id)]
+    payload = json.dumps({"sort": sort, "values": values}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def bookmark_cursor_condition(
+    cursor: str, *, sort: BookmarkSort
+) -> ColumnElement[bool]:
+    """
+    Returns the keyset condition for the bookmarks after a cursor.
+    Raises ValueError if the cursor is invalid or was made for another sort.
+    """
+    try:
+        padded_cursor = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded_cursor))
+        if payload["sort"] != sort:
+            raise ValueError("cursor was made for another sort")
+
+        if sort == "alphabetical":
+            title, created_at, bookmark_id = payload["values"]
+            lower_title = func.lower(Bookmark.title)
+            cursor_title = func.lower(str(title))
+
+            # the leading >= bounds the index scan, the rest breaks ties between equal titles
+            return and_(
+                lower_title >= cursor_title,
+                or_(
+                    lower_title > cursor_title,
+                    tuple_(Bookmark.created_at, Bookmark.id)
+                    < tuple_(datetime.fromisoformat(created_at), UUID(bookmark_id)),
+                ),
+            )
+
+        updated_at, bookmark_id = payload["values"]
+        return tuple_(Bookmark.updated_at, Bookmark.id) < tuple_(
+            datetime.fromisoformat(updated_at), UUID(bookmark_id)
+        )
+    except (binascii.Error, KeyError, TypeError, ValueError) as error:
+        raise ValueError("invalid cursor") from error
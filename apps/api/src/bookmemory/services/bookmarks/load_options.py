@@ -0,0 +1,12 @@
+from __future__ import annotations
+
+from sqlalchemy.orm import selectinload
+
+from bookmemory.db.models.bookmark import Bookmark
+from bookmemory.db.models.tag import Tag
+
+# loads the tag ids and names for bookmark responses in one extra statement per query.
+# the other tag columns raise instead of loading one tag at a time
+BOOKMARK_TAGS_OPTION = selectinload(Bookmark.tags).load_only(
+    Tag.id, Tag.name, raiseload=True
+)
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from typing import Any, Sequence, cast
+
+from pydantic import TypeAdapter
+from sqlalchemy import Row, Select, func, literal_column, select
+from sqlalchemy.dialects.postgresql import JSON, aggregate_order_by
+
+from bookmemory.db.models.bookmark import Bookmark
+from bookmemory.db.models.bookmark_tag import bookmark_tags
+from bookmemory.db.models.tag import Tag
+from bookmemory.schemas.bookmarks import BookmarkResponse, BookmarkSearchResponse
+
+# a bookmark's tags as a json array of {id, name} in name order, aggregated in the bookmark row
+BOOKMARK_TAGS_JSON = (
+    select(
+        func.coalesce(
+            func.json_agg(
+                aggregate_order_by(
+                    func.json_build_object("id", Tag.id, "name", Tag.name),
+                    func.lower(Tag.name),
+                ),
+                type_=JSON,
+            ),
+            literal_column("'[]'::json", type_=JSON),
+        )
+    )
+    .select_from(bookmark_tags.join(Tag, Tag.id == bookmark_tags.c.tag_id))
+    .where(bookmark_tags.c.bookmark_id == Bookmark.id)
+    .correlate(Bookmark)
+    .scalar_subquery()
+)
+
+
+def select_bookmark_responses() -> Select[Any]:
+    """
+    Returns a select of the bookmark response columns with the tags in the same row.
+    Leaves out content, which responses never include.
+    """
+    statement = select(
+        Bookmark.id,
+        Bookmark.user_id,
+        Bookmark.title,
+        Bookmark.description,
+        Bookmark.summary,
+        Bookmark.type,
+        Bookmark.url,
+        Bookmark.status,
+        Bookmark.load_method,
+        Bookmark.created_at,
+        Bookmark.updated_at,
+        BOOKMARK_TAGS_JSON.label("tags"),
+    )
+    return cast(Select[Any], statement)
+
+
+# pages validated in one pydantic-core call, faster than model_construct in python
+_bookmark_responses_adapter = TypeAdapter(list[BookmarkResponse])
+_search_responses_adapter = TypeAdapter(list[BookmarkSearchResponse])
+
+
+def bookmark_row_fields(row: Row[Any]) -> dict[str, Any]:
+    """
+    Returns the BookmarkResponse fields of a row from select_bookmark_responses,
+    for a response model to validate in one pass.
+    """
+    return {
+        "id": row.id,
+        "user_id": row.user_id,
+        "title": row.title,
+        "description": row.description,
+        "summary": row.summary,
+        "type": row.type,
+        "url": row.url,
+        "status": row.status,
+        "load_method": row.load_method,
+        "created_at": row.created_at,
+        "updated_at": row.updated_at,
+        "tags": row.tags,
+    }
+
+
+def to_bookmark_row_responses(rows: Sequence[Row[Any]]) -> list[BookmarkResponse]:
+    """Returns the responses for rows from select_bookmark_responses."""
+    return _bookmark_responses_adapter.validate_python(
+        [bookmark_row_fields(row) for row in rows]
+    )
+
+
+def to_search_responses(
+    search_fields: Sequence[dict[str, Any]],
+) -> list[BookmarkSearchResponse]:
+    """Returns the search responses for bookmark row fields merged with search fields."""
+    return _search_responses_adapter.validate_python(search_fields)
@@ -2,12 +2,20 @@ from __future__ import annotations
 
 from typing import List
 
+import numpy as np
+
 from bookmemory.core.settings import settings
 
-from bookmemory.services.ai.providers import get_ai_provider
+from bookmemory.services.ai.providers import EmbeddingArray, get_ai_provider
 
 
-async def embed_chunks(chunks: List[str]) -> List[list[float]]:
+async def embed_chunks(
+    chunks: List[str], *, interactive: bool = False
+) -> EmbeddingArray:
+    """
+    Returns unit length embedding vectors for the chunks, one float32 row per chunk.
+    Interactive embeddings, like search queries, are scheduled ahead of background loads.
+    """
     # normalize chunks but keep the original order
     normalized_chunks: list[str] = []
     for chunk in chunks:
@@ -16,10 +24,22 @@ async def embed_chunks(chunks: List[str]) -> List[list[float]]:
         else:
             normalized_chunks.append(str(chunk))
 
-    # return an empty list if there are no chunks to embed
+    # return no rows if there are no chunks to embed
     if len(normalized_chunks) == 0:
-        return []
+        return np.empty((0, settings.embedding_dim), dtype=np.float32)
 
-    # generate and return embedding vectors for each chunk
+    # generate embedding vectors for each chunk
     provider = get_ai_provider(settings.embedding_provider)
-    return await provider.embed_chunks(normalized_chunks)
+    vectors = await provider.embed_chunks(normalized_chunks, interactive=interactive)
+
+    # verify that the vectors fit the embedding column before they are stored or searched
+    if vectors.ndim != 2 or vectors.shape[1] != settings.embedding_dim:
+        raise RuntimeError(
+            f"embedding dimension mismatch: got {vectors.shape[-1]}, expected {settings.embedding_dim}"
+        )
+
+    # store and search unit length vectors so the inner product ranks like cosine distance
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return (vectors / np.maximum(norms, np.finfo(np.float32).tiny)).astype(
+        np.float32, copy=False
+    )
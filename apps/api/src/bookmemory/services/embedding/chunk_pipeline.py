@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from uuid import UUID
+
+import anyio
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bookmemory.core.settings import settings
+from bookmemory.db.models.bookmark_chunk import BookmarkChunk
+from bookmemory.services.embedding.chunk_embed import embed_chunks
+from bookmemory.services.embedding.chunk_sync import BookmarkChunkSync
+from bookmemory.services.extraction.text_chunk import iter_chunks, iter_paragraphs
+
+# limit the embedding batches waiting on the provider so chunking can't run far ahead of embedding
+MAXIMUM_PENDING_EMBED_BATCHES = 4
+
+
+async def chunk_and_embed_content(
+    *, session: AsyncSession, bookmark_id: UUID, content: str
+) -> int:
+    """
+    Chunks the content and embeds new or changed chunks in batches while chunking continues.
+    Writes the chunks once every batch is embedded and returns the chunk count.
+    No transaction is open while the chunks are embedded. The caller commits the writes.
+    """
+    chunk_sync = await BookmarkChunkSync.load(session=session, bookmark_id=bookmark_id)
+    # end the read transaction so no transaction idles while the provider embeds.
+    # the loaded chunks stay usable since the session doesn't expire them on commit
+    await session.commit()
+    batch_size = max(1, settings.chunk_embed_batch_size)
+    pending_batches = anyio.Semaphore(MAXIMUM_PENDING_EMBED_BATCHES)
+
+    async def embed_batch(batch: list[BookmarkChunk]) -> None:
+        try:
+            vectors = await embed_chunks(
+                [bookmark_chunk.text for bookmark_chunk in batch]
+            )
+            if len(vectors) != len(batch):
+                raise RuntimeError("embedding count mismatch")
+            for bookmark_chunk, vector in zip(batch, vectors):
+                bookmark_chunk.embedding = vector
+        finally:
+            pending_batches.release()
+
+    try:
+        async with anyio.create_task_group() as task_group:
+            # send each full batch to the embedding provider and keep chunking
+            batch: list[BookmarkChunk] = []
+            for chunk in iter_chunks(paragraphs=iter_paragraphs(content)):
+                pending_chunk = chunk_sync.add(chunk)
+                if pending_chunk is not None:
+                    batch.append(pending_chunk)
+                if len(batch) >= batch_size:
+                    await pending_batches.acquire()
+                    task_group.start_soon(embed_batch, batch)
+                    batch = []
+
+            if batch:
+                await pending_batches.acquire()
+                task_group.start_soon(embed_batch, batch)
+    except ExceptionGroup as error_group:
+        # surface the first embedding error like a sequential load would
+        raise error_group.exceptions[0] from error_group
+
+    # the writes open a short transaction that the caller commits
+    if chunk_sync.chunk_count > 0:
+        await chunk_sync.apply(session=session)
+    return chunk_sync.chunk_count
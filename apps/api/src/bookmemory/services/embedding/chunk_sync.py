@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import hashlib
+from collections import defaultdict
+from uuid import UUID
+
+import sqlalchemy as sa
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import defer
+
+from bookmemory.db.models.bookmark_chunk import BookmarkChunk
+
+
+def hash_chunk_text(text: str) -> str:
+    """Returns the sha256 hex digest of the chunk text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+async def delete_bookmark_chunks(*, session: AsyncSession, bookmark_id: UUID) -> None:
+    """Deletes all chunks for a bookmark."""
+    await session.execute(
+        sa.delete(BookmarkChunk).where(BookmarkChunk.bookmark_id == bookmark_id)
+    )
+
+
+class BookmarkChunkSync:
+    """
+    Replaces the bookmark chunks with new chunk texts as they are produced.
+    Keeps existing rows and embeddings for unchanged texts.
+    """
+
+    def __init__(
+        self, *, bookmark_id: UUID, existing_rows: list[tuple[BookmarkChunk, bool]]
+    ):
+        self.bookmark_id = bookmark_id
+        self.chunk_count = 0
+        self._kept_chunks: list[tuple[int, BookmarkChunk]] = []
+        self._new_chunks: list[BookmarkChunk] = []
+
+        # group existing chunks by text hash so repeated texts can each be matched once
+        self._existing_by_hash: dict[str, list[BookmarkChunk]] = defaultdict(list)
+        self._unembedded_chunk_ids: set[UUID] = set()
+        for existing_chunk, is_unembedded in existing_rows:
+            text_hash = existing_chunk.text_hash or hash_chunk_text(existing_chunk.text)
+            self._existing_by_hash[text_hash].append(existing_chunk)
+            if is_unembedded:
+                self._unembedded_chunk_ids.add(existing_chunk.id)
+
+    @classmethod
+    async def load(
+        cls, *, session: AsyncSession, bookmark_id: UUID
+    ) -> BookmarkChunkSync:
+        """Returns a chunk sync with the bookmark's existing chunks."""
+        # skip loading the stored vectors and only check whether each chunk has one
+        existing_rows = (
+            await session.execute(
+                select(BookmarkChunk, BookmarkChunk.embedding.is_(None))
+                .where(BookmarkChunk.bookmark_id == bookmark_id)
+                .order_by(BookmarkChunk.chunk_index.asc())
+                .options(defer(BookmarkChunk.embedding))
+            )
+        ).all()
+        return cls(
+            bookmark_id=bookmark_id,
+            existing_rows=[(row[0], bool(row[1])) for row in existing_rows],
+        )
+
+    def add(self, chunk: str) -> BookmarkChunk | None:
+        """Adds the next chunk text and returns its chunk if it needs an embedding."""
+        chunk_index = self.chunk_count
+        self.chunk_count += 1
+
+        # match the chunk to an unchanged existing chunk
+        # kept chunks without an embedding, e.g. from a failed load, are embedded again
+        text_hash = hash_chunk_text(chunk)
+        matches = self._existing_by_hash.get(text_hash)
+        if matches:
+            kept_chunk = matches.pop(0)
+            self._kept_chunks.append((chunk_index, kept_chunk))
+            if kept_chunk.id in self._unembedded_chunk_ids:
+                return kept_chunk
+            return None
+
+        new_chunk = BookmarkChunk(
+            bookmark_id=self.bookmark_id,
+            chunk_index=chunk_index,
+            text=chunk,
+            text_hash=text_hash,
+            embedding=None,
+        )
+        self._new_chunks.append(new_chunk)
+        return new_chunk
+
+    async def apply(self, *, session: AsyncSession) -> None:
+        """Deletes stale chunks, reindexes kept chunks, and adds new chunks."""
+        # delete chunks whose text no longer exists
+        stale_chunk_ids = [
+            stale_chunk.id
+            for matches in self._existing_by_hash.values()
+            for stale_chunk in matches
+        ]
+        if stale_chunk_ids:
+            await session.execute(
+                sa.delete(BookmarkChunk).where(BookmarkChunk.id.in_(stale_chunk_ids))
+            )
+
+        # unchanged chunks at their old index are left alone, so they aren't rewritten.
+        # a moved chunk whose target index another moved chunk still holds goes to a
+        # temporary negative index first, so the unique (bookmark_id, chunk_index) index
+        # can't collide
+        moved_chunks = [
+            (chunk_index, kept_chunk)
+            for chunk_index, kept_chunk in self._kept_chunks
+            if kept_chunk.chunk_index != chunk_index
+        ]
+        held_indexes = {kept_chunk.chunk_index for _, kept_chunk in moved_chunks}
+        displaced_chunks: list[tuple[int, BookmarkChunk]] = []
+        for chunk_index, kept_chunk in moved_chunks:
+            if chunk_index in held_indexes:
+                kept_chunk.chunk_index = -1 - chunk_index
+                displaced_chunks.append((chunk_index, kept_chunk))
+            else:
+                kept_chunk.chunk_index = chunk_index
+        if displaced_chunks:
+            await session.flush()
+            for chunk_index, kept_chunk in displaced_chunks:
+                kept_chunk.chunk_index = chunk_index
+
+        # chunks from before text hashes were stored get theirs once
+        for _, kept_chunk in self._kept_chunks:
+            if kept_chunk.text_hash is None:
+                kept_chunk.text_hash = hash_chunk_text(kept_chunk.text)
+        session.add_all(self._new_chunks)
+        await session.flush()
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
+import anyio
+
+from bookmemory.core.settings import settings
 from bookmemory.db.models.bookmark import LoadMethod, ExtractedContent
 from bookmemory.services.extraction.http_fetch import fetch_html
-from bookmemory.services.extraction.html_extract import extract_html
+from bookmemory.services.extraction.html_extract import ExtractedResult, extract_html
 from bookmemory.services.extraction.playwright_fetch import (
     fetch_rendered_html,
 )
@@ -11,7 +14,7 @@ from bookmemory.services.extraction.playwright_fetch import (
 MINIMUM_HTTP_LENGTH = 600
 
 # cap the length of extracted text to persist in the database
-MAXIMUM_CONTENT_LENGTH = 250_000
+MAXIMUM_CONTENT_LENGTH = settings.maximum_content_length
 
 
 def _trim_extracted_text(text: str) -> str:
@@ -21,6 +24,10 @@ def _trim_extracted_text(text: str) -> str:
     return trimmed
 
 
+def _extract_html(html: str, url: str) -> ExtractedResult:
+    return extract_html(html=html, url=url)
+
+
 async def extract_content(*, url: str) -> ExtractedContent:
     """
     Returns extracted HTML content from a URL.
@@ -30,7 +37,10 @@ async def extract_content(*, url: str) -> ExtractedContent:
     title = None
     try:
         fetched_html = await fetch_html(url=url)
-        extracted_content = extract_html(html=fetched_html.html, url=url)
+        # parse html in a worker thread so large pages don't block the event loop
+        extracted_content = await anyio.to_thread.run_sync(
+            _extract_html, fetched_html.html, url
+        )
         text = _trim_extracted_text(extracted_content.text)
         title = _trim_extracted_text(extracted_content.title)
 
@@ -47,7 +57,9 @@ async def extract_content(*, url: str) -> ExtractedContent:
 
     # try playwright if the HTTP extraction failed or the content was too short
     rendered_html = await fetch_rendered_html(url=url)
-    extracted_content = extract_html(html=rendered_html.html, url=rendered_html.url)
+    extracted_content = await anyio.to_thread.run_sync(
+        _extract_html, rendered_html.html, rendered_html.url
+    )
     text = _trim_extracted_text(extracted_content.text)
     if not title:
         title = _trim_extracted_text(extracted_content.title)
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+from pathlib import Path, PurePosixPath
+from urllib.parse import unquote, urlparse
+from uuid import UUID
+
+import anyio
+
+from bookmemory.core.settings import settings
+from bookmemory.db.models.bookmark import ExtractedContent, LoadMethod
+from bookmemory.services.extraction.file_fetch import fetch_file
+from bookmemory.services.extraction.http_fetch import FetchError
+from bookmemory.services.extraction.pdf_pages import (
+    count_pdf_pages,
+    extract_pdf_pages,
+)
+
+PDF_SIGNATURE = b"%PDF-"
+TEXT_SUFFIXES = frozenset({".txt", ".text", ".md", ".markdown", ".csv", ".log"})
+
+# pages per worker task. larger ranges reparse the document less often, smaller ranges spread better
+PAGES_PER_TASK = 8
+
+PAGE_SEPARATOR = "\n\n"
+
+# pdf text extraction is cpu bound, so run it in worker processes. limit the processes in use.
+_FILE_EXTRACT_LIMITER = anyio.CapacityLimiter(settings.file_extract_max_workers)
+
+
+def _read_signature(path: Path) -> bytes:
+    with path.open("rb") as file:
+        return file.read(len(PDF_SIGNATURE))
+
+
+def _read_text(path: Path, max_characters: int) -> str:
+    """Returns the start of a text file without reading the rest of it."""
+    with path.open("r", encoding="utf-8", errors="replace") as file:
+        return file.read(max_characters)
+
+
+def _is_text(path: Path) -> bool:
+    """Returns True if the file has a text suffix or no binary bytes in its first block."""
+    if path.suffix.lower() in TEXT_SUFFIXES:
+        return True
+    with path.open("rb") as file:
+        return b"\x00" not in file.read(4096)
+
+
+def _file_title(url: str, path: Path) -> str:
+    """Returns the file name in a file url, since remote files are read from a temporary download."""
+    return PurePosixPath(unquote(urlparse(url).path)).name or path.name
+
+
+async def extract_pdf_text(path: Path, *, max_characters: int) -> str:
+    """
+    Returns the text of a PDF, extracting page ranges in parallel worker processes.
+    Stops extracting once max_characters of text has been collected.
+    """
+    # pypdf raises many error types for damaged or encrypted files, so report them as fetch errors
+    try:
+        page_count = await anyio.to_process.run_sync(
+            count_pdf_pages, str(path), limiter=_FILE_EXTRACT_LIMITER
+        )
+    except Exception as error:
+        raise FetchError(f"unreadable pdf: {error}") from error
+    page_ranges = [
+        (first_page, min(first_page + PAGES_PER_TASK, page_count))
+        for first_page in range(0, page_count, PAGES_PER_TASK)
+    ]
+
+    # extract one page range per worker at a time and keep the pages in order
+    page_texts: list[str] = []
+    text_length = 0
+    window_size = max(1, settings.file_extract_max_workers)
+    for window_start in range(0, len(page_ranges), window_size):
+        window = page_ranges[window_start : window_start + window_size]
+        window_texts: list[list[str]] = [[] for _ in window]
+
+        async def extract_range(
+            range_index: int, first_page: int, last_page: int
+        ) -> None:
+            try:
+                window_texts[range_index] = await anyio.to_process.run_sync(
+                    extract_pdf_pages,
+                    str(path),
+                    first_page,
+                    last_page,
+                    limiter=_FILE_EXTRACT_LIMITER,
+                )
+            except Exception as error:
+                raise FetchError(f"unreadable pdf: {error}") from error
+
+        try:
+            async with anyio.create_task_group() as task_group:
+                for range_index, (first_page, last_page) in enumerate(window):
+                    task_group.start_soon(
+                        extract_range, range_index, first_page, last_page
+                    )
+        except ExceptionGroup as error_group:
+            # surface the first page range error like a sequential extraction would
+            raise error_group.exceptions[0] from error_group
+
+        for range_texts in window_texts:
+            for page_text in range_texts:
+                page_text = page_text.strip()
+                if page_text:
+                    page_texts.append(page_text)
+                    text_length += len(page_text) + len(PAGE_SEPARATOR)
+        if text_length >= max_characters:
+            break
+
+    return PAGE_SEPARATOR.join(page_texts)[:max_characters]
+
+
+async def extract_file_content(*, url: str, user_id: UUID) -> ExtractedContent:
+    """Returns the text content of a PDF or plain text file bookmark."""
+    max_characters = settings.maximum_content_length
+    async with fetch_file(url=url, user_id=user_id) as path:
+        # check the file size before reading anything
+        if (await anyio.Path(path).stat()).st_size > settings.file_max_bytes:
+            raise FetchError(f"file is larger than {settings.file_max_bytes} bytes")
+
+        if await anyio.to_thread.run_sync(_read_signature, path) == PDF_SIGNATURE:
+            content = await extract_pdf_text(path, max_characters=max_characters)
+        elif await anyio.to_thread.run_sync(_is_text, path):
+            content = await anyio.to_thread.run_sync(_read_text, path, max_characters)
+        else:
+            raise FetchError("unsupported file type")
+
+    return ExtractedContent(
+        title=_file_title(url, path),
+        content=content.strip(),
+        load_method=LoadMethod.read,
+    )
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import tempfile
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator
+from urllib.parse import urlparse
+from uuid import UUID
+
+import anyio
+import httpx
+
+from bookmemory.core.settings import settings
+from bookmemory.services.extraction.http_fetch import (
+    DEFAULT_CONNECT_TIMEOUT_SECONDS,
+    DEFAULT_FETCH_TIMEOUT_SECONDS,
+    DEFAULT_HEADERS,
+    FetchError,
+)
+from bookmemory.services.files.storage import (
+    LOCAL_SCHEME,
+    S3_SCHEME,
+    S3Location,
+    parse_s3_url,
+    resolve_local_url,
+)
+
+DOWNLOAD_CHUNK_BYTES = 1024 * 1024
+
+_s3_client: Any = None
+
+
+def _get_s3_client() -> Any:
+    """Returns a singleton S3 client for the configured S3-compatible endpoint."""
+    global _s3_client
+    if _s3_client is None:
+        try:
+            import boto3
+        except ImportError as error:
+            raise FetchError(
+                "boto3 is not installed. install bookmemory-api[s3]"
+            ) from error
+
+        _s3_client = boto3.client(
+            "s3",
+            endpoint_url=settings.s3_endpoint_url or None,
+            region_name=settings.s3_region,
+            aws_access_key_id=settings.s3_access_key_id or None,
+            aws_secret_access_key=settings.s3_secret_access_key or None,
+        )
+    return _s3_client
+
+
+def _download_s3_object(location: S3Location, path: Path) -> None:
+    """Downloads an S3 object to a file. Blocks the calling thread."""
+    client = _get_s3_client()
+    try:
+        head = client.head_object(Bucket=location.bucket, Key=location.key)
+        if int(head.get("ContentLength", 0)) > settings.file_max_bytes:
+            raise FetchError(f"file is larger than {settings.file_max_bytes} bytes")
+        client.download_file(location.bucket, location.key, str(path))
+    except FetchError:
+        raise
+    except Exception as error:
+        raise FetchError(f"s3 download failed: {error}") from error
+
+
+async def _download_http_file(url: str, path: Path) -> None:
+    """Streams a file download to disk."""
+    timeout = httpx.Timeout(
+        DEFAULT_FETCH_TIMEOUT_SECONDS, connect=DEFAULT_CONNECT_TIMEOUT_SECONDS
+    )
+    async with httpx.AsyncClient(
+        follow_redirects=True, headers=DEFAULT_HEADERS, timeout=timeout
+    ) as client:
+        try:
+            async with client.stream("GET", url) as response:
+                if response.status_code >= 400:
+                    raise FetchError(
+                        f"bad status: {response.status_code}",
+                        status_code=response.status_code,
+                    )
+
+                # write the body in chunks so large files never sit in memory
+                downloaded_bytes = 0
+                async with await anyio.open_file(path, "wb") as file:
+                    async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_BYTES):
+                        downloaded_bytes += len(chunk)
+                        if downloaded_bytes > settings.file_max_bytes:
+                            raise FetchError(
+                                f"file is larger than {settings.file_max_bytes} bytes"
+                            )
+                        await file.write(chunk)
+        except httpx.HTTPError as error:
+            raise FetchError(f"request failed: {error}") from error
+
+
+@asynccontextmanager
+async def fetch_file(*, url: str, user_id: UUID) -> AsyncIterator[Path]:
+    """Yields a local path for a file bookmark url, downloading remote files to a temporary file."""
+    scheme = urlparse(url).scheme.lower()
+
+    # read uploaded files in place
+    if scheme == LOCAL_SCHEME:
+        try:
+            path = resolve_local_url(url=url, user_id=user_id)
+        except ValueError as error:
+            raise FetchError(str(error), status_code=403) from error
+        if not await anyio.Path(path).is_file():
+            raise FetchError("file not found", status_code=404)
+        yield path
+        return
+
+    # download remote files to a temporary file that keeps the original suffix
+    suffix = Path(urlparse(url).path).suffix
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / f"download{suffix}"
+        if scheme == S3_SCHEME:
+            try:
+                location = parse_s3_url(url=url, user_id=user_id)
+            except ValueError as error:
+                raise FetchError(str(error), status_code=403) from error
+            await anyio.to_thread.run_sync(_download_s3_object, location, path)
+        elif scheme in {"http", "https"}:
+            await _download_http_file(url, path)
+        else:
+            raise FetchError(f"unsupported file url scheme: {scheme}")
+        yield path
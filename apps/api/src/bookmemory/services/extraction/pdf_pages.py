@@ -0,0 +1,25 @@
+"""
+Runs in worker processes, so it only imports what page extraction needs.
+"""
+
+from __future__ import annotations
+
+from pypdf import PdfReader
+
+
+def count_pdf_pages(path: str) -> int:
+    """Returns the number of pages in a PDF."""
+    return len(PdfReader(path).pages)
+
+
+def extract_pdf_pages(path: str, first_page: int, last_page: int) -> list[str]:
+    """Returns the text of the pages from first_page up to but not including last_page."""
+    reader = PdfReader(path)
+    page_texts: list[str] = []
+    for page_index in range(first_page, min(last_page, len(reader.pages))):
+        try:
+            page_texts.append(reader.pages[page_index].extract_text() or "")
+        except Exception:
+            # skip a damaged page instead of failing the whole document
+            page_texts.append("")
+    return page_texts
@@ -1,99 +1,211 @@
 from __future__ import annotations
 
 import re
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator
 
+from bookmemory.core.settings import settings
+from bookmemory.services.extraction.tokenize import get_token_counter
 
 PARAGRAPH_SEPARATOR = "\n\n"
-DEFAULT_MAX_CHARACTERS = 1200
-DEFAULT_MIN_CHARACTERS = 200
+SENTENCE_SEPARATOR = " "
+
+# a word with no whitespace can still need a hard split, e.g. a long url or encoded blob.
+# dense text like that can take a token every 2 characters
+MINIMUM_CHARACTERS_PER_TOKEN = 2
+
+# split on blank lines, on whitespace after sentence punctuation, and on words
+_PARAGRAPH_PATTERN = re.compile(r"\n[ \t]*\n\s*")
+_SENTENCE_PATTERN = re.compile(r"(?<=[.!?])[\"'”’)\]]*\s+")
+_WORD_PATTERN = re.compile(r"\S+")
+
+
+@dataclass(frozen=True)
+class _TextUnit:
+    text: str
+    tokens: int
+    starts_paragraph: bool
+
+
+def _split_sentence(
+    sentence: str, *, count_tokens: Callable[[str], int], max_tokens: int
+) -> Iterator[tuple[str, int]]:
+    """Yields pieces of an oversized sentence split at word boundaries."""
+    piece_start = 0
+    piece_end = 0
+    piece_tokens = 0
+    for word_match in _WORD_PATTERN.finditer(sentence):
+        word_tokens = count_tokens(word_match.group())
+
+        # flush the current piece when the next word doesn't fit
+        if piece_tokens and piece_tokens + word_tokens > max_tokens:
+            yield sentence[piece_start:piece_end], piece_tokens
+            piece_tokens = 0
+
+        # hard-split a single word that is larger than a whole chunk
+        if word_tokens > max_tokens:
+            word = word_match.group()
+            slice_length = max_tokens * MINIMUM_CHARACTERS_PER_TOKEN
+            for slice_start in range(0, len(word), slice_length):
+                word_slice = word[slice_start : slice_start + slice_length]
+                yield word_slice, count_tokens(word_slice)
+            continue
 
+        if piece_tokens == 0:
+            piece_start = word_match.start()
+        piece_end = word_match.end()
+        piece_tokens += word_tokens
 
-def chunk_text(
+    if piece_tokens:
+        yield sentence[piece_start:piece_end], piece_tokens
+
+
+def iter_paragraphs(text: str) -> Iterator[str]:
+    """Yields the paragraphs of a text without copying the whole text into a list."""
+    paragraph_start = 0
+    for separator_match in _PARAGRAPH_PATTERN.finditer(text):
+        yield text[paragraph_start : separator_match.start()]
+        paragraph_start = separator_match.end()
+    yield text[paragraph_start:]
+
+
+def iter_sentence_spans(text: str) -> Iterator[tuple[int, int]]:
+    """Yields the start and end offsets of the sentences in a text."""
+    sentence_start = 0
+    for separator_match in _SENTENCE_PATTERN.finditer(text):
+        if separator_match.start() > sentence_start:
+            yield sentence_start, separator_match.start()
+        sentence_start = separator_match.end()
+    if len(text) > sentence_start:
+        yield sentence_start, len(text)
+
+
+def _iter_units(
+    paragraphs: Iterable[str], *, count_tokens: Callable[[str], int], max_tokens: int
+) -> Iterator[_TextUnit]:
+    """Yields sentences, or pieces of oversized sentences, with their token counts."""
+    for paragraph in paragraphs:
+        starts_paragraph = True
+        for sentence in _SENTENCE_PATTERN.split(paragraph.strip()):
+            sentence = sentence.strip()
+            if not sentence:
+                continue
+
+            sentence_tokens = count_tokens(sentence)
+            if sentence_tokens <= max_tokens:
+                yield _TextUnit(sentence, sentence_tokens, starts_paragraph)
+                starts_paragraph = False
+                continue
+
+            for piece, piece_tokens in _split_sentence(
+                sentence, count_tokens=count_tokens, max_tokens=max_tokens
+            ):
+                yield _TextUnit(piece, piece_tokens, starts_paragraph)
+                starts_paragraph = False
+
+
+def _join_units(units: list[_TextUnit]) -> str:
+    """Returns the chunk text for the units, keeping paragraph breaks."""
+    parts: list[str] = []
+    for unit in units:
+        if parts:
+            parts.append(
+                PARAGRAPH_SEPARATOR if unit.starts_paragraph else SENTENCE_SEPARATOR
+            )
+        parts.append(unit.text)
+    return "".join(parts)
+
+
+def iter_chunks(
     *,
-    text: str,
-    max_chars: int = DEFAULT_MAX_CHARACTERS,
-    min_chars: int = DEFAULT_MIN_CHARACTERS,
-) -> list[str]:
+    paragraphs: Iterable[str],
+    max_tokens: int | None = None,
+    overlap_tokens: int | None = None,
+    min_tokens: int | None = None,
+    count_tokens: Callable[[str], int] | None = None,
+) -> Iterator[str]:
     """
-    Chunks text deterministically by paragraph:
-    - split on blank lines
-    - pack paragraphs until max_chars
-    - hard-split any giant paragraph
+    Yields chunks as they fill from a stream of paragraphs, deterministically by sentence:
+    - split paragraphs on blank lines and sentences on end punctuation
+    - pack whole sentences until max_tokens
+    - start each chunk with up to overlap_tokens of the previous chunk's last sentences
+    - split any giant sentence at word boundaries
     """
-    # trim whitespace and collapse 3+ newlines into a single blank line
-    normalized_text = text.strip()
-    normalized_text = re.sub(r"\n{3,}", PARAGRAPH_SEPARATOR, normalized_text)
-
-    # break normalized text into paragraphs
-    paragraphs = [
-        paragraph.strip()
-        for paragraph in normalized_text.split(PARAGRAPH_SEPARATOR)
-        if paragraph.strip()
-    ]
-
-    # append paragraphs to a buffer and emit a chunk when adding the next paragraph would exceed the limit
-    chunks: list[str] = []
-    buffer: list[str] = []
-    buffer_length = 0
-
-    def add_chunk() -> None:
-        nonlocal buffer, buffer_length
-        if not buffer:
-            return
-
-        # normalize the buffer contents and merge adjacent blank lines
-        buffer_chunk = PARAGRAPH_SEPARATOR.join(buffer).strip()
-        buffer_chunk = re.sub(
-            r"\n[ \t]*\n(?:[ \t]*\n)+",
-            PARAGRAPH_SEPARATOR,
-            buffer_chunk,
-        )
-
-        # add the buffer chunk if it isn't empty
-        if buffer_chunk:
-            chunks.append(buffer_chunk)
-        buffer = []
-        buffer_length = 0
+    max_tokens = max(1, max_tokens or settings.chunk_max_tokens)
+    overlap_tokens = min(
+        max_tokens // 2,
+        settings.chunk_overlap_tokens if overlap_tokens is None else overlap_tokens,
+    )
+    min_tokens = settings.chunk_min_tokens if min_tokens is None else min_tokens
+    count_tokens = count_tokens or get_token_counter()
+
+    window: list[_TextUnit] = []
+    window_tokens = 0
+    overlap_count = 0  # leading window units repeated from the previous chunk
+
+    # hold back the latest chunk so a small tail can still be merged into it
+    previous_units: list[_TextUnit] = []
+    previous_tokens = 0
+
+    units = _iter_units(paragraphs, count_tokens=count_tokens, max_tokens=max_tokens)
+    for unit in units:
+        # emit the window as a chunk when the next sentence doesn't fit
+        if len(window) > overlap_count and window_tokens + unit.tokens > max_tokens:
+            if previous_units:
+                yield _join_units(previous_units)
+            previous_units = window
+            previous_tokens = window_tokens
+
+            # carry the trailing sentences into the next chunk while they fit in the overlap
+            overlap_start = len(window)
+            carried_tokens = 0
+            while (
+                overlap_start > 0
+                and carried_tokens + window[overlap_start - 1].tokens <= overlap_tokens
+                and carried_tokens + window[overlap_start - 1].tokens + unit.tokens
+                <= max_tokens
+            ):
+                overlap_start -= 1
+                carried_tokens += window[overlap_start].tokens
+            window = window[overlap_start:]
+            window_tokens = carried_tokens
+            overlap_count = len(window)
+
+        window.append(unit)
+        window_tokens += unit.tokens
+
+    # add the remaining sentences, merging a small tail into the previous chunk when it fits
+    tail_units = window[overlap_count:]
+    tail_tokens = sum(tail_unit.tokens for tail_unit in tail_units)
+    if (
+        previous_units
+        and tail_tokens < min_tokens
+        and previous_tokens + tail_tokens <= max_tokens
+    ):
+        yield _join_units(previous_units + tail_units)
+        return
+
+    if previous_units:
+        yield _join_units(previous_units)
+    if tail_units:
+        yield _join_units(window)
 
-    for paragraph in paragraphs:
-        # add any buffered chunk first so an oversized paragraph gets split into its own chunk(s)
-        if len(paragraph) > max_chars:
-            add_chunk()
-
-            # split an oversized paragraph into max_chars sized chunks
-            start = 0
-            while start < len(paragraph):
-                end = min(start + max_chars, len(paragraph))
-                paragraph_chunk = paragraph[start:end].strip()
-                if paragraph_chunk:
-                    chunks.append(paragraph_chunk)
-                start = end
-            continue
 
-        # append to the current buffer or write to the next chunk if it is full
-        separator_length = len(PARAGRAPH_SEPARATOR) if buffer else 0
-        if buffer_length + separator_length + len(paragraph) <= max_chars:
-            buffer.append(paragraph)
-            buffer_length += separator_length + len(paragraph)
-        else:
-            add_chunk()
-            buffer.append(paragraph)
-            buffer_length = len(paragraph)
-
-    # add any remaining chunks
-    add_chunk()
-
-    # merge small chunks into the previous chunk when possible
-    merged_chunks: list[str] = []
-    for chunk in chunks:
-        if (
-            merged_chunks
-            and len(chunk) < min_chars
-            and len(merged_chunks[-1]) + len(PARAGRAPH_SEPARATOR) + len(chunk)
-            <= max_chars
-        ):
-            merged_chunks[-1] = merged_chunks[-1] + PARAGRAPH_SEPARATOR + chunk
-        else:
-            merged_chunks.append(chunk)
-
-    return merged_chunks
+def chunk_text(
+    *,
+    text: str,
+    max_tokens: int | None = None,
+    overlap_tokens: int | None = None,
+    min_tokens: int | None = None,
+    count_tokens: Callable[[str], int] | None = None,
+) -> list[str]:
+    """Returns the chunks for a text. See iter_chunks."""
+    return list(
+        iter_chunks(
+            paragraphs=iter_paragraphs(text),
+            max_tokens=max_tokens,
+            overlap_tokens=overlap_tokens,
+            min_tokens=min_tokens,
+            count_tokens=count_tokens,
+        )
+    )
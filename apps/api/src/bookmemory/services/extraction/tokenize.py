@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import logging
+import math
+import re
+from typing import Callable
+
+from bookmemory.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# words and punctuation for the estimated token count
+_TOKEN_PIECE_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+# english words average about 4 characters per BPE token
+CHARACTERS_PER_TOKEN = 4
+
+_token_counter: Callable[[str], int] | None = None
+
+
+def estimate_tokens(text: str) -> int:
+    """Returns an approximate BPE token count without a tokenizer."""
+    return sum(
+        math.ceil(len(piece) / CHARACTERS_PER_TOKEN)
+        for piece in _TOKEN_PIECE_PATTERN.findall(text)
+    )
+
+
+def load_tiktoken_counter() -> Callable[[str], int] | None:
+    """Returns a tiktoken token counter, or None if the encoding can't be loaded."""
+    try:
+        import tiktoken
+
+        encoding = tiktoken.get_encoding(settings.chunk_tiktoken_encoding)
+    except Exception:
+        # tiktoken downloads its encoding files on first use, so it can fail offline
+        logger.warning(
+            "tiktoken encoding %s is unavailable, estimating token counts",
+            settings.chunk_tiktoken_encoding,
+            exc_info=True,
+        )
+        return None
+
+    def count_tokens(text: str) -> int:
+        return len(encoding.encode_ordinary(text))
+
+    return count_tokens
+
+
+def get_token_counter() -> Callable[[str], int]:
+    """Returns a singleton function that counts the tokens in a text."""
+    global _token_counter
+    if _token_counter is None:
+        if settings.chunk_tokenizer == "tiktoken":
+            _token_counter = load_tiktoken_counter() or estimate_tokens
+        else:
+            _token_counter = estimate_tokens
+    return _token_counter
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import urlparse
+from uuid import UUID
+
+import anyio
+from fastapi import UploadFile
+
+from bookmemory.core.settings import settings
+
+# file bookmark urls point at uploaded files, objects in S3-compatible storage, or downloads
+LOCAL_SCHEME = "local"
+S3_SCHEME = "s3"
+SUPPORTED_FILE_SCHEMES = frozenset({LOCAL_SCHEME, S3_SCHEME, "http", "https"})
+
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+# keep uploaded file names readable but safe to use as a path segment
+_UNSAFE_FILENAME_PATTERN = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+class FileTooLargeError(Exception):
+    """Raised when a file exceeds the configured maximum size."""
+
+
+@dataclass(frozen=True)
+class S3Location:
+    bucket: str
+    key: str
+
+
+def is_supported_file_url(url: str) -> bool:
+    """Returns True if a file bookmark can be loaded from the url."""
+    return urlparse(url).scheme.lower() in SUPPORTED_FILE_SCHEMES
+
+
+def _storage_root() -> Path:
+    return Path(settings.file_storage_dir).resolve()
+
+
+def resolve_local_url(*, url: str, user_id: UUID) -> Path:
+    """
+    Returns the stored file path for a local:// url.
+    Raises ValueError if the path escapes the user's storage directory.
+    """
+    parsed = urlparse(url)
+    relative_path = (parsed.netloc + parsed.path).lstrip("/")
+    user_root = (_storage_root() / str(user_id)).resolve()
+    path = (_storage_root() / relative_path).resolve()
+    if not path.is_relative_to(user_root):
+        raise ValueError("file is outside of the user's storage")
+    return path
+
+
+def parse_s3_url(*, url: str, user_id: UUID) -> S3Location:
+    """
+    Returns the bucket and key for an s3:// url.
+    Raises ValueError unless the object is under the user's prefix in the configured bucket.
+    """
+    parsed = urlparse(url)
+    key = parsed.path.lstrip("/")
+    if not settings.s3_bucket or parsed.netloc != settings.s3_bucket:
+        raise ValueError("file is outside of the configured bucket")
+    if not key.startswith(f"{user_id}/") or ".." in key.split("/"):
+        raise ValueError("file is outside of the user's storage")
+    return S3Location(bucket=parsed.netloc, key=key)
+
+
+async def save_upload(*, upload: UploadFile, user_id: UUID, bookmark_id: UUID) -> str:
+    """Streams an upload into local storage and returns its local:// url."""
+    filename = _UNSAFE_FILENAME_PATTERN.sub("-", Path(upload.filename or "").name)
+    filename = filename.strip(".-") or "upload"
+    relative_path = f"{user_id}/{bookmark_id}/{filename}"
+    path = anyio.Path(_storage_root() / relative_path)
+    await path.parent.mkdir(parents=True, exist_ok=True)
+
+    # copy the upload in chunks so large files never sit in memory
+    written_bytes = 0
+    try:
+        async with await anyio.open_file(path, "wb") as file:
+            while chunk := await upload.read(UPLOAD_CHUNK_BYTES):
+                written_bytes += len(chunk)
+                if written_bytes > settings.file_max_bytes:
+                    raise FileTooLargeError(
+                        f"file is larger than {settings.file_max_bytes} bytes"
+                    )
+                await file.write(chunk)
+    except BaseException:
+        await path.unlink(missing_ok=True)
+        raise
+
+    return f"{LOCAL_SCHEME}://{relative_path}"
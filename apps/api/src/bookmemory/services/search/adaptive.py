@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import logging
+import math
+from collections import OrderedDict
+from typing import Awaitable, Callable, Literal, TypeAlias, TypeVar
+from uuid import UUID
+
+from bookmemory.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+SearchKind: TypeAlias = Literal["semantic", "keyword", "related"]
+
+T = TypeVar("T")
+
+# expected results per candidate row before a user has any statistics
+DEFAULT_RESULT_YIELD = 0.5
+# weight of the newest search in the moving average
+YIELD_SMOOTHING = 0.3
+# start a little above the expected size so most searches need one round
+CANDIDATE_HEADROOM = 1.25
+
+# results per candidate row for each user, search kind, and filter, least recently used first
+_result_yields: OrderedDict[tuple[UUID, SearchKind, str], float] = OrderedDict()
+
+
+def initial_candidate_limit(
+    *, user_id: UUID, kind: SearchKind, filter_key: str, limit: int
+) -> int:
+    """Returns the candidate rows to fetch first, sized by the user's past result yield."""
+    result_yield = _result_yields.get((user_id, kind, filter_key), DEFAULT_RESULT_YIELD)
+    candidate_limit = math.ceil(limit * CANDIDATE_HEADROOM / max(result_yield, 0.001))
+    return max(
+        settings.search_min_candidates,
+        min(settings.search_max_candidates, candidate_limit),
+    )
+
+
+def record_result_yield(
+    *,
+    user_id: UUID,
+    kind: SearchKind,
+    filter_key: str,
+    candidate_limit: int,
+    result_count: int,
+) -> None:
+    """Adds a search's results per candidate row to the user's moving average."""
+    key = (user_id, kind, filter_key)
+    result_yield = result_count / max(1, candidate_limit)
+    previous_yield = _result_yields.get(key)
+    if previous_yield is not None:
+        result_yield = (
+            YIELD_SMOOTHING * result_yield + (1.0 - YIELD_SMOOTHING) * previous_yield
+        )
+
+    # evict the least recently used statistics past the limit
+    _result_yields[key] = result_yield
+    _result_yields.move_to_end(key)
+    while len(_result_yields) > settings.search_statistics_max_entries:
+        _result_yields.popitem(last=False)
+
+
+async def retrieve_adaptively(
+    *,
+    user_id: UUID,
+    kind: SearchKind,
+    filter_key: str,
+    limit: int,
+    fetch: Callable[[int], Awaitable[tuple[list[T], int, int]]],
+) -> list[T]:
+    """
+    Returns up to limit results, starting with a small candidate set and widening it
+    only when deduplication and filters leave too few results.
+    fetch takes a candidate row limit and returns the top results, the number of
+    results the candidates produced before the final limit, and the number of
+    candidate rows it got.
+    """
+    candidate_limit = initial_candidate_limit(
+        user_id=user_id, kind=kind, filter_key=filter_key, limit=limit
+    )
+    rounds = 0
+    while True:
+        results, result_count, candidate_row_count = await fetch(candidate_limit)
+        rounds += 1
+
+        # stop when there are enough results, the candidates ran out, or the limit is reached
+        # fewer rows than the limit means no wider candidate set can add results
+        exhausted = candidate_row_count < candidate_limit
+        if not exhausted:
+            record_result_yield(
+                user_id=user_id,
+                kind=kind,
+                filter_key=filter_key,
+                candidate_limit=candidate_limit,
+                result_count=result_count,
+            )
+        if (
+            result_count >= limit
+            or exhausted
+            or candidate_limit >= settings.search_max_candidates
+        ):
+            logger.debug(
+                "%s search fetched %d candidates in %d rounds for %d results",
+                kind,
+                candidate_limit,
+                rounds,
+                len(results),
+            )
+            return results
+
+        # widen the candidates by the growth factor, or to the expected size if that's larger
+        expected_candidate_limit = 0
+        if result_count > 0:
+            expected_candidate_limit = math.ceil(
+                limit * CANDIDATE_HEADROOM * candidate_limit / result_count
+            )
+        candidate_limit = min(
+            settings.search_max_candidates,
+            max(
+                math.ceil(candidate_limit * settings.search_candidate_growth),
+                expected_candidate_limit,
+            ),
+        )
@@ -2,19 +2,21 @@ from __future__ import annotations
 
 import re
 
+from collections.abc import Sequence
 from dataclasses import dataclass
 from uuid import UUID
 
-from sqlalchemy import and_, func, select, literal_column
+from sqlalchemy import ColumnElement, and_, func, select, literal_column
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from bookmemory.db.models.bookmark import Bookmark, BookmarkStatus
 from bookmemory.db.models.bookmark_chunk import BookmarkChunk
+from bookmemory.services.search.adaptive import retrieve_adaptively
 
 from bookmemory.services.search.stopwords import STOP_WORDS
 
 
-def _to_search_terms(search: str) -> list[str]:
+def to_search_terms(search: str) -> list[str]:
     """Converts a search query to a list of search terms"""
     if not search:
         return []
@@ -38,7 +40,6 @@ def _to_search_terms(search: str) -> list[str]:
 class KeywordSearchResult:
     bookmark_id: UUID
     chunk_id: UUID
-    chunk_text: str
     keyword_score: float  # raw ts_rank (we normalize later)
 
 
@@ -48,10 +49,16 @@ async def keyword_search(
     user_id: UUID,
     search: str,
     limit: int,
-    oversample: int = 10,  # fetch extra candidates before ranking
     language: str = "english",
+    conditions: Sequence[ColumnElement[bool]] = (),
+    filter_key: str = "",
 ) -> list[KeywordSearchResult]:
-    """Returns the best bookmark chunks ranked by Postgres full-text score."""
+    """
+    Returns the best bookmark chunks ranked by Postgres full-text score.
+    Applies the bookmark conditions before the candidate limit and widens the
+    candidate chunks until they cover enough bookmarks.
+    filter_key identifies the conditions for the user's selectivity statistics.
+    """
     # build the search vector across relevant bookmark fields and the best chunk
     search_vector = func.to_tsvector(
         language,
@@ -91,7 +98,7 @@ async def keyword_search(
     )
 
     # filter out stop words and punctuation
-    search_terms = _to_search_terms(search)
+    search_terms = to_search_terms(search)
     if not search_terms:
         return []
 
@@ -101,56 +108,78 @@ async def keyword_search(
 
     # select matching bookmark chunks and rank them by keyword score
     search_rank = func.ts_rank_cd(search_rank_vector, search_query)
-    search_chunks_statement = (
-        select(
-            BookmarkChunk.id.label("chunk_id"),
-            BookmarkChunk.bookmark_id.label("bookmark_id"),
-            BookmarkChunk.text.label("chunk_text"),
-            search_rank.label("rank"),
-            func.row_number()
-            .over(
-                partition_by=BookmarkChunk.bookmark_id,
-                order_by=search_rank.desc(),
+
+    async def fetch_candidates(
+        candidate_limit: int,
+    ) -> tuple[list[KeywordSearchResult], int, int]:
+        search_chunks_statement = (
+            select(
+                BookmarkChunk.id.label("chunk_id"),
+                BookmarkChunk.bookmark_id.label("bookmark_id"),
+                search_rank.label("rank"),
+                func.row_number()
+                .over(
+                    partition_by=BookmarkChunk.bookmark_id,
+                    order_by=search_rank.desc(),
+                )
+                .label("rn"),
             )
-            .label("rn"),
-        )
-        .join(Bookmark, Bookmark.id == BookmarkChunk.bookmark_id)
-        .where(
-            and_(
-                Bookmark.user_id == user_id,
-                Bookmark.status == BookmarkStatus.ready,
-                search_vector.op("@@")(search_query),
+            .join(Bookmark, Bookmark.id == BookmarkChunk.bookmark_id)
+            .where(
+                and_(
+                    Bookmark.user_id == user_id,
+                    Bookmark.status == BookmarkStatus.ready,
+                    search_vector.op("@@")(search_query),
+                    *conditions,
+                )
             )
+            .order_by(search_rank.desc())
+            .limit(candidate_limit)
         )
-        .order_by(search_rank.desc())
-        .limit(max(limit * oversample, 50))
-    )
-    search_results = search_chunks_statement.subquery()
-
-    # sort results by keyword score and limit to the top results
-    sort_results_statement = (
-        select(
-            search_results.c.bookmark_id,
-            search_results.c.chunk_id,
-            search_results.c.chunk_text,
-            search_results.c.rank,
+        search_results = search_chunks_statement.cte("search_results")
+
+        # sort results by keyword score and limit to the top results
+        # count the bookmarks the candidates cover before the limit, and the candidate rows
+        sort_results_statement = (
+            select(
+                search_results.c.bookmark_id,
+                search_results.c.chunk_id,
+                search_results.c.rank,
+                func.count().over().label("bookmark_count"),
+                select(func.count())
+                .select_from(search_results)
+                .scalar_subquery()
+                .label("candidate_count"),
+            )
+            .where(search_results.c.rn == 1)
+            .order_by(search_results.c.rank.desc())
+            .limit(limit)
         )
-        .where(search_results.c.rn == 1)
-        .order_by(search_results.c.rank.desc())
-        .limit(limit * oversample)
-    )
-    sorted_results = (await session.execute(sort_results_statement)).all()
-
-    # return keyword search results
-    keyword_search_results: list[KeywordSearchResult] = []
-    for search_result in sorted_results:
-        keyword_search_results.append(
-            KeywordSearchResult(
-                bookmark_id=search_result.bookmark_id,
-                chunk_id=search_result.chunk_id,
-                chunk_text=search_result.chunk_text,
-                keyword_score=float(search_result.rank or 0.0),
+        sorted_results = (await session.execute(sort_results_statement)).all()
+
+        # return keyword search results
+        keyword_search_results: list[KeywordSearchResult] = []
+        for search_result in sorted_results:
+            keyword_search_results.append(
+                KeywordSearchResult(
+                    bookmark_id=search_result.bookmark_id,
+                    chunk_id=search_result.chunk_id,
+                    keyword_score=float(search_result.rank or 0.0),
+                )
             )
+
+        if not sorted_results:
+            return [], 0, 0
+        return (
+            keyword_search_results,
+            int(sorted_results[0].bookmark_count),
+            int(sorted_results[0].candidate_count),
         )
 
-    return keyword_search_results
+    return await retrieve_adaptively(
+        user_id=user_id,
+        kind="keyword",
+        filter_key=filter_key,
+        limit=limit,
+        fetch=fetch_candidates,
+    )
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import logging
+import time
+from typing import Sequence
+from uuid import UUID
+
+import anyio
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bookmemory.core.settings import settings
+from bookmemory.db.models.bookmark_chunk import BookmarkChunk
+from bookmemory.services.ai.local.model import get_local_rerank_model
+
+logger = logging.getLogger(__name__)
+
+# cross-encoders read at most 512 tokens, so longer passages only cost transfer and tokenizing
+RERANK_PASSAGE_MAX_CHARS = 2_000
+
+# inference is cpu bound and releases the GIL, so run it in worker threads.
+# limit concurrent reranks so searches don't starve the event loop's thread pool.
+_RERANK_LIMITER = anyio.CapacityLimiter(settings.search_rerank_max_threads)
+
+
+def _predict(query: str, passages: list[str], deadline: float) -> list[float] | None:
+    """
+    Returns the sigmoid of the cross-encoder's relevance logit for each passage, or None
+    when the deadline passes first. Blocks the calling thread.
+    """
+    # torch comes with sentence-transformers
+    from torch.nn import Sigmoid
+
+    model = get_local_rerank_model()
+    # ms-marco cross-encoders return raw logits, so map them to 0..1 like the fused scores
+    activation_fn = Sigmoid()
+    batch_size = max(1, settings.search_rerank_batch_size)
+    scores: list[float] = []
+    # check the deadline between batches so a late rerank stops within one batch
+    for batch_start in range(0, len(passages), batch_size):
+        if time.monotonic() >= deadline:
+            return None
+        batch_scores = model.predict(
+            [
+                (query, passage)
+                for passage in passages[batch_start : batch_start + batch_size]
+            ],
+            batch_size=batch_size,
+            activation_fn=activation_fn,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        )
+        scores.extend(float(score) for score in batch_scores)
+    return scores
+
+
+async def rerank_chunks(
+    *,
+    session: AsyncSession,
+    query: str,
+    chunks: Sequence[tuple[UUID, str | None]],
+) -> list[float] | None:
+    """
+    Returns cross-encoder scores for the (chunk id, bookmark title) pairs in order,
+    or None when reranking runs out of time or fails.
+    """
+    if not chunks:
+        return []
+
+    # the budget covers loading the passages and waiting for a worker thread
+    deadline = time.monotonic() + settings.search_rerank_budget_ms / 1000
+
+    select_passages_statement = select(
+        BookmarkChunk.id, func.left(BookmarkChunk.text, RERANK_PASSAGE_MAX_CHARS)
+    ).where(BookmarkChunk.id.in_([chunk_id for chunk_id, _ in chunks]))
+    chunk_texts: dict[UUID, str] = {
+        chunk_id: chunk_text or ""
+        for chunk_id, chunk_text in (await session.execute(select_passages_statement))
+    }
+
+    # score the title with the chunk so short chunks still say what the bookmark is about
+    passages = [
+        "\n".join(filter(None, [title, chunk_texts.get(chunk_id, "")]))
+        for chunk_id, title in chunks
+    ]
+    try:
+        scores = await anyio.to_thread.run_sync(
+            _predict, query, passages, deadline, limiter=_RERANK_LIMITER
+        )
+    except Exception:
+        logger.warning("falling back to fused search scores", exc_info=True)
+        return None
+
+    if scores is None:
+        logger.info(
+            "reranking %d chunks ran past %.0f ms",
+            len(chunks),
+            settings.search_rerank_budget_ms,
+        )
+    return scores
+
+
+async def load_rerank_model() -> None:
+    """Loads the rerank model ahead of the first search."""
+    await anyio.to_thread.run_sync(get_local_rerank_model, limiter=_RERANK_LIMITER)
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from typing import Any, Literal
+from uuid import UUID
+
+from pydantic import TypeAdapter
+
+from bookmemory.core.settings import settings
+from bookmemory.schemas.bookmarks import BookmarkSearchResponse
+
+logger = logging.getLogger(__name__)
+
+# search responses for each user, library generation, and request, least recently used first.
+# a change to the library bumps the generation, so stale entries are never read again
+_cached_results: OrderedDict[tuple[UUID, int, str], list[BookmarkSearchResponse]] = (
+    OrderedDict()
+)
+
+_results_adapter = TypeAdapter(list[BookmarkSearchResponse])
+
+_redis_client: Any | None = None
+
+
+def search_request_key(kind: Literal["search", "related"], **request: Any) -> str:
+    """Returns a stable key for a normalized search request."""
+    payload = json.dumps(
+        {"kind": kind, **request}, sort_keys=True, separators=(",", ":"), default=str
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _get_redis_client() -> Any:
+    """Returns a singleton client for the shared result cache."""
+    global _redis_client
+    if _redis_client is None:
+        import redis.asyncio
+
+        _redis_client = redis.asyncio.Redis.from_url(settings.search_cache_redis_url)
+    return _redis_client
+
+
+def _shared_key(user_id: UUID, generation: int, request_key: str) -> str:
+    return f"bookmemory:search:{user_id}:{generation}:{request_key}"
+
+
+def _cache_locally(
+    key: tuple[UUID, int, str], results: list[BookmarkSearchResponse]
+) -> None:
+    # evict the least recently used results past the limit
+    _cached_results[key] = results
+    _cached_results.move_to_end(key)
+    while len(_cached_results) > settings.search_cache_max_entries:
+        _cached_results.popitem(last=False)
+
+
+async def get_cached_results(
+    *, user_id: UUID, generation: int, request_key: str
+) -> list[BookmarkSearchResponse] | None:
+    """Returns the cached responses for a search request, or None on a miss."""
+    key = (user_id, generation, request_key)
+    results = _cached_results.get(key)
+    if results is not None:
+        _cached_results.move_to_end(key)
+        return results
+    if not settings.search_cache_redis_url:
+        return None
+
+    # fall back to the results another worker cached. the cache is only an optimization
+    try:
+        payload = await _get_redis_client().get(
+            _shared_key(user_id, generation, request_key)
+        )
+    except Exception:
+        logger.warning("shared search cache read failed", exc_info=True)
+        return None
+    if payload is None:
+        return None
+    results = _results_adapter.validate_json(payload)
+    _cache_locally(key, results)
+    return results
+
+
+async def cache_results(
+    *,
+    user_id: UUID,
+    generation: int,
+    request_key: str,
+    results: list[BookmarkSearchResponse],
+) -> None:
+    """Caches the responses for a search request in this worker and the shared cache."""
+    if settings.search_cache_max_entries > 0:
+        _cache_locally((user_id, generation, request_key), results)
+    if not settings.search_cache_redis_url:
+        return
+
+    # old generations are never read again, so let them expire
+    try:
+        await _get_redis_client().set(
+            _shared_key(user_id, generation, request_key),
+            _results_adapter.dump_json(results),
+            ex=settings.search_cache_shared_seconds,
+        )
+    except Exception:
+        logger.warning("shared search cache write failed", exc_info=True)
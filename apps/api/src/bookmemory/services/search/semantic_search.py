@@ -1,20 +1,29 @@
 from __future__ import annotations
 
+from collections.abc import Sequence
 from dataclasses import dataclass
 from uuid import UUID
 
-from sqlalchemy import and_, func, select
+from sqlalchemy import ColumnElement, and_, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from bookmemory.db.models.bookmark import Bookmark, BookmarkStatus
 from bookmemory.db.models.bookmark_chunk import BookmarkChunk
+from bookmemory.services.ai.providers import EmbeddingArray
+from bookmemory.services.search.adaptive import retrieve_adaptively
+from bookmemory.services.search.vector_distance import (
+    embedding_distance,
+    enable_iterative_scan,
+    to_cosine_distance,
+    vector_search_conditions,
+)
+from bookmemory.services.search.vector_index import search_vector_index
 
 
 @dataclass(frozen=True)
 class SemanticSearchResult:
     bookmark_id: UUID
     chunk_id: UUID
-    chunk_text: str
     semantic_score: float  # 0..1 (higher is better)
 
 
@@ -22,67 +31,124 @@ async def semantic_search(
     *,
     session: AsyncSession,
     user_id: UUID,
-    search: list[float],
+    search: EmbeddingArray,
     limit: int,
-    oversample: int = 10,  # fetch extra candidates before ranking
+    conditions: Sequence[ColumnElement[bool]] = (),
+    filter_key: str = "",
+    generation: int | None = None,
 ) -> list[SemanticSearchResult]:
-    """Returns the best bookmark chunks ranked by semantic similarity."""
-    chunk_distance = BookmarkChunk.embedding.cosine_distance(search)
-
-    # select matching bookmark chunks and rank them by semantic distance
-    search_chunks_statement = (
-        select(
-            BookmarkChunk.id.label("chunk_id"),
-            BookmarkChunk.bookmark_id.label("bookmark_id"),
-            BookmarkChunk.text.label("chunk_text"),
-            chunk_distance.label("distance"),
-            func.row_number()
-            .over(
-                partition_by=BookmarkChunk.bookmark_id,
-                order_by=chunk_distance.asc(),
-            )
-            .label("rn"),
+    """
+    Returns the best bookmark chunks ranked by semantic similarity.
+    Applies the bookmark conditions before the nearest neighbor limit and widens the
+    candidate chunks until they cover enough bookmarks.
+    filter_key identifies the conditions for the user's selectivity statistics.
+    Searches the user's in-memory index for a library generation when it fits.
+    """
+    # answer from the in-memory index, or fall back to postgres when it's disabled or too large
+    if generation is not None:
+        index_matches = await search_vector_index(
+            session=session,
+            user_id=user_id,
+            generation=generation,
+            search=search,
+            limit=limit,
+            conditions=conditions,
         )
-        .join(Bookmark, Bookmark.id == BookmarkChunk.bookmark_id)
-        .where(
-            and_(
+        if index_matches is not None:
+            return [
+                SemanticSearchResult(
+                    bookmark_id=index_match.bookmark_id,
+                    chunk_id=index_match.chunk_id,
+                    semantic_score=max(0.0, min(1.0, 1.0 - index_match.distance)),
+                )
+                for index_match in index_matches
+            ]
+
+    chunk_distance = embedding_distance(search)
+
+    async def fetch_candidates(
+        candidate_limit: int,
+    ) -> tuple[list[SemanticSearchResult], int, int]:
+        # prefilter candidates by hamming distance when the binary search mode is enabled
+        search_conditions = await vector_search_conditions(
+            session=session,
+            search=search,
+            conditions=[
                 Bookmark.user_id == user_id,
                 Bookmark.status == BookmarkStatus.ready,
-                BookmarkChunk.embedding.isnot(None),
+                *conditions,
+            ],
+            limit=candidate_limit,
+        )
+
+        # select matching bookmark chunks and rank them by semantic distance
+        search_chunks_statement = (
+            select(
+                BookmarkChunk.id.label("chunk_id"),
+                BookmarkChunk.bookmark_id.label("bookmark_id"),
+                chunk_distance.label("distance"),
+                func.row_number()
+                .over(
+                    partition_by=BookmarkChunk.bookmark_id,
+                    order_by=chunk_distance.asc(),
+                )
+                .label("rn"),
             )
+            .join(Bookmark, Bookmark.id == BookmarkChunk.bookmark_id)
+            .where(and_(*search_conditions))
+            .order_by(chunk_distance.asc())
+            .limit(candidate_limit)
         )
-        .order_by(chunk_distance.asc())
-        .limit(max(limit * oversample, 50))
-    )
 
-    # sort results by semantic distance and limit to the top results
-    search_results = search_chunks_statement.subquery()
-    sort_results_statement = (
-        select(
-            search_results.c.bookmark_id,
-            search_results.c.chunk_id,
-            search_results.c.chunk_text,
-            search_results.c.distance,
+        # sort results by semantic distance and limit to the top results
+        # count the bookmarks the candidates cover before the limit, and the candidate rows
+        # the cte scans the index once for both
+        search_results = search_chunks_statement.cte("search_results")
+        sort_results_statement = (
+            select(
+                search_results.c.bookmark_id,
+                search_results.c.chunk_id,
+                search_results.c.distance,
+                func.count().over().label("bookmark_count"),
+                select(func.count())
+                .select_from(search_results)
+                .scalar_subquery()
+                .label("candidate_count"),
+            )
+            .where(search_results.c.rn == 1)
+            .order_by(search_results.c.distance.asc())
+            .limit(limit)
         )
-        .where(search_results.c.rn == 1)
-        .order_by(search_results.c.distance.asc())
-        .limit(limit * oversample)
-    )
-    sorted_results = (await session.execute(sort_results_statement)).all()
+        sorted_results = (await session.execute(sort_results_statement)).all()
 
-    # return keyword search results
-    semantic_search_results: list[SemanticSearchResult] = []
-    for search_result in sorted_results:
-        distance = float(search_result.distance or 1.0)
-        semantic_score = max(0.0, min(1.0, 1.0 - distance))
+        # return semantic search results
+        semantic_search_results: list[SemanticSearchResult] = []
+        for search_result in sorted_results:
+            distance = to_cosine_distance(float(search_result.distance))
+            semantic_score = max(0.0, min(1.0, 1.0 - distance))
 
-        semantic_search_results.append(
-            SemanticSearchResult(
-                bookmark_id=search_result.bookmark_id,
-                chunk_id=search_result.chunk_id,
-                chunk_text=search_result.chunk_text,
-                semantic_score=semantic_score,
+            semantic_search_results.append(
+                SemanticSearchResult(
+                    bookmark_id=search_result.bookmark_id,
+                    chunk_id=search_result.chunk_id,
+                    semantic_score=semantic_score,
+                )
             )
+
+        if not sorted_results:
+            return [], 0, 0
+        return (
+            semantic_search_results,
+            int(sorted_results[0].bookmark_count),
+            int(sorted_results[0].candidate_count),
         )
 
-    return semantic_search_results
+    # the setting lasts for the transaction, so every round scans iteratively
+    await enable_iterative_scan(session=session)
+    return await retrieve_adaptively(
+        user_id=user_id,
+        kind="semantic",
+        filter_key=filter_key,
+        limit=limit,
+        fetch=fetch_candidates,
+    )
@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import logging
+import re
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from typing import cast
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import ColumnElement, case, func, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bookmemory.core.settings import settings
+from bookmemory.db.models.bookmark_chunk import BookmarkChunk
+from bookmemory.services.ai.providers import EmbeddingArray
+from bookmemory.services.embedding.chunk_embed import embed_chunks
+from bookmemory.services.extraction.text_chunk import iter_sentence_spans
+
+logger = logging.getLogger(__name__)
+
+# characters in a search result snippet, including the ellipsis
+SEARCH_SNIPPET_LENGTH = 320
+RELATED_SNIPPET_LENGTH = 240
+ELLIPSIS = "…"
+
+# private use characters that can't appear in extracted text mark the ts_headline matches
+HIGHLIGHT_START = "\ue000"
+HIGHLIGHT_STOP = "\ue001"
+HEADLINE_OPTIONS = (
+    f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, "
+    'MaxFragments=2, MaxWords=30, MinWords=12, ShortWord=2, FragmentDelimiter=" … "'
+)
+
+# sentences per chunk to embed when choosing the best sentence for a semantic snippet
+MAXIMUM_SNIPPET_SENTENCES = 12
+# sentences per request, so a long page of results embeds only its best ranked chunks
+MAXIMUM_REQUEST_SNIPPET_SENTENCES = 48
+
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+@dataclass(frozen=True)
+class Snippet:
+    text: str
+    # [start, end) character offsets of the matching text in the snippet
+    highlights: list[tuple[int, int]] = field(default_factory=list)
+
+
+def chunk_snippet(max_length: int) -> ColumnElement[str]:
+    """Returns the start of the chunk text on one line, ending in an ellipsis when cut."""
+    snippet_text = func.btrim(
+        func.replace(BookmarkChunk.text, "\n", " "), literal(" \t\r")
+    )
+    return cast(
+        ColumnElement[str],
+        case(
+            (func.length(snippet_text) <= max_length, snippet_text),
+            else_=func.left(snippet_text, max_length - 1).op("||")(ELLIPSIS),
+        ),
+    )
+
+
+async def get_chunk_snippets(
+    *,
+    session: AsyncSession,
+    chunk_ids: Sequence[UUID],
+    max_length: int,
+) -> dict[UUID, Snippet]:
+    """
+    Returns leading snippets for the chunks of the final search results mapped to their ids.
+    Only the snippet characters leave the database.
+    """
+    if not chunk_ids:
+        return {}
+
+    select_snippets_statement = select(
+        BookmarkChunk.id, chunk_snippet(max_length)
+    ).where(BookmarkChunk.id.in_(list(chunk_ids)))
+    snippet_rows = (await session.execute(select_snippets_statement)).all()
+    return {chunk_id: Snippet(text=snippet) for chunk_id, snippet in snippet_rows}
+
+
+def _clip_snippet(
+    text: str, highlights: list[tuple[int, int]], max_length: int
+) -> Snippet:
+    """Returns the snippet cut to max_length with the highlights that still fit."""
+    if len(text) <= max_length:
+        return Snippet(text=text, highlights=highlights)
+    cut = max_length - len(ELLIPSIS)
+    return Snippet(
+        text=text[:cut].rstrip() + ELLIPSIS,
+        highlights=[(start, min(end, cut)) for start, end in highlights if start < cut],
+    )
+
+
+def parse_headline(headline: str, max_length: int) -> Snippet:
+    """Returns a ts_headline result as snippet text and highlight offsets."""
+    text_parts: list[str] = []
+    highlights: list[tuple[int, int]] = []
+    text_length = 0
+    highlight_start: int | None = None
+    for part in re.split(f"({HIGHLIGHT_START}|{HIGHLIGHT_STOP})", headline):
+        if part == HIGHLIGHT_START:
+            highlight_start = text_length
+        elif part == HIGHLIGHT_STOP:
+            if highlight_start is not None and text_length > highlight_start:
+                highlights.append((highlight_start, text_length))
+            highlight_start = None
+        else:
+            # keep the snippet on one line without changing the offsets already found
+            part = _WHITESPACE_PATTERN.sub(" ", part)
+            if not text_parts:
+                part = part.lstrip()
+            text_parts.append(part)
+            text_length += len(part)
+
+    text = "".join(text_parts)
+    trimmed_text = text.rstrip()
+    highlights = [
+        (start, min(end, len(trimmed_text)))
+        for start, end in highlights
+        if start < len(trimmed_text)
+    ]
+    return _clip_snippet(trimmed_text, highlights, max_length)
+
+
+async def get_keyword_snippets(
+    *,
+    session: AsyncSession,
+    chunk_ids: Sequence[UUID],
+    search_terms: Sequence[str],
+    language: str,
+    max_length: int,
+) -> dict[UUID, Snippet]:
+    """Returns snippets around the search term matches with ts_headline, mapped to chunk ids."""
+    if not chunk_ids or not search_terms:
+        return {}
+
+    # highlight any matching term, not only chunks with every term
+    headline_query = func.to_tsquery(
+        language, " | ".join(f"{term}:*" for term in search_terms)
+    )
+    select_headlines_statement = select(
+        BookmarkChunk.id,
+        func.ts_headline(
+            language, BookmarkChunk.text, headline_query, HEADLINE_OPTIONS
+        ),
+    ).where(BookmarkChunk.id.in_(list(chunk_ids)))
+    headline_rows = (await session.execute(select_headlines_statement)).all()
+    return {
+        chunk_id: parse_headline(headline, max_length)
+        for chunk_id, headline in headline_rows
+    }
+
+
+def sentence_window(text: str, *, start: int, end: int, max_length: int) -> Snippet:
+    """Returns a snippet of the text centered on a highlighted span."""
+    if len(text) <= max_length:
+        return Snippet(text=text, highlights=[(start, end)])
+
+    # leave room for an ellipsis on both sides and center the span in the rest
+    budget = max_length - 2 * len(ELLIPSIS)
+    context = max(0, budget - (end - start))
+    window_start = max(0, start - context // 2)
+    window_end = min(len(text), window_start + budget)
+    window_start = max(0, window_end - budget)
+
+    # start the window on a word boundary before the span
+    if window_start > 0:
+        space_index = text.find(" ", window_start, start)
+        if space_index != -1:
+            window_start = space_index + 1
+
+    prefix = ELLIPSIS if window_start > 0 else ""
+    suffix = ELLIPSIS if window_end < len(text) else ""
+    offset = len(prefix) - window_start
+    return Snippet(
+        text=prefix + text[window_start:window_end] + suffix,
+        highlights=[(start + offset, min(end, window_end) + offset)],
+    )
+
+
+def _cosine_similarities(query: EmbeddingArray, vectors: EmbeddingArray) -> list[float]:
+    """Returns the cosine similarity of each row of vectors to the query."""
+    norms = np.linalg.norm(vectors, axis=1) * np.linalg.norm(query)
+    dots = vectors @ query
+    return cast(
+        list[float],
+        np.divide(dots, norms, out=np.zeros_like(dots), where=norms > 0).tolist(),
+    )
+
+
+async def get_semantic_snippets(
+    *,
+    session: AsyncSession,
+    chunk_ids: Sequence[UUID],
+    query_embedding: EmbeddingArray,
+    max_length: int,
+) -> dict[UUID, Snippet]:
+    """
+    Returns snippets centered on the sentence closest to the query, mapped to chunk ids.
+    Embeds the sentences of the returned chunks in rank order up to a per-request
+    budget, and falls back to leading snippets past it or if the sentences can't be
+    embedded.
+    """
+    if not chunk_ids or not settings.search_semantic_snippets:
+        return await get_chunk_snippets(
+            session=session, chunk_ids=chunk_ids, max_length=max_length
+        )
+
+    select_chunks_statement = select(BookmarkChunk.id, BookmarkChunk.text).where(
+        BookmarkChunk.id.in_(list(chunk_ids))
+    )
+    chunk_rows = (await session.execute(select_chunks_statement)).all()
+
+    # collect the leading sentences of each chunk on one line, best ranked chunks first
+    chunk_texts: dict[UUID, str] = {
+        chunk_id: _WHITESPACE_PATTERN.sub(" ", chunk_text or "").strip()
+        for chunk_id, chunk_text in chunk_rows
+    }
+    chunk_sentences: list[tuple[UUID, int, int]] = []
+    for chunk_id in chunk_ids:
+        text = chunk_texts.get(chunk_id)
+        if text is None:
+            continue
+        sentence_budget = min(
+            MAXIMUM_SNIPPET_SENTENCES,
+            MAXIMUM_REQUEST_SNIPPET_SENTENCES - len(chunk_sentences),
+        )
+        for sentence_number, (start, end) in enumerate(iter_sentence_spans(text)):
+            if sentence_number >= sentence_budget:
+                break
+            chunk_sentences.append((chunk_id, start, end))
+
+    try:
+        sentence_embeddings = await embed_chunks(
+            [
+                chunk_texts[chunk_id][start:end]
+                for chunk_id, start, end in chunk_sentences
+            ],
+            interactive=True,
+        )
+    except Exception:
+        logger.warning("falling back to leading snippets", exc_info=True)
+        return await get_chunk_snippets(
+            session=session, chunk_ids=chunk_ids, max_length=max_length
+        )
+
+    # keep the closest sentence for each chunk
+    best_sentences: dict[UUID, tuple[float, int, int]] = {}
+    for (chunk_id, start, end), similarity in zip(
+        chunk_sentences, _cosine_similarities(query_embedding, sentence_embeddings)
+    ):
+        best_sentence = best_sentences.get(chunk_id)
+        if best_sentence is None or similarity > best_sentence[0]:
+            best_sentences[chunk_id] = (similarity, start, end)
+
+    snippets: dict[UUID, Snippet] = {}
+    for chunk_id, text in chunk_texts.items():
+        best_sentence = best_sentences.get(chunk_id)
+        if best_sentence is None:
+            snippets[chunk_id] = _clip_snippet(text, [], max_length)
+            continue
+        _, start, end = best_sentence
+        snippets[chunk_id] = sentence_window(
+            text, start=start, end=end, max_length=max_length
+        )
+    return snippets
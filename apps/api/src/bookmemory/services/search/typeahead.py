@@ -0,0 +1,326 @@
+from __future__ import annotations
+
+import heapq
+from bisect import bisect_left, bisect_right
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Any, Sequence
+from uuid import UUID
+
+import anyio
+from sqlalchemy import Row, and_, any_, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import ColumnElement
+
+from bookmemory.core.settings import settings
+from bookmemory.db.models.bookmark import Bookmark
+from bookmemory.db.models.tag import Tag
+from bookmemory.services.bookmarks.library_generation import get_library_generation
+
+# the default pg_trgm.similarity_threshold used by the % operator
+SIMILARITY_THRESHOLD = 0.3
+
+
+@dataclass(frozen=True)
+class TypeaheadMatch:
+    bookmark_id: UUID
+    title: str
+    url: str | None
+    type: str
+
+
+@dataclass(frozen=True)
+class TypeaheadEntry:
+    """Holds a bookmark's typeahead fields, lowercased and split into trigrams once."""
+
+    match: TypeaheadMatch
+    title: str
+    # title, url, and tag names separated by tabs, which a normalized query can't contain
+    text: str
+    title_trigrams: frozenset[str]
+
+
+@dataclass(frozen=True)
+class TypeaheadIndex:
+    """Holds a user's typeahead entries with lookups for prefix, substring, and fuzzy matches."""
+
+    entries: tuple[TypeaheadEntry, ...]
+    # entry positions ordered by title, for title prefixes
+    title_order: list[int]
+    sorted_titles: list[str]
+    # entry positions that have each title trigram
+    trigram_entries: dict[str, list[int]]
+    # every entry's text on its own line, so one scan finds the substring matches
+    text: str
+    line_starts: list[int]
+
+
+@dataclass(frozen=True)
+class TypeaheadLibrary:
+    """Holds a user's typeahead index for one library generation."""
+
+    generation: int
+    # None when the library is too large to hold and typeahead searches postgres
+    index: TypeaheadIndex | None
+
+
+# typeahead libraries of the most recent users in this worker, least recently used first
+_warm_libraries: OrderedDict[UUID, TypeaheadLibrary] = OrderedDict()
+
+
+def normalize_typeahead_query(query: str) -> str:
+    """Returns the query lowercased with its whitespace collapsed."""
+    return " ".join(query.lower().split())
+
+
+def trigrams(text: str) -> frozenset[str]:
+    """Returns the trigrams pg_trgm extracts from lowercased text."""
+    # pg_trgm splits on anything but letters and digits and pads each word
+    words = "".join(
+        character if character.isalnum() else " " for character in text
+    ).split()
+    return frozenset(
+        padded_word[start : start + 3]
+        for word in words
+        for padded_word in [f"  {word} "]
+        for start in range(len(padded_word) - 2)
+    )
+
+
+def similarity(first: frozenset[str], second: frozenset[str]) -> float:
+    """Returns the pg_trgm similarity of two trigram sets."""
+    shared = len(first & second)
+    total = len(first) + len(second) - shared
+    return shared / total if total else 0.0
+
+
+def to_typeahead_entry(
+    *,
+    bookmark_id: UUID,
+    title: str,
+    url: str | None,
+    type: str,
+    tag_names: Sequence[str],
+) -> TypeaheadEntry:
+    """Returns a bookmark's typeahead entry."""
+    lower_title = title.lower()
+    # tabs keep the fields and any line breaks in them from matching a query
+    text = "\t".join([lower_title, (url or "").lower(), *tag_names]).lower()
+    return TypeaheadEntry(
+        match=TypeaheadMatch(bookmark_id=bookmark_id, title=title, url=url, type=type),
+        title=lower_title,
+        text=text.replace("\n", "\t"),
+        title_trigrams=trigrams(lower_title),
+    )
+
+
+def build_typeahead_index(entries: Sequence[TypeaheadEntry]) -> TypeaheadIndex:
+    """Returns the typeahead lookups for a user's entries."""
+    title_order = sorted(
+        range(len(entries)), key=lambda position: entries[position].title
+    )
+    trigram_entries: dict[str, list[int]] = {}
+    line_starts: list[int] = []
+    line_start = 0
+    for position, entry in enumerate(entries):
+        for trigram in entry.title_trigrams:
+            trigram_entries.setdefault(trigram, []).append(position)
+        line_starts.append(line_start)
+        line_start += len(entry.text) + 1
+    return TypeaheadIndex(
+        entries=tuple(entries),
+        title_order=title_order,
+        sorted_titles=[entries[position].title for position in title_order],
+        trigram_entries=trigram_entries,
+        text="\n".join(entry.text for entry in entries),
+        line_starts=line_starts,
+    )
+
+
+def _like_pattern(query: str) -> str:
+    """Returns the query with the LIKE wildcards escaped."""
+    return query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def match_entries(
+    index: TypeaheadIndex, *, query: str, limit: int
+) -> list[TypeaheadMatch]:
+    """Returns the entries matching the query, ranked like the postgres query."""
+    entries = index.entries
+    query_trigrams = trigrams(query)
+
+    def title_similarity(position: int) -> float:
+        return similarity(entries[position].title_trigrams, query_trigrams)
+
+    def rank(position: int) -> tuple[bool, float, str, UUID]:
+        entry = entries[position]
+        return (
+            not entry.title.startswith(query),
+            -title_similarity(position),
+            entry.title,
+            entry.match.bookmark_id,
+        )
+
+    # title prefixes rank first, so enough of them answer the query without other matches
+    prefix_start = bisect_left(index.sorted_titles, query)
+    prefix_end = bisect_left(index.sorted_titles, query + chr(0x10FFFF), prefix_start)
+    if prefix_end - prefix_start >= limit:
+        prefix_positions = index.title_order[prefix_start:prefix_end]
+        return [
+            entries[position].match
+            for position in heapq.nsmallest(limit, prefix_positions, key=rank)
+        ]
+
+    # fuzzy title matches share enough trigrams with the query
+    matched_positions: set[int] = set()
+    shared_counts: Counter[int] = Counter()
+    for trigram in query_trigrams:
+        shared_counts.update(index.trigram_entries.get(trigram, ()))
+    for position, shared in shared_counts.items():
+        total = len(query_trigrams) + len(entries[position].title_trigrams) - shared
+        if shared / total >= SIMILARITY_THRESHOLD:
+            matched_positions.add(position)
+
+    # substring matches anywhere in the title, url, or tag names. skip to the next line after a match
+    text_position = index.text.find(query)
+    while text_position != -1:
+        position = bisect_right(index.line_starts, text_position) - 1
+        matched_positions.add(position)
+        if position + 1 >= len(index.line_starts):
+            break
+        text_position = index.text.find(query, index.line_starts[position + 1])
+
+    return [
+        entries[position].match
+        for position in heapq.nsmallest(limit, matched_positions, key=rank)
+    ]
+
+
+async def _search_postgres(
+    *, session: AsyncSession, user_id: UUID, query: str, limit: int
+) -> list[TypeaheadMatch]:
+    """Returns the matching bookmarks using the user's trigram indexes."""
+    pattern = f"%{_like_pattern(query)}%"
+    title = func.lower(Bookmark.title)
+    title_similarity = func.similarity(title, query)
+
+    # ids of the user's tags with a matching name, for the tag_ids GIN index
+    matching_tag_ids = (
+        select(func.array_agg(Tag.id))
+        .where(and_(Tag.user_id == user_id, func.lower(Tag.name).like(pattern)))
+        .scalar_subquery()
+    )
+    match_condition: ColumnElement[bool] = or_(
+        title.like(pattern),
+        func.lower(Bookmark.url).like(pattern),
+        title.bool_op("%")(query),
+        Bookmark.tag_ids.overlap(matching_tag_ids),
+    )
+
+    # title prefixes first, then the closest titles. sort titles by code point like python
+    select_matches_statement = (
+        select(Bookmark.id, Bookmark.title, Bookmark.url, Bookmark.type)
+        .where(and_(Bookmark.user_id == user_id, match_condition))
+        .order_by(
+            title.like(f"{_like_pattern(query)}%").desc(),
+            title_similarity.desc(),
+            title.collate("C"),
+            Bookmark.id,
+        )
+        .limit(limit)
+    )
+    match_rows = (await session.execute(select_matches_statement)).all()
+    return [
+        TypeaheadMatch(
+            bookmark_id=match_row.id,
+            title=match_row.title,
+            url=match_row.url,
+            type=match_row.type.value,
+        )
+        for match_row in match_rows
+    ]
+
+
+def _index_entry_rows(entry_rows: Sequence[Row[Any]]) -> TypeaheadIndex:
+    """Returns the typeahead index of a user's bookmark rows. Blocks the calling thread."""
+    return build_typeahead_index(
+        [
+            to_typeahead_entry(
+                bookmark_id=entry_row.id,
+                title=entry_row.title,
+                url=entry_row.url,
+                type=entry_row.type.value,
+                tag_names=entry_row.tag_names or (),
+            )
+            for entry_row in entry_rows
+        ]
+    )
+
+
+async def _load_library(
+    *, session: AsyncSession, user_id: UUID, generation: int
+) -> TypeaheadLibrary:
+    """Returns a user's typeahead index, or a library without one when it's too large."""
+    count_statement = select(func.count()).where(Bookmark.user_id == user_id)
+    bookmark_count = int(await session.scalar(count_statement) or 0)
+    if bookmark_count > settings.typeahead_cache_max_bookmarks:
+        return TypeaheadLibrary(generation=generation, index=None)
+
+    # read each bookmark's tag names from its tag ids without joining bookmark_tags
+    tag_names = (
+        select(func.array_agg(Tag.name))
+        .where(Tag.id == any_(Bookmark.tag_ids))
+        .correlate(Bookmark)
+        .scalar_subquery()
+    )
+    select_entries_statement = select(
+        Bookmark.id,
+        Bookmark.title,
+        Bookmark.url,
+        Bookmark.type,
+        tag_names.label("tag_names"),
+    ).where(Bookmark.user_id == user_id)
+    entry_rows = (await session.execute(select_entries_statement)).all()
+
+    # splitting a large library into trigrams takes a while, so do it off the event loop
+    index = await anyio.to_thread.run_sync(_index_entry_rows, entry_rows)
+    return TypeaheadLibrary(generation=generation, index=index)
+
+
+async def search_typeahead(
+    *, session: AsyncSession, user_id: UUID, query: str, limit: int
+) -> list[TypeaheadMatch]:
+    """
+    Returns the user's bookmarks whose title, url, or tag names contain the query,
+    or whose title is close to it, with title prefixes first. Recent users' libraries
+    are matched in memory until their bookmarks change.
+    """
+    query = normalize_typeahead_query(query)
+    if not query:
+        return []
+    if settings.typeahead_cache_max_users <= 0:
+        return await _search_postgres(
+            session=session, user_id=user_id, query=query, limit=limit
+        )
+
+    # load the library again after any bookmark change
+    generation = await get_library_generation(session=session, user_id=user_id)
+    library = _warm_libraries.get(user_id)
+    if library is None or library.generation != generation:
+        library = await _load_library(
+            session=session, user_id=user_id, generation=generation
+        )
+        # keep a newer library another request loaded in the meantime
+        cached_library = _warm_libraries.get(user_id)
+        if cached_library is None or cached_library.generation <= generation:
+            _warm_libraries[user_id] = library
+        while len(_warm_libraries) > settings.typeahead_cache_max_users:
+            _warm_libraries.popitem(last=False)
+    if user_id in _warm_libraries:
+        _warm_libraries.move_to_end(user_id)
+
+    if library.index is None:
+        return await _search_postgres(
+            session=session, user_id=user_id, query=query, limit=limit
+        )
+    return match_entries(library.index, query=query, limit=limit)
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+from typing import Any, Sequence, cast
+
+import sqlalchemy as sa
+from sqlalchemy import ColumnElement, Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from pgvector.sqlalchemy import BIT
+
+from bookmemory.core.settings import settings
+from bookmemory.db.embedding_schema import has_binary_column
+from bookmemory.services.ai.providers import EmbeddingArray
+from bookmemory.db.models.bookmark import Bookmark
+from bookmemory.db.models.bookmark_chunk import (
+    EMBEDDING_DIM,
+    BookmarkChunk,
+    embedding_type,
+)
+
+# hnsw index scans return at most hnsw.ef_search rows
+DEFAULT_HNSW_EF_SEARCH = 40
+MAXIMUM_HNSW_EF_SEARCH = 1000
+
+# the opt-in binary quantized column maintained by postgres, which the chunk model doesn't map
+EMBEDDING_BINARY = sa.literal_column(
+    "bookmark_chunks.embedding_binary", type_=BIT(EMBEDDING_DIM)
+)
+
+
+def embedding_distance(search: EmbeddingArray) -> ColumnElement[float]:
+    """
+    Returns the exact distance between chunk embeddings and a query embedding that the
+    hnsw index orders by. Convert its values with to_cosine_distance.
+    """
+    # the negative inner product of unit length embeddings is the cosine distance minus 1
+    if settings.vector_distance == "inner_product":
+        return cast(
+            ColumnElement[float], BookmarkChunk.embedding.max_inner_product(search)
+        )
+    return cast(ColumnElement[float], BookmarkChunk.embedding.cosine_distance(search))
+
+
+def to_cosine_distance(distance: float) -> float:
+    """Returns the cosine distance for a value of embedding_distance."""
+    if settings.vector_distance == "inner_product":
+        return distance + 1.0
+    return distance
+
+
+def from_cosine_distance(cosine_distance: float) -> float:
+    """Returns the value of embedding_distance for a cosine distance."""
+    if settings.vector_distance == "inner_product":
+        return cosine_distance - 1.0
+    return cosine_distance
+
+
+def _binary_distance(search: EmbeddingArray) -> ColumnElement[float]:
+    """Returns the hamming distance between binary quantized chunk embeddings and a query embedding."""
+    # cast the query so postgres can pick the matching binary_quantize overload
+    binary_search = func.binary_quantize(
+        sa.cast(search, embedding_type()), type_=BIT(EMBEDDING_DIM)
+    )
+    return cast(
+        ColumnElement[float],
+        EMBEDDING_BINARY.hamming_distance(binary_search),
+    )
+
+
+def binary_candidate_chunk_ids(
+    *,
+    search: EmbeddingArray,
+    conditions: Sequence[ColumnElement[bool]],
+    limit: int,
+) -> Select[Any]:
+    """Returns the ids of the chunks closest to the query by hamming distance for an exact rerank."""
+    return (
+        select(BookmarkChunk.id)
+        .join(Bookmark, Bookmark.id == BookmarkChunk.bookmark_id)
+        .where(EMBEDDING_BINARY.isnot(None), *conditions)
+        .order_by(_binary_distance(search).asc())
+        .limit(limit * max(1, settings.vector_binary_oversample))
+        .correlate(None)  # the outer query selects from the same tables
+    )
+
+
+async def enable_iterative_scan(*, session: AsyncSession) -> None:
+    """
+    Enables iterative index scans for the rest of the transaction, so the filters of
+    a vector search don't cut its results short. Call once before the search rounds.
+    """
+    # filtered hnsw scans stop at hnsw.ef_search rows unless iterative scans are enabled
+    if settings.vector_iterative_scan != "off":
+        await session.execute(
+            select(
+                func.set_config(
+                    "hnsw.iterative_scan", settings.vector_iterative_scan, True
+                )
+            )
+        )
+
+
+async def vector_search_conditions(
+    *,
+    session: AsyncSession,
+    search: EmbeddingArray,
+    conditions: Sequence[ColumnElement[bool]],
+    limit: int,
+) -> list[ColumnElement[Any]]:
+    """
+    Returns the chunk filters for a vector search.
+    Adds a binary quantized prefilter when the binary search mode is enabled and the
+    binary column exists.
+    """
+    vector_conditions: list[ColumnElement[Any]] = [
+        *conditions,
+        BookmarkChunk.embedding.isnot(None),
+    ]
+
+    if settings.vector_search_mode != "binary" or not await has_binary_column(
+        await session.connection()
+    ):
+        return vector_conditions
+
+    # widen the hnsw candidate list for this transaction so the prefilter returns enough rows
+    candidate_limit = limit * max(1, settings.vector_binary_oversample)
+    ef_search = min(
+        MAXIMUM_HNSW_EF_SEARCH, max(DEFAULT_HNSW_EF_SEARCH, candidate_limit)
+    )
+    await session.execute(
+        select(func.set_config("hnsw.ef_search", str(ef_search), True))
+    )
+
+    vector_conditions.append(
+        BookmarkChunk.id.in_(
+            binary_candidate_chunk_ids(
+                search=search, conditions=conditions, limit=limit
+            )
+        )
+    )
+    return vector_conditions
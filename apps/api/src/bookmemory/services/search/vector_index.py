@@ -0,0 +1,367 @@
+from __future__ import annotations
+
+import logging
+from collections import OrderedDict
+from collections.abc import Sequence
+from dataclasses import dataclass
+from functools import partial
+from typing import Any
+from uuid import UUID
+
+import anyio
+import numpy as np
+from sqlalchemy import ColumnElement, False_, True_, Row, and_, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bookmemory.core.settings import settings
+from bookmemory.db.models.bookmark import Bookmark, BookmarkStatus
+from bookmemory.db.models.bookmark_chunk import BookmarkChunk
+from bookmemory.services.ai.providers import EmbeddingArray
+
+logger = logging.getLogger(__name__)
+
+# users remembered as too large to index, so their searches skip the chunk count
+MAXIMUM_OVERSIZED_USERS = 10_000
+
+# float16 rows converted to float32 at a time, small enough to stay in the cpu cache
+FLOAT16_BLOCK_ROWS = 256
+
+
+@dataclass(frozen=True)
+class VectorIndexMatch:
+    bookmark_id: UUID
+    chunk_id: UUID
+    distance: float  # cosine distance, 0..2 (lower is better)
+
+
+@dataclass(frozen=True)
+class UserVectorIndex:
+    """Holds a user's ready chunk embeddings as unit rows, grouped by bookmark."""
+
+    generation: int
+    embeddings: Any  # (chunks, dimensions) float32 or float16 matrix
+    chunk_ids: list[UUID]
+    chunk_bookmarks: Any  # bookmark position of each chunk
+    bookmark_starts: Any  # first chunk position of each bookmark
+    bookmark_ids: list[UUID]
+    bookmark_positions: dict[UUID, int]
+
+    @property
+    def nbytes(self) -> int:
+        """Returns the memory held by the index arrays."""
+        return int(
+            self.embeddings.nbytes
+            + self.chunk_bookmarks.nbytes
+            + self.bookmark_starts.nbytes
+        )
+
+
+# each user's index, least recently used first, and the bytes they hold together
+_user_indexes: OrderedDict[UUID, UserVectorIndex] = OrderedDict()
+_indexed_bytes = 0
+
+# the library generation each oversized user was counted at, least recently used first
+_oversized_users: OrderedDict[UUID, int] = OrderedDict()
+
+# one index load per user at a time, so concurrent searches share the first load
+_load_locks: dict[UUID, anyio.Lock] = {}
+
+
+def _memory_budget() -> int:
+    return settings.vector_index_memory_mb * 1024 * 1024
+
+
+def _index_dtype() -> Any:
+    return np.float16 if settings.vector_index_dtype == "float16" else np.float32
+
+
+def _unit_rows(vectors: Any) -> Any:
+    """Returns float32 vectors scaled to unit length, so a dot product is cosine similarity."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, np.finfo(np.float32).tiny)
+
+
+def _chunk_scores(embeddings: Any, query: Any) -> Any:
+    """Returns the float32 dot product of every embedding row with a float32 query."""
+    if embeddings.dtype == np.float32:
+        return embeddings @ query
+
+    # numpy multiplies float16 without blas, so convert small blocks and use float32
+    scores = np.empty(len(embeddings), dtype=np.float32)
+    for start in range(0, len(embeddings), FLOAT16_BLOCK_ROWS):
+        end = start + FLOAT16_BLOCK_ROWS
+        np.matmul(
+            embeddings[start:end].astype(np.float32), query, out=scores[start:end]
+        )
+    return scores
+
+
+def _store_index(user_id: UUID, index: UserVectorIndex) -> None:
+    global _indexed_bytes
+    previous_index = _user_indexes.pop(user_id, None)
+    if previous_index is not None:
+        _indexed_bytes -= previous_index.nbytes
+    _user_indexes[user_id] = index
+    _indexed_bytes += index.nbytes
+
+    # evict the least recently searched users past the memory budget
+    while _indexed_bytes > _memory_budget() and len(_user_indexes) > 1:
+        _, evicted_index = _user_indexes.popitem(last=False)
+        _indexed_bytes -= evicted_index.nbytes
+
+
+def _remember_oversized(user_id: UUID, generation: int) -> None:
+    _oversized_users[user_id] = generation
+    _oversized_users.move_to_end(user_id)
+    while len(_oversized_users) > MAXIMUM_OVERSIZED_USERS:
+        _oversized_users.popitem(last=False)
+
+
+def _ready_chunk_conditions(user_id: UUID) -> list[ColumnElement[bool]]:
+    return [
+        Bookmark.user_id == user_id,
+        Bookmark.status == BookmarkStatus.ready,
+        BookmarkChunk.embedding.isnot(None),
+    ]
+
+
+async def _load_user_index(
+    *, session: AsyncSession, user_id: UUID, generation: int
+) -> UserVectorIndex | None:
+    """Returns a new index of the user's ready chunks, or None when they don't fit."""
+    # count first so an oversized library is never read
+    count_chunks_statement = (
+        select(func.count())
+        .select_from(BookmarkChunk)
+        .join(Bookmark, Bookmark.id == BookmarkChunk.bookmark_id)
+        .where(and_(*_ready_chunk_conditions(user_id)))
+    )
+    chunk_count = int(await session.scalar(count_chunks_statement) or 0)
+    index_bytes = (
+        chunk_count * settings.embedding_dim * np.dtype(_index_dtype()).itemsize
+    )
+    if chunk_count > settings.vector_index_max_chunks or index_bytes > _memory_budget():
+        _remember_oversized(user_id, generation)
+        return None
+
+    # read the chunks in bookmark order so each bookmark's chunks are contiguous
+    select_chunks_statement = (
+        select(BookmarkChunk.id, BookmarkChunk.bookmark_id, BookmarkChunk.embedding)
+        .join(Bookmark, Bookmark.id == BookmarkChunk.bookmark_id)
+        .where(and_(*_ready_chunk_conditions(user_id)))
+        .order_by(BookmarkChunk.bookmark_id, BookmarkChunk.chunk_index)
+    )
+    chunk_rows = (await session.execute(select_chunks_statement)).all()
+
+    # normalizing a large library takes a while, so do it off the event loop
+    index = await anyio.to_thread.run_sync(_index_chunk_rows, chunk_rows, generation)
+    logger.debug(
+        "indexed %d chunks of %d bookmarks for user %s",
+        len(index.chunk_ids),
+        len(index.bookmark_ids),
+        user_id,
+    )
+    return index
+
+
+def _index_chunk_rows(
+    chunk_rows: Sequence[Row[UUID, UUID, Any]], generation: int
+) -> UserVectorIndex:
+    """Returns the index of a user's chunk rows in bookmark order. Blocks the calling thread."""
+    bookmark_ids: list[UUID] = []
+    bookmark_starts: list[int] = []
+    chunk_bookmarks = np.empty(len(chunk_rows), dtype=np.int32)
+    for position, chunk_row in enumerate(chunk_rows):
+        if not bookmark_ids or bookmark_ids[-1] != chunk_row.bookmark_id:
+            bookmark_ids.append(chunk_row.bookmark_id)
+            bookmark_starts.append(position)
+        chunk_bookmarks[position] = len(bookmark_ids) - 1
+
+    embeddings = (
+        _unit_rows([chunk_row.embedding for chunk_row in chunk_rows])
+        if chunk_rows
+        else np.empty((0, settings.embedding_dim), dtype=np.float32)
+    )
+    return UserVectorIndex(
+        generation=generation,
+        embeddings=np.ascontiguousarray(embeddings, dtype=_index_dtype()),
+        chunk_ids=[chunk_row.id for chunk_row in chunk_rows],
+        chunk_bookmarks=chunk_bookmarks,
+        bookmark_starts=np.asarray(bookmark_starts, dtype=np.intp),
+        bookmark_ids=bookmark_ids,
+        bookmark_positions={
+            bookmark_id: position for position, bookmark_id in enumerate(bookmark_ids)
+        },
+    )
+
+
+async def get_user_index(
+    *, session: AsyncSession, user_id: UUID, generation: int
+) -> UserVectorIndex | None:
+    """
+    Returns the user's index for a library generation, loading it on first use.
+    Returns None when the index is disabled or the library is too large to hold.
+    """
+    if settings.vector_index_memory_mb <= 0:
+        return None
+
+    # a change to the library bumps the generation, so an older index is reloaded
+    index = _user_indexes.get(user_id)
+    if index is not None and index.generation == generation:
+        _user_indexes.move_to_end(user_id)
+        return index
+    if _oversized_users.get(user_id) == generation:
+        return None
+
+    load_lock = _load_locks.setdefault(user_id, anyio.Lock())
+    try:
+        async with load_lock:
+            # another search may have loaded this generation while this one waited
+            index = _user_indexes.get(user_id)
+            if index is not None and index.generation == generation:
+                _user_indexes.move_to_end(user_id)
+                return index
+            if _oversized_users.get(user_id) == generation:
+                return None
+
+            index = await _load_user_index(
+                session=session, user_id=user_id, generation=generation
+            )
+            # keep a newer index another search loaded in the meantime
+            cached_index = _user_indexes.get(user_id)
+            if index is not None and (
+                cached_index is None or cached_index.generation <= generation
+            ):
+                _store_index(user_id, index)
+            return index
+    finally:
+        # the lock passes straight to a waiting search, so an unlocked lock has none left
+        if not load_lock.locked():
+            _load_locks.pop(user_id, None)
+
+
+async def _bookmark_mask(
+    *,
+    session: AsyncSession,
+    user_id: UUID,
+    index: UserVectorIndex,
+    conditions: Sequence[ColumnElement[bool]],
+) -> Any | None:
+    """Returns which indexed bookmarks pass the conditions, or None when they all do."""
+    filter_conditions = [
+        condition for condition in conditions if not isinstance(condition, True_)
+    ]
+    if not filter_conditions:
+        return None
+    if any(isinstance(condition, False_) for condition in filter_conditions):
+        return np.zeros(len(index.bookmark_ids), dtype=bool)
+
+    # the bookmark filters stay in sql, answered by the bookmark indexes
+    select_bookmark_ids_statement = select(Bookmark.id).where(
+        and_(Bookmark.user_id == user_id, *filter_conditions)
+    )
+    bookmark_mask = np.zeros(len(index.bookmark_ids), dtype=bool)
+    for bookmark_id in (await session.scalars(select_bookmark_ids_statement)).all():
+        position = index.bookmark_positions.get(bookmark_id)
+        if position is not None:
+            bookmark_mask[position] = True
+    return bookmark_mask
+
+
+def nearest_bookmarks(
+    index: UserVectorIndex,
+    *,
+    search: EmbeddingArray,
+    limit: int,
+    bookmark_mask: Any | None = None,
+    max_distance: float | None = None,
+) -> list[VectorIndexMatch]:
+    """
+    Returns the closest chunk of each of the limit closest bookmarks.
+    Scores every chunk with one matrix product, so the results are exact.
+    """
+    if not index.chunk_ids or limit <= 0:
+        return []
+
+    # cosine similarity of every chunk, with filtered chunks scored out
+    scores = _chunk_scores(index.embeddings, _unit_rows(search))
+    if bookmark_mask is not None:
+        scores = np.where(bookmark_mask[index.chunk_bookmarks], scores, -np.inf)
+    if max_distance is not None:
+        scores = np.where(scores >= 1.0 - max_distance, scores, -np.inf)
+
+    # each bookmark's best chunk score, then the top bookmarks in score order
+    bookmark_scores = np.maximum.reduceat(scores, index.bookmark_starts)
+    matching_bookmarks = np.flatnonzero(np.isfinite(bookmark_scores))
+    if matching_bookmarks.size > limit:
+        matching_bookmarks = matching_bookmarks[
+            np.argpartition(-bookmark_scores[matching_bookmarks], limit - 1)[:limit]
+        ]
+    top_bookmarks = matching_bookmarks[
+        np.argsort(-bookmark_scores[matching_bookmarks], kind="stable")
+    ]
+
+    # the first chunk of each bookmark that scored the bookmark's best score
+    best_positions = np.flatnonzero(scores == bookmark_scores[index.chunk_bookmarks])
+    best_bookmarks, first_best = np.unique(
+        index.chunk_bookmarks[best_positions], return_index=True
+    )
+    best_chunks = np.zeros(len(index.bookmark_ids), dtype=np.intp)
+    best_chunks[best_bookmarks] = best_positions[first_best]
+
+    return [
+        VectorIndexMatch(
+            bookmark_id=index.bookmark_ids[bookmark_position],
+            chunk_id=index.chunk_ids[best_chunks[bookmark_position]],
+            distance=1.0 - float(bookmark_scores[bookmark_position]),
+        )
+        for bookmark_position in top_bookmarks.tolist()
+    ]
+
+
+async def search_vector_index(
+    *,
+    session: AsyncSession,
+    user_id: UUID,
+    generation: int,
+    search: EmbeddingArray,
+    limit: int,
+    conditions: Sequence[ColumnElement[bool]] = (),
+    exclude_bookmark_id: UUID | None = None,
+    max_distance: float | None = None,
+) -> list[VectorIndexMatch] | None:
+    """
+    Returns the best chunk of the closest ready bookmarks from the user's in-memory index.
+    Returns None when the library should be searched in postgres instead.
+    """
+    index = await get_user_index(
+        session=session, user_id=user_id, generation=generation
+    )
+    if index is None:
+        return None
+
+    bookmark_mask = await _bookmark_mask(
+        session=session, user_id=user_id, index=index, conditions=conditions
+    )
+    excluded_position = (
+        index.bookmark_positions.get(exclude_bookmark_id)
+        if exclude_bookmark_id is not None
+        else None
+    )
+    if excluded_position is not None:
+        if bookmark_mask is None:
+            bookmark_mask = np.ones(len(index.bookmark_ids), dtype=bool)
+        bookmark_mask[excluded_position] = False
+
+    # scoring every chunk of a large library takes a while, so do it off the event loop
+    return await anyio.to_thread.run_sync(
+        partial(
+            nearest_bookmarks,
+            index,
+            search=search,
+            limit=limit,
+            bookmark_mask=bookmark_mask,
+            max_distance=max_distance,
+        )
+    )
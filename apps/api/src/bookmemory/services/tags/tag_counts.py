@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+from dataclasses import dataclass
+from uuid import UUID
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bookmemory.core.settings import settings
+from bookmemory.db.models.tag import Tag
+
+
+@dataclass(frozen=True)
+class TagCount:
+    name: str
+    count: int
+
+
+# per-user tag counts for this worker process, least recently used first
+_tag_counts_cache: OrderedDict[UUID, tuple[float, list[TagCount]]] = OrderedDict()
+
+
+async def update_tag_counts(
+    *,
+    session: AsyncSession,
+    added_tag_ids: Iterable[UUID] = (),
+    removed_tag_ids: Iterable[UUID] = (),
+) -> None:
+    """
+    Adjusts the bookmark counts of tags added to or removed from a bookmark.
+    Runs in the caller's transaction so the counts commit with the bookmark.
+    """
+    added = set(added_tag_ids)
+    removed = set(removed_tag_ids)
+
+    # increment added tags and decrement removed tags. tags in both sets are unchanged
+    for tag_ids, delta in ((added - removed, 1), (removed - added, -1)):
+        if not tag_ids:
+            continue
+        await session.execute(
+            update(Tag)
+            .where(Tag.id.in_(tag_ids))
+            .values(
+                bookmark_count=func.greatest(Tag.bookmark_count + delta, 0),
+                # counting bookmarks doesn't change the tag itself
+                updated_at=Tag.updated_at,
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+
+def invalidate_tag_counts(user_id: UUID) -> None:
+    """Drops a user's cached tag counts. Call after committing a tag change."""
+    _tag_counts_cache.pop(user_id, None)
+
+
+async def get_tag_counts(*, session: AsyncSession, user_id: UUID) -> list[TagCount]:
+    """Returns a user's tags and bookmark counts in name order, from the cache when fresh."""
+    now = time.monotonic()
+    cached = _tag_counts_cache.get(user_id)
+    if cached is not None and now - cached[0] < settings.tag_counts_cache_seconds:
+        _tag_counts_cache.move_to_end(user_id)
+        return cached[1]
+
+    # read the maintained counts from the (user_id, lower(name)) index
+    select_tag_counts_statement = (
+        select(Tag.name, Tag.bookmark_count)
+        .where(Tag.user_id == user_id)
+        .order_by(func.lower(Tag.name).asc())
+    )
+    tag_counts = [
+        TagCount(name=name, count=bookmark_count)
+        for name, bookmark_count in (await session.execute(select_tag_counts_statement))
+    ]
+
+    # evict the least recently used users past the limit
+    _tag_counts_cache[user_id] = (now, tag_counts)
+    _tag_counts_cache.move_to_end(user_id)
+    while len(_tag_counts_cache) > settings.tag_counts_cache_max_users:
+        _tag_counts_cache.popitem(last=False)
+    return tag_counts
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+from typing import cast
+from uuid import UUID
+
+from sqlalchemy import ColumnElement, and_, false, select, true
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bookmemory.db.models.bookmark import Bookmark
+from bookmemory.db.models.tag import Tag
+from bookmemory.schemas.bookmarks import TagMode
+from bookmemory.services.tags.normalize_tags import normalize_tags
+
+
+def tag_ids_condition(
+    *, tag_ids: Sequence[UUID], tag_mode: TagMode
+) -> ColumnElement[bool]:
+    """
+    Returns a filter for bookmarks with any or all of the tag ids.
+    Both modes are answered by the GIN index on bookmarks.tag_ids.
+    """
+    if tag_mode == "ignore":
+        return true()
+    if not tag_ids:
+        # nothing can match any of no tags, and every bookmark has all of them
+        return false() if tag_mode == "any" else true()
+
+    if tag_mode == "all":
+        return Bookmark.tag_ids.contains(list(tag_ids))
+    return cast(ColumnElement[bool], Bookmark.tag_ids.overlap(list(tag_ids)))
+
+
+async def tag_names_condition(
+    *,
+    session: AsyncSession,
+    user_id: UUID,
+    tag_names: list[str] | None,
+    tag_mode: TagMode,
+) -> ColumnElement[bool]:
+    """Returns a filter for a user's bookmarks with any or all of the tag names."""
+    normalized_tags = normalize_tags(tag_names)
+    if tag_mode == "ignore" or not normalized_tags:
+        return true()
+
+    select_tag_ids_statement = select(Tag.id).where(
+        and_(Tag.user_id == user_id, Tag.name.in_(normalized_tags))
+    )
+    tag_ids = list((await session.scalars(select_tag_ids_statement)).all())
+
+    # a tag the user doesn't have can't be on every bookmark
+    if tag_mode == "all" and len(tag_ids) < len(normalized_tags):
+        return false()
+    return tag_ids_condition(tag_ids=tag_ids, tag_mode=tag_mode)
+
+
+def tag_filter_key(*, tag_names: Sequence[str] | None, tag_mode: TagMode) -> str:
+    """Returns a stable key for a tag filter, or an empty key when nothing is filtered."""
+    normalized_tags = normalize_tags(list(tag_names or []))
+    if tag_mode == "ignore" or not normalized_tags:
+        return ""
+    return f"{tag_mode}:{','.join(sorted(normalized_tags))}"
@@ -0,0 +1,11 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+# the engine needs a database url to import. tests that query postgres skip without one
+if (
+    "DATABASE_URL" not in os.environ
+    and not (Path(__file__).parents[1] / ".env").exists()
+):
+    os.environ["DATABASE_URL"] = "postgresql+asyncpg://localhost/bookmemory_test"
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import uuid
+from typing import Any, cast
+
+import anyio
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bookmemory.db.models.bookmark_chunk import BookmarkChunk
+from bookmemory.services.embedding.chunk_sync import BookmarkChunkSync, hash_chunk_text
+
+BOOKMARK_ID = uuid.uuid4()
+
+
+class RecordingSession:
+    """Records a chunk sync's writes and checks the unique chunk indexes at every flush."""
+
+    def __init__(self, existing_chunks: list[BookmarkChunk]) -> None:
+        self.existing_chunks = existing_chunks
+        self.deleted_chunk_ids: set[uuid.UUID] = set()
+        self.added_chunks: list[BookmarkChunk] = []
+        self.flushed_indexes: list[dict[uuid.UUID, int]] = []
+        self.statement_count = 0
+
+    async def execute(self, statement: Any) -> None:
+        self.statement_count += 1
+        for value in statement.compile().params.values():
+            self.deleted_chunk_ids.update(value)
+
+    def add_all(self, chunks: list[BookmarkChunk]) -> None:
+        self.added_chunks.extend(chunks)
+
+    async def flush(self) -> None:
+        live_chunks = [
+            chunk
+            for chunk in self.existing_chunks
+            if chunk.id not in self.deleted_chunk_ids
+        ] + self.added_chunks
+        chunk_indexes = [chunk.chunk_index for chunk in live_chunks]
+        assert len(chunk_indexes) == len(set(chunk_indexes))
+        self.flushed_indexes.append(
+            {chunk.id: chunk.chunk_index for chunk in self.existing_chunks}
+        )
+
+
+def _existing_chunks(texts: list[str]) -> list[BookmarkChunk]:
+    return [
+        BookmarkChunk(
+            id=uuid.uuid4(),
+            bookmark_id=BOOKMARK_ID,
+            chunk_index=chunk_index,
+            text=text,
+            text_hash=hash_chunk_text(text),
+        )
+        for chunk_index, text in enumerate(texts)
+    ]
+
+
+def _sync(
+    existing_chunks: list[BookmarkChunk],
+    texts: list[str],
+    *,
+    unembedded: frozenset[int] = frozenset(),
+) -> tuple[list[BookmarkChunk | None], RecordingSession]:
+    """Returns the chunks each text needs embedded and the session the sync applied to."""
+    chunk_sync = BookmarkChunkSync(
+        bookmark_id=BOOKMARK_ID,
+        existing_rows=[
+            (chunk, chunk_index in unembedded)
+            for chunk_index, chunk in enumerate(existing_chunks)
+        ],
+    )
+    pending_chunks = [chunk_sync.add(text) for text in texts]
+    session = RecordingSession(existing_chunks)
+    anyio.run(lambda: chunk_sync.apply(session=cast(AsyncSession, session)))
+    return pending_chunks, session
+
+
+def test_unchanged_chunks_are_kept_without_writes() -> None:
+    existing_chunks = _existing_chunks(["a", "b", "c"])
+
+    pending_chunks, session = _sync(existing_chunks, ["a", "b", "c"])
+
+    assert pending_chunks == [None, None, None]
+    assert session.statement_count == 0
+    assert session.added_chunks == []
+    assert [chunk.chunk_index for chunk in existing_chunks] == [0, 1, 2]
+
+
+def test_new_text_is_embedded_and_kept_chunks_shift() -> None:
+    existing_chunks = _existing_chunks(["a", "b", "c"])
+
+    pending_chunks, session = _sync(existing_chunks, ["x", "a", "b", "c"])
+
+    new_chunk = pending_chunks[0]
+    assert new_chunk is not None
+    assert (new_chunk.text, new_chunk.chunk_index) == ("x", 0)
+    assert pending_chunks[1:] == [None, None, None]
+    assert session.added_chunks == [new_chunk]
+    assert [chunk.chunk_index for chunk in existing_chunks] == [1, 2, 3]
+
+
+def test_moved_chunks_swap_through_temporary_indexes() -> None:
+    existing_chunks = _existing_chunks(["a", "b"])
+
+    _, session = _sync(existing_chunks, ["b", "a"])
+
+    # both chunks hold each other's target, so they move in two flushes
+    assert len(session.flushed_indexes) == 2
+    assert all(chunk_index < 0 for chunk_index in session.flushed_indexes[0].values())
+    assert [chunk.chunk_index for chunk in existing_chunks] == [1, 0]
+
+
+def test_removed_text_deletes_its_chunk() -> None:
+    existing_chunks = _existing_chunks(["a", "b", "c"])
+
+    pending_chunks, session = _sync(existing_chunks, ["b", "c"])
+
+    assert pending_chunks == [None, None]
+    assert session.deleted_chunk_ids == {existing_chunks[0].id}
+    assert [chunk.chunk_index for chunk in existing_chunks[1:]] == [0, 1]
+
+
+def test_repeated_texts_each_keep_one_chunk() -> None:
+    existing_chunks = _existing_chunks(["a", "a"])
+
+    pending_chunks, session = _sync(existing_chunks, ["a", "a", "a"])
+
+    third_chunk = pending_chunks[2]
+    assert pending_chunks[:2] == [None, None]
+    assert third_chunk is not None and third_chunk.chunk_index == 2
+    assert session.deleted_chunk_ids == set()
+
+
+def test_kept_chunk_without_embedding_is_embedded_again() -> None:
+    existing_chunks = _existing_chunks(["a", "b"])
+
+    pending_chunks, session = _sync(
+        existing_chunks, ["a", "b"], unembedded=frozenset({1})
+    )
+
+    assert pending_chunks == [None, existing_chunks[1]]
+    assert session.added_chunks == []
+
+
+def test_chunks_without_text_hash_get_one() -> None:
+    existing_chunks = _existing_chunks(["a"])
+    existing_chunks[0].text_hash = None
+
+    _sync(existing_chunks, ["a"])
+
+    assert existing_chunks[0].text_hash == hash_chunk_text("a")
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, cast
+
+import pytest
+from sqlalchemy import ColumnElement, Row
+
+from bookmemory.services.bookmarks.list_bookmarks import (
+    bookmark_cursor_condition,
+    encode_bookmark_cursor,
+)
+
+BOOKMARK = cast(
+    Row[Any],
+    SimpleNamespace(
+        id=uuid.uuid4(),
+        title="Query Planning",
+        created_at=datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+        updated_at=datetime(2026, 2, 3, 4, 5, 6, 789, tzinfo=timezone.utc),
+    ),
+)
+
+
+def _bound_values(condition: ColumnElement[bool]) -> list[Any]:
+    return list(condition.compile().params.values())
+
+
+def test_recent_cursor_continues_after_the_bookmark() -> None:
+    cursor = encode_bookmark_cursor(BOOKMARK, sort="recent")
+    condition = bookmark_cursor_condition(cursor, sort="recent")
+
+    assert "=" not in cursor
+    assert _bound_values(condition) == [BOOKMARK.updated_at, BOOKMARK.id]
+
+
+def test_alphabetical_cursor_continues_after_the_bookmark() -> None:
+    cursor = encode_bookmark_cursor(BOOKMARK, sort="alphabetical")
+    condition = bookmark_cursor_condition(cursor, sort="alphabetical")
+
+    bound_values = _bound_values(condition)
+    assert BOOKMARK.title in bound_values
+    assert bound_values[-2:] == [BOOKMARK.created_at, BOOKMARK.id]
+
+
+def test_cursor_for_another_sort_is_rejected() -> None:
+    cursor = encode_bookmark_cursor(BOOKMARK, sort="recent")
+
+    with pytest.raises(ValueError, match="invalid cursor"):
+        bookmark_cursor_condition(cursor, sort="alphabetical")
+
+
+@pytest.mark.parametrize("cursor", ["", "not a cursor", "e30", "eyJzb3J0IjoxfQ"])
+def test_malformed_cursor_is_rejected(cursor: str) -> None:
+    with pytest.raises(ValueError, match="invalid cursor"):
+        bookmark_cursor_condition(cursor, sort="recent")
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import argparse
+
+import pytest
+from sqlalchemy.exc import SQLAlchemyError
+
+from benchmarks import query_counts
+from bookmemory.core.settings import settings
+from bookmemory.db.engine import engine
+
+# the settings query_counts.run overrides to answer every ai request locally
+BENCHMARK_SETTINGS = [
+    "embedding_provider",
+    "description_provider",
+    "summary_provider",
+    "search_min_candidates",
+    "vector_index_memory_mb",
+    "search_rerank_candidates",
+]
+
+
+@pytest.mark.anyio
+async def test_handlers_run_a_fixed_number_of_statements(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Runs the list, cursor, search, and other handlers against the migrated DATABASE_URL."""
+    try:
+        async with engine.connect():
+            pass
+    except (OSError, SQLAlchemyError) as error:
+        pytest.skip(f"postgres is unavailable: {error}")
+    finally:
+        await engine.dispose()
+
+    # restore the overridden settings after the test
+    for name in BENCHMARK_SETTINGS:
+        monkeypatch.setattr(settings, name, getattr(settings, name))
+
+    # the read model statements can't grow with the library or pass their budgets
+    assert await query_counts.run(argparse.Namespace(sizes=[5, 40])) == 0
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from bookmemory.services.ai.rate_limit import RateLimitScheduler, TokenBucket
+
+
+class Clock:
+    """Holds a monotonic time that only moves when a test advances it."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(time, "monotonic", clock)
+    return clock
+
+
+def test_bucket_starts_full(clock: Clock) -> None:
+    bucket = TokenBucket(per_minute=60)
+
+    assert bucket.available == 60
+    assert bucket.seconds_until(60) == 0.0
+
+
+def test_bucket_refills_per_second_up_to_capacity(clock: Clock) -> None:
+    bucket = TokenBucket(per_minute=60)
+    bucket.available = 0
+
+    clock.now += 10
+    bucket.refill()
+    assert bucket.available == pytest.approx(10)
+
+    clock.now += 120
+    bucket.refill()
+    assert bucket.available == 60
+
+
+def test_bucket_waits_for_the_missing_amount(clock: Clock) -> None:
+    bucket = TokenBucket(per_minute=120)
+    bucket.available = 20
+
+    assert bucket.seconds_until(30) == pytest.approx(5)
+    # an amount over the capacity waits for a full bucket
+    assert bucket.seconds_until(1000) == pytest.approx(50)
+
+
+def test_bucket_capacity_is_at_least_one(clock: Clock) -> None:
+    assert TokenBucket(per_minute=0).capacity == 1
+
+
+def test_scheduler_refunds_rejected_tokens(clock: Clock) -> None:
+    scheduler = RateLimitScheduler(requests_per_minute=60, tokens_per_minute=1000)
+
+    assert scheduler._reserve(600) == 0.0
+    assert scheduler._reserve(600) == pytest.approx(12)
+
+    scheduler.refund(tokens=600)
+    assert scheduler._reserve(600) == 0.0
+
+
+def test_scheduler_corrects_reservations_with_the_reported_usage(
+    clock: Clock,
+) -> None:
+    scheduler = RateLimitScheduler(requests_per_minute=60, tokens_per_minute=1000)
+
+    assert scheduler._reserve(100) == 0.0
+    scheduler.record_usage(estimated_tokens=100, actual_tokens=500)
+
+    assert scheduler._reserve(600) == pytest.approx(6)
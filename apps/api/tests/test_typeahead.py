@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import uuid
+
+from bookmemory.services.search.typeahead import (
+    TypeaheadIndex,
+    build_typeahead_index,
+    match_entries,
+    normalize_typeahead_query,
+    to_typeahead_entry,
+    trigrams,
+)
+
+
+def _index(*bookmarks: tuple[str, str | None, list[str]]) -> TypeaheadIndex:
+    return build_typeahead_index(
+        [
+            to_typeahead_entry(
+                bookmark_id=uuid.uuid4(),
+                title=title,
+                url=url,
+                type="url",
+                tag_names=tag_names,
+            )
+            for title, url, tag_names in bookmarks
+        ]
+    )
+
+
+def _titles(index: TypeaheadIndex, query: str, *, limit: int = 10) -> list[str]:
+    return [
+        typeahead_match.title
+        for typeahead_match in match_entries(
+            index, query=normalize_typeahead_query(query), limit=limit
+        )
+    ]
+
+
+def test_trigrams_pad_each_word_like_pg_trgm() -> None:
+    assert trigrams("cat") == {"  c", " ca", "cat", "at "}
+    assert trigrams("a-b") == {"  a", " a ", "  b", " b "}
+    assert trigrams("") == frozenset()
+
+
+def test_title_prefixes_rank_before_other_matches() -> None:
+    index = _index(
+        ("Postgres planner notes", None, []),
+        ("Notes on postgres", None, []),
+        ("Postgres index tuning", None, []),
+    )
+
+    titles = _titles(index, "postgres")
+    assert set(titles[:2]) == {"Postgres planner notes", "Postgres index tuning"}
+    assert titles[2] == "Notes on postgres"
+
+
+def test_prefix_matches_fill_the_limit() -> None:
+    index = _index(
+        ("Rust ownership", None, []),
+        ("Rust lifetimes", None, []),
+        ("Trusting rust", None, []),
+    )
+
+    assert _titles(index, "rust", limit=2) == ["Rust lifetimes", "Rust ownership"]
+
+
+def test_matches_urls_and_tags() -> None:
+    index = _index(
+        ("First", "https://example.com/pgvector-guide", []),
+        ("Second", None, ["databases"]),
+        ("Third", None, ["cooking"]),
+    )
+
+    assert _titles(index, "pgvector") == ["First"]
+    assert _titles(index, "databa") == ["Second"]
+
+
+def test_matches_misspelled_titles() -> None:
+    index = _index(
+        ("Database notes", None, []),
+        ("Gardening", None, []),
+    )
+
+    assert _titles(index, "databse notes") == ["Database notes"]
+
+
+def test_queries_never_match_across_fields() -> None:
+    index = _index(("Alpha", "https://beta.example", ["gamma"]))
+
+    assert _titles(index, "a https") == []
+    assert _titles(index, "example gamma") == []
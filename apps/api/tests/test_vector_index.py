@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import uuid
+from typing import Any, NamedTuple
+
+import numpy as np
+import pytest
+
+from bookmemory.core.settings import settings
+from bookmemory.services.search.vector_index import (
+    UserVectorIndex,
+    _index_chunk_rows,
+    nearest_bookmarks,
+)
+
+BOOKMARK_IDS = [uuid.uuid4() for _ in range(3)]
+
+
+class ChunkRow(NamedTuple):
+    id: uuid.UUID
+    bookmark_id: uuid.UUID
+    embedding: Any
+
+
+def _embedding(*values: float) -> Any:
+    """Returns an embedding that starts with the values, scaled away from unit length."""
+    embedding = np.zeros(settings.embedding_dim, dtype=np.float32)
+    embedding[: len(values)] = values
+    return embedding * 3.0
+
+
+# chunks in bookmark order, the way the index loads them
+CHUNK_ROWS: list[Any] = [
+    ChunkRow(uuid.uuid4(), BOOKMARK_IDS[0], _embedding(0.0, 1.0)),
+    ChunkRow(uuid.uuid4(), BOOKMARK_IDS[0], _embedding(0.8, 0.6)),
+    ChunkRow(uuid.uuid4(), BOOKMARK_IDS[1], _embedding(1.0, 0.0)),
+    ChunkRow(uuid.uuid4(), BOOKMARK_IDS[2], _embedding(-1.0, 0.0)),
+    ChunkRow(uuid.uuid4(), BOOKMARK_IDS[2], _embedding(0.0, -1.0)),
+]
+
+
+@pytest.fixture(params=["float32", "float16"])
+def index(
+    request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch
+) -> UserVectorIndex:
+    monkeypatch.setattr(settings, "vector_index_dtype", request.param)
+    return _index_chunk_rows(CHUNK_ROWS, 1)
+
+
+def test_returns_the_best_chunk_of_the_closest_bookmarks(
+    index: UserVectorIndex,
+) -> None:
+    matches = nearest_bookmarks(index, search=_embedding(1.0, 0.0), limit=3)
+
+    assert [match.bookmark_id for match in matches] == [
+        BOOKMARK_IDS[1],
+        BOOKMARK_IDS[0],
+        BOOKMARK_IDS[2],
+    ]
+    assert [match.chunk_id for match in matches] == [
+        CHUNK_ROWS[2].id,
+        CHUNK_ROWS[1].id,
+        CHUNK_ROWS[4].id,
+    ]
+    assert [match.distance for match in matches] == pytest.approx(
+        [0.0, 0.2, 1.0], abs=1e-3
+    )
+
+
+def test_limits_the_bookmarks(index: UserVectorIndex) -> None:
+    matches = nearest_bookmarks(index, search=_embedding(0.0, 1.0), limit=1)
+
+    assert [match.chunk_id for match in matches] == [CHUNK_ROWS[0].id]
+
+
+def test_filters_bookmarks_by_mask_and_distance(index: UserVectorIndex) -> None:
+    search = _embedding(1.0, 0.0)
+
+    masked_matches = nearest_bookmarks(
+        index,
+        search=search,
+        limit=3,
+        bookmark_mask=np.array([True, False, True]),
+    )
+    close_matches = nearest_bookmarks(index, search=search, limit=3, max_distance=0.5)
+
+    assert [match.bookmark_id for match in masked_matches] == [
+        BOOKMARK_IDS[0],
+        BOOKMARK_IDS[2],
+    ]
+    assert [match.bookmark_id for match in close_matches] == [
+        BOOKMARK_IDS[1],
+        BOOKMARK_IDS[0],
+    ]
+
+
+def test_empty_index_returns_nothing() -> None:
+    index = _index_chunk_rows([], 1)
+
+    assert nearest_bookmarks(index, search=_embedding(1.0), limit=5) == []